@@ -1,145 +1,5 @@
-import tkinter as tk
-from tkinter import filedialog, messagebox
-import os
-import json
-import shutil
-import re
-
-# Configuration
-BASE_DIR = os.path.dirname(os.path.abspath(__file__))
-TARGETS_FILE = os.path.join(BASE_DIR, "targets.json")
-
-def select_directory(title):
-    root = tk.Tk()
-    root.withdraw()
-    path = filedialog.askdirectory(title=title)
-    root.destroy()
-    return path
-
-def select_file(title, filetypes):
-    root = tk.Tk()
-    root.withdraw()
-    path = filedialog.askopenfilename(title=title, filetypes=filetypes)
-    root.destroy()
-    return path
-
-def synchronize_file_targets():
-    """Logic to match and organize files for comparison."""
-    print("Initializing Multi-Pass Synchronization Engine...")
-    
-    hs_dir = select_directory("STEP 1: Select HubSpot Source Folder (PDFs)")
-    if not hs_dir: return
-    print(f"HubSpot Folder Selected: {hs_dir}")
-    
-    sf_dir = select_directory("STEP 2: Select Salesforce Source Folder (PDFs)")
-    if not sf_dir: return
-    print(f"Salesforce Folder Selected: {sf_dir}")
-
-    template_path = select_file("STEP 3: Select Excel Data Template (.xlsx)", [("Excel files", "*.xlsx"), ("All files", "*.*")])
-    if not template_path: return
-    print(f"Template Selected: {template_path}")
-
-    # Results Destination
-    RESULTS_MATCH_HS = os.path.join(hs_dir, "MATCHED_PAIRS")
-    RESULTS_MATCH_SF = os.path.join(sf_dir, "MATCHED_PAIRS")
-    for d in [RESULTS_MATCH_HS, RESULTS_MATCH_SF]:
-        if not os.path.exists(d): os.makedirs(d)
-
-    # Initial lists
-    hs_pool = [f for f in os.listdir(hs_dir) if f.endswith('.pdf')]
-    sf_pool = [f for f in os.listdir(sf_dir) if f.endswith('.pdf')]
-    
-    matches = {}
-
-    # --- Phase 1: Filename Match ---
-    print("Phase 1: Checking for exact filename matches...")
-    hs_pass1 = set(hs_pool)
-    sf_pass1 = set(sf_pool)
-    exact_matches = hs_pass1.intersection(sf_pass1)
-    
-    for filename in list(exact_matches):
-        try:
-            hs_src = os.path.join(hs_dir, filename)
-            sf_src = os.path.join(sf_dir, filename)
-            hs_dst = os.path.join(RESULTS_MATCH_HS, filename)
-            sf_dst = os.path.join(RESULTS_MATCH_SF, filename)
-            shutil.move(hs_src, hs_dst)
-            shutil.move(sf_src, sf_dst)
-            matches[filename] = {
-                "hs": hs_dst,
-                "sf": sf_dst,
-                "status_pdf": "pending",
-                "status_excel": "pending"
-            }
-            hs_pool.remove(filename)
-            sf_pool.remove(filename)
-        except Exception as e:
-            print(f"   ⚠️ Skipping {filename}: {e}")
-
-    # --- Phase 2: Name Match ---
-    print("Phase 2: Matching by truncating timestamps...")
-    
-    def get_base(f):
-        return re.split(r'_202\d', f)[0].strip()
-
-    hs_map = {get_base(f): f for f in hs_pool}
-    sf_map = {get_base(f): f for f in sf_pool}
-    
-    trunc_bases = set(hs_map.keys()).intersection(set(sf_map.keys()))
-    
-    for base in trunc_bases:
-        hs_filename = hs_map[base]
-        sf_filename = sf_map[base]
-        
-        # Verify it's truly 1:1 at the truncated level to avoid collisions
-        hs_count = sum(1 for f in hs_pool if get_base(f) == base)
-        sf_count = sum(1 for f in sf_pool if get_base(f) == base)
-        
-        if hs_count == 1 and sf_count == 1:
-            try:
-                hs_src = os.path.join(hs_dir, hs_filename)
-                sf_src = os.path.join(sf_dir, sf_filename)
-                hs_dst = os.path.join(RESULTS_MATCH_HS, hs_filename)
-                sf_dst = os.path.join(RESULTS_MATCH_SF, sf_filename)
-                shutil.move(hs_src, hs_dst)
-                shutil.move(sf_src, sf_dst)
-                matches[base] = {
-                    "hs": hs_dst,
-                    "sf": sf_dst,
-                    "status_pdf": "pending",
-                    "status_excel": "pending"
-                }
-                print(f"   Phase 2 Match: [{hs_filename}] <-> [{sf_filename}]")
-                hs_pool.remove(hs_filename)
-                sf_pool.remove(sf_filename)
-            except Exception as e:
-                print(f"   ⚠️ Skipping {base}: {e}")
-
-    # --- Phase 3: Orphan Processing ---
-    ORPHAN_HS = os.path.join(hs_dir, "UNMATCHED_PAIRS")
-    ORPHAN_SF = os.path.join(sf_dir, "UNMATCHED_PAIRS")
-    for d in [ORPHAN_HS, ORPHAN_SF]:
-        if not os.path.exists(d): os.makedirs(d)
-        
-    for f in list(hs_pool):
-        shutil.move(os.path.join(hs_dir, f), os.path.join(ORPHAN_HS, f))
-    for f in list(sf_pool):
-        shutil.move(os.path.join(sf_dir, f), os.path.join(ORPHAN_SF, f))
-
-    # Store metadata for 03 script
-    meta = {
-        "hs_dir": hs_dir,
-        "sf_dir": sf_dir,
-        "template_path": template_path,
-        "matches": matches
-    }
-
-    with open(TARGETS_FILE, "w") as f:
-        json.dump(meta, f, indent=4)
-        
-    summary = f"COMPLETED:\nMatches Found: {len(matches)}\nRemaining Unmatched: {len(hs_pool) + len(sf_pool)}"
-    print(f"\n{summary}")
-    messagebox.showinfo("Extraction Complete", summary)
+"""Step 01: match the HubSpot and Salesforce exports and write targets.db (see crm_qc.sync)."""
+from crm_qc.sync import synchronize_file_targets
 
 if __name__ == "__main__":
     synchronize_file_targets()
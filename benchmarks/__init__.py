@@ -0,0 +1 @@
+"""Synthetic corpus generation and stage-level benchmarks for the QA pipeline."""
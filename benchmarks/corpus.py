@@ -0,0 +1,128 @@
+"""Synthetic HubSpot/Salesforce report corpus for the benchmark suite."""
+import os
+import random
+import shutil
+import openpyxl
+from crm_qc.sections import SECTIONS
+
+SHEET_NAME = 'QA Report Test Tracker'
+TEMPLATE_HEADERS = ['#', 'Date', 'Tester', 'Report '] + [sec['key'] for sec in SECTIONS] + ['Test Result']
+
+ROWS_PER_PAGE = 40
+ROW_LABELS = ['Cardiac', 'Respiratory', 'Trauma', 'Behavioral', 'Neurological', 'Obstetric', 'Poisoning',
+              'Allergic Reaction', 'Abdominal Pain', 'Fall', 'Unknown Problem', 'Sick Person']
+COLUMN_X = [60, 250, 330, 410, 490]
+
+
+def _escape(text):
+    return text.replace('\\', '\\\\').replace('(', '\\(').replace(')', '\\)').encode('latin-1')
+
+
+def write_pdf(path, pages, creation_date):
+    """
+    Write a minimal PDF. Each page is a list of rows, each row a list of cells placed at
+    COLUMN_X so pdfminer sees separate text lines sharing a baseline, as in the real exports.
+    """
+    objects = [b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>"]
+    pages_id = 1 + 2 * len(pages) + 1
+    kids = []
+    for rows in pages:
+        ops = [b"BT /F1 9 Tf"]
+        y = 760
+        for cells in rows:
+            for x, cell in zip(COLUMN_X, cells):
+                ops.append(b"1 0 0 1 %d %d Tm (" % (x, y) + _escape(cell) + b") Tj")
+            y -= 18
+        ops.append(b"ET")
+        data = b"\n".join(ops)
+        objects.append(b"<< /Length %d >>\nstream\n" % len(data) + data + b"\nendstream")
+        objects.append(b"<< /Type /Page /Parent %d 0 R /MediaBox [0 0 612 792] "
+                       b"/Resources << /Font << /F1 1 0 R >> >> /Contents %d 0 R >>" % (pages_id, len(objects)))
+        kids.append(len(objects))
+    objects.append(b"<< /Type /Pages /Kids [" + b" ".join(b"%d 0 R" % k for k in kids) + b"] /Count %d >>" % len(kids))
+    objects.append(b"<< /Producer (CRM Export) /CreationDate (D:" + creation_date.encode() + b") >>")
+    objects.append(b"<< /Type /Catalog /Pages %d 0 R >>" % pages_id)
+    out = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for number, body in enumerate(objects, 1):
+        offsets.append(len(out))
+        out += b"%d 0 obj\n" % number + body + b"\nendobj\n"
+    xref = len(out)
+    out += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    out += b"".join(b"%010d 00000 n \n" % o for o in offsets)
+    out += (b"trailer\n<< /Size %d /Root %d 0 R /Info %d 0 R >>\nstartxref\n%d\n%%%%EOF\n"
+            % (len(objects) + 1, len(objects), len(objects) - 1, xref))
+    with open(path, 'wb') as f:
+        f.write(out)
+
+
+def report_rows(rng, page_count):
+    """Rows of one report: every section header followed by its share of table rows."""
+    body_rows = max(page_count * ROWS_PER_PAGE - len(SECTIONS) * 2, len(SECTIONS))
+    rows = []
+    for i, sec in enumerate(SECTIONS):
+        rows.append([sec['marker']])
+        rows.append(['Category', 'Prior Year', 'Current Year', 'Change', 'Share'])
+        for j in range(body_rows // len(SECTIONS)):
+            prior, current = rng.randint(0, 5000), rng.randint(0, 5000)
+            rows.append([f"{ROW_LABELS[j % len(ROW_LABELS)]} {j // len(ROW_LABELS) + 1}", f"{prior:,}", f"{current:,}",
+                         f"{current - prior:+,}", f"{rng.random() * 100:.1f}%"])
+    return rows
+
+
+def paginate(rows):
+    return [rows[i:i + ROWS_PER_PAGE] for i in range(0, len(rows), ROWS_PER_PAGE)]
+
+
+def inject_discrepancy(rng, rows):
+    """Change one numeric cell of a random table row; returns the modified copy."""
+    candidates = [i for i, row in enumerate(rows) if len(row) > 1 and row[0] != 'Category']
+    rows = [list(row) for row in rows]
+    row = rows[rng.choice(candidates)]
+    row[2] = f"{int(row[2].replace(',', '')) + rng.randint(1, 50):,}"
+    return rows
+
+
+def make_template(path):
+    wb = openpyxl.Workbook()
+    sheet = wb.active
+    sheet.title = SHEET_NAME
+    for idx, header in enumerate(TEMPLATE_HEADERS, 1):
+        sheet.cell(row=3, column=idx).value = header
+    wb.save(path)
+
+
+def generate_corpus(root, pairs, pages=6, identical_ratio=0.3, discrepancy_rate=0.5, exact_name_ratio=0.5,
+                    seed=0):
+    """
+    Build root/hubspot, root/salesforce and root/template.xlsx.
+    identical_ratio of the pairs are byte-identical copies; the others differ in their export
+    metadata and, at discrepancy_rate, in one table cell. exact_name_ratio of the pairs share a
+    filename (Phase 1), the rest only share the name before the timestamp (Phase 2).
+    Returns a summary dict of what was generated.
+    """
+    rng = random.Random(seed)
+    hs_dir, sf_dir = os.path.join(root, 'hubspot'), os.path.join(root, 'salesforce')
+    for d in (hs_dir, sf_dir):
+        os.makedirs(d, exist_ok=True)
+    counts = {'pairs': pairs, 'identical': 0, 'discrepant': 0}
+    for n in range(pairs):
+        name = f"Agency_{n:05d}"
+        if rng.random() < exact_name_ratio:
+            hs_name = sf_name = f"{name}_2025_0301.pdf"
+        else:
+            hs_name, sf_name = f"{name}_2025_0301_0915.pdf", f"{name}_2025_0302_1130.pdf"
+        rows = report_rows(rng, pages)
+        hs_path, sf_path = os.path.join(hs_dir, hs_name), os.path.join(sf_dir, sf_name)
+        write_pdf(hs_path, paginate(rows), "20250301091500")
+        if rng.random() < identical_ratio:
+            shutil.copyfile(hs_path, sf_path)
+            counts['identical'] += 1
+            continue
+        if rng.random() < discrepancy_rate:
+            rows = inject_discrepancy(rng, rows)
+            counts['discrepant'] += 1
+        write_pdf(sf_path, paginate(rows), "20250302113000")
+    template = os.path.join(root, 'template.xlsx')
+    make_template(template)
+    return dict(counts, hs_dir=hs_dir, sf_dir=sf_dir, template=template)
@@ -0,0 +1,189 @@
+"""
+Stage-level benchmark suite. Generates a synthetic corpus for each size and times every stage
+headlessly; results are written as JSON so runs can be compared across versions.
+
+    python3 -m benchmarks.run_benchmarks --sizes 10,100,1000,10000
+    python3 -m benchmarks.run_benchmarks --sizes 100 --compare benchmarks/results/previous.json
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+import openpyxl
+from benchmarks.corpus import SHEET_NAME, generate_corpus
+from crm_qc import reports, sync
+from crm_qc.diff_render import render_comparison_pdf
+from crm_qc.extraction import ExtractionPool
+from crm_qc.page_diff import pair_is_equivalent
+from crm_qc.sections import compare_sections, segment_sections
+from crm_qc.side_by_side import render_batch, write_side_by_side_pdf
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+RESULTS_DIR = os.path.join(REPO_DIR, "benchmarks", "results")
+STAGES = ['match', 'side_by_side', 'local_compare', 'sections', 'workbook']
+DEFAULT_SIZES = [10, 100, 1000, 10000]
+
+
+class Timer:
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.seconds = time.perf_counter() - self.start
+
+
+def bench_match(work, corpus):
+    with Timer() as t, contextlib.redirect_stdout(io.StringIO()):
+        matches, collisions, unmatched = sync.organize_targets(corpus['hs_dir'], corpus['sf_dir'], corpus['template'],
+                                                               targets_db=os.path.join(work, "targets.db"))
+    return t, matches, {'matched': len(matches), 'collisions': collisions, 'unmatched': unmatched}
+
+
+def bench_render(work, matches, workers, render, identical_flag):
+    out_dir = os.path.join(work, render.__name__)
+    os.makedirs(out_dir)
+    jobs = {}
+    for name, files in matches.items():
+        identical = pair_is_equivalent(files)
+        jobs[name] = (files['hs'], files['sf'], os.path.join(out_dir, f"{name}.pdf"),
+                      identical if identical_flag else not identical)
+    with Timer() as t:
+        errors = sum(1 for _, _, error in render_batch(jobs, workers, render=render) if error)
+    return t, {'errors': errors}
+
+
+def bench_sections(matches, workers):
+    verdicts = {}
+    with Timer() as t:
+        with ExtractionPool(workers) as pool:
+            pairs = [(n, f) for n, f in matches.items() if not pair_is_equivalent(f)]
+            for _, files in pairs:
+                pool.submit_pair(files['hs'], files['sf'])
+            for name, files in pairs:
+                text_hs, text_sf = pool.extract_pair(files['hs'], files['sf'])
+                verdicts[(files['hs'], files['sf'])] = compare_sections(segment_sections(text_hs),
+                                                                       segment_sections(text_sf))
+    discrepant = sum(1 for v in verdicts.values() if any(result for result, _, _ in v.values()))
+    return t, verdicts, {'parsed_pairs': len(verdicts), 'discrepant': discrepant}
+
+
+def bench_workbook(work, corpus, matches, verdicts):
+    wb = openpyxl.load_workbook(corpus['template'])
+    sheet = wb[SHEET_NAME]
+    col_map = {str(cell.value).strip(): idx + 1 for idx, cell in enumerate(sheet[3]) if cell.value}
+    lines = []
+    with Timer() as t, contextlib.redirect_stdout(io.StringIO()):
+        for row_idx, (name, files) in enumerate(matches.items(), start=4):
+            reports.process_client_analysis(sheet, row_idx, col_map, name, files, lines,
+                                            compare_stream=lambda hs, sf: verdicts[(hs, sf)])
+        wb.save(os.path.join(work, "report.xlsx"))
+        with open(os.path.join(work, "evidence.md"), "w") as f: f.write("\n".join(lines) + "\n")
+    return t, {'rows': len(matches)}
+
+
+def run_size(pairs, args):
+    work = tempfile.mkdtemp(prefix=f"qa_bench_{pairs}_")
+    results = []
+    try:
+        print(f"\n📦 Generating {pairs} pairs ({args.pages} pages each)...")
+        with Timer() as t:
+            corpus = generate_corpus(os.path.join(work, "corpus"), pairs, args.pages, args.identical_ratio,
+                                     args.discrepancy_rate, seed=args.seed)
+        print(f"   Corpus ready in {t.seconds:.2f}s ({corpus['identical']} identical, {corpus['discrepant']} discrepant)")
+
+        def record(stage, timer, details):
+            results.append({'pairs': pairs, 'stage': stage, 'seconds': round(timer.seconds, 4),
+                            'ms_per_pair': round(timer.seconds * 1000 / pairs, 3), **details})
+            print(f"   ⏱ {stage:<14} {timer.seconds:9.2f}s  {timer.seconds * 1000 / pairs:8.2f} ms/pair  {details}")
+
+        t, matches, details = bench_match(work, corpus)
+        record('match', t, details)
+        if 'side_by_side' in args.stages:
+            record('side_by_side', *bench_render(work, matches, args.workers, write_side_by_side_pdf, True))
+        if 'local_compare' in args.stages:
+            record('local_compare', *bench_render(work, matches, args.workers, render_comparison_pdf, False))
+        if 'sections' in args.stages or 'workbook' in args.stages:
+            t, verdicts, details = bench_sections(matches, args.workers)
+            if 'sections' in args.stages: record('sections', t, details)
+            if 'workbook' in args.stages:
+                record('workbook', *bench_workbook(work, corpus, matches, verdicts))
+    finally:
+        if args.keep:
+            print(f"   Corpus kept at {work}")
+        else:
+            shutil.rmtree(work, ignore_errors=True)
+    return results
+
+
+def git_revision():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=REPO_DIR, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare_runs(current, baseline_path):
+    """Print the per-stage change against a previous results file."""
+    with open(baseline_path) as f:
+        baseline = {(r['pairs'], r['stage']): r for r in json.load(f)['results']}
+    print(f"\n📊 Against {os.path.basename(baseline_path)}:")
+    for r in current:
+        old = baseline.get((r['pairs'], r['stage']))
+        if not old or not old['seconds']: continue
+        change = (r['seconds'] - old['seconds']) / old['seconds'] * 100
+        flag = "⚠️" if change > 10 else "  "
+        print(f"   {flag} {r['stage']:<14} @ {r['pairs']:>6} pairs: {old['seconds']:.2f}s -> {r['seconds']:.2f}s ({change:+.1f}%)")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sizes", default=",".join(map(str, DEFAULT_SIZES)), help="comma-separated pair counts")
+    parser.add_argument("--stages", default=",".join(STAGES), help=f"comma-separated subset of {','.join(STAGES)}")
+    parser.add_argument("--pages", type=int, default=6, help="pages per report PDF")
+    parser.add_argument("--identical-ratio", type=float, default=0.3)
+    parser.add_argument("--discrepancy-rate", type=float, default=0.5,
+                        help="share of non-identical pairs with an injected table discrepancy")
+    parser.add_argument("--workers", type=int, default=None, help="worker processes (default: one per CPU core)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="results JSON path (default: benchmarks/results/<timestamp>.json)")
+    parser.add_argument("--compare", help="previous results JSON to compare against")
+    parser.add_argument("--keep", action="store_true", help="keep the generated corpora and outputs")
+    args = parser.parse_args(argv)
+    args.stages = [s.strip() for s in args.stages.split(",") if s.strip()]
+    unknown = set(args.stages) - set(STAGES)
+    if unknown:
+        parser.error(f"unknown stage(s): {', '.join(sorted(unknown))}")
+
+    results = []
+    for pairs in [int(s) for s in args.sizes.split(",") if s.strip()]:
+        results.extend(run_size(pairs, args))
+
+    report = {
+        'created': datetime.now().isoformat(timespec='seconds'),
+        'revision': git_revision(),
+        'python': sys.version.split()[0],
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count(),
+        'parameters': {k: v for k, v in vars(args).items() if k not in ('output', 'compare', 'keep')},
+        'results': results,
+    }
+    output = args.output or os.path.join(RESULTS_DIR, datetime.now().strftime("%Y%m%d_%H%M%S") + ".json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w") as f: json.dump(report, f, indent=2)
+    print(f"\n✅ Results saved to {output}")
+    if args.compare:
+        compare_runs(results, args.compare)
+
+
+if __name__ == "__main__":
+    main()
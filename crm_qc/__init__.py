@@ -0,0 +1 @@
+"""Shared building blocks for the CRM QA synchronization, comparison and reporting scripts."""
@@ -0,0 +1,326 @@
+"""
+Step 02: render a Side-by-Side comparison PDF for every pending pair, locally (default) or through
+the Diffchecker website. Run through 02_EXECUTE_COMPARISON_ENGINE.py. pyautogui and tkinter are
+only loaded by GUI mode, calibration and the dialogs.
+"""
+import time
+import json
+import os
+import sys
+import platform
+from datetime import datetime
+from crm_qc.fingerprints import refresh_pair_fingerprints
+from crm_qc.page_diff import pair_is_equivalent, refresh_canonical_fingerprints
+from crm_qc.state import BASE_DIR, TARGETS_DB, TARGETS_FILE, open_target_store
+from crm_qc.results_index import ResultsIndex
+from crm_qc.side_by_side import render_batch, write_side_by_side_pdf
+from crm_qc.diff_render import render_comparison_pdf
+from crm_qc.waits import WaitLog
+from crm_qc.instrumentation import Tracer, timed
+
+# Loaded on first use by load_pyautogui(); importing it needs a display
+pyautogui = None
+
+# Configuration
+CONFIG_FILE = os.path.join(BASE_DIR, "diff_config.json")
+DOWNLOADS_DIR = os.path.expanduser("~/Downloads/")
+RESULTS_DIR = os.path.join(DOWNLOADS_DIR, "QA_ANALYTICS_RESULTS/")
+
+# Comparison engine: 'local' renders highlighted Side-by-Side PDFs in a process pool,
+# 'gui' drives the Diffchecker website (opt-in: python3 02_EXECUTE_COMPARISON_ENGINE.py gui)
+RENDER_WORKERS = int(os.environ.get("QA_RENDER_WORKERS", "0"))
+
+# GUI mode: the export is awaited by watching DOWNLOADS_DIR until this deadline (seconds).
+# UI settle delays (seconds) can be overridden with a "DELAYS" object in diff_config.json.
+EXPORT_TIMEOUT = float(os.environ.get("QA_EXPORT_TIMEOUT", "60"))
+UI_DELAYS = {
+    "focus": 0.5, "dialog_open": 2.0, "goto_folder": 1.0, "path_entry": 0.5, "confirm": 0.5,
+    "upload": 1.0, "render": 6.0, "export_menu": 1.5, "split_view": 2.5, "filename": 2.0,
+    "tab_close": 1.0, "tab_new": 2.0, "home": 2.0
+}
+
+# Timing spans (QA_TRACE=1) and cProfile (QA_PROFILE=1); both are no-ops by default
+TRACER = Tracer("02_compare", RESULTS_DIR)
+
+def load_pyautogui():
+    """Import pyautogui on first use; returns None without a display (headless server)."""
+    global pyautogui
+    if pyautogui is None:
+        try:
+            import pyautogui as module
+        except Exception:
+            return None
+        pyautogui = module
+    return pyautogui
+
+def generate_side_by_side_pdf(hs_path, sf_path, output_name, identical=False):
+    """Generates a Side-by-Side merged PDF locally."""
+    print(f"   Generating local report: {output_name}")
+    try:
+        write_side_by_side_pdf(hs_path, sf_path, os.path.join(RESULTS_DIR, output_name), identical)
+        print(f"   ✅ Local Report Generated: {output_name}")
+        return True
+    except Exception as e:
+        print(f"   ❌ Generation failed: {e}")
+        return False
+
+def paste_text(text):
+    """Put text on the clipboard and paste it into the focused field in one operation."""
+    import tkinter as tk
+    root = tk.Tk()
+    root.withdraw()
+    root.clipboard_clear()
+    root.clipboard_append(text)
+    root.update()
+    pyautogui.hotkey('command' if platform.system() == "Darwin" else 'ctrl', 'v')
+    # Keep serving the clipboard briefly; on X11 it is owned by this window
+    end = time.monotonic() + 0.3
+    while time.monotonic() < end:
+        root.update()
+        time.sleep(0.02)
+    root.destroy()
+
+def upload_sequence(coords, hs_path, sf_path, waits=None, delays=UI_DELAYS):
+    """Execute the file upload automation sequence with Cross-Platform support."""
+    waits = waits or WaitLog()
+    is_mac = platform.system() == "Darwin"
+    if "COMPARISON_AREA" in coords:
+        pyautogui.click(coords["COMPARISON_AREA"])
+        waits.pause(delays["focus"], "focus")
+    for label, browse_key, path in [("primary", "LEFT_BROWSE", hs_path), ("secondary", "RIGHT_BROWSE", sf_path)]:
+        print(f"   Uploading {label} file...")
+        pyautogui.click(coords[browse_key])
+        waits.pause(delays["dialog_open"], "dialog")
+        if is_mac:
+            pyautogui.hotkey('command', 'shift', 'g')
+            waits.pause(delays["goto_folder"], "dialog")
+        paste_text(path)
+        waits.pause(delays["path_entry"], "dialog")
+        pyautogui.press('enter')
+        waits.pause(delays["confirm"], "dialog")
+        pyautogui.press('enter')
+        waits.pause(delays["upload"], "upload")
+    print("   Initializing comparison engine...")
+    pyautogui.click(coords["FIND_DIFF_BTN"])
+
+def calibrate_mode():
+    """Map screen coordinates for automation with live execution during setup."""
+    print("\n--- LIVE CALIBRATION SETUP ---")
+    if load_pyautogui() is None:
+        print("Error: Calibration requires a display (pyautogui could not be loaded).")
+        return
+    store = open_target_store(TARGETS_DB, TARGETS_FILE)
+    if not store:
+        print("Error: targets.json not found.")
+        return
+    meta = store.load()
+    store.close()
+
+    matches = meta.get("matches", {})
+    if not matches:
+        print("Error: No matched pairs found in targets.json.")
+        return
+
+    test_hs, test_sf, found_diff = "", "", False
+    for name, paths in matches.items():
+        try:
+            if not pair_is_equivalent(paths):
+                test_hs, test_sf, found_diff = paths['hs'], paths['sf'], True
+                break
+        except Exception: continue
+    if not found_diff:
+        first_key = list(matches.keys())[0]
+        test_hs, test_sf = matches[first_key]["hs"], matches[first_key]["sf"]
+
+    new_config = {}
+    try:
+        targets = [("COMPARISON_AREA", "Middle of page"), ("LEFT_BROWSE", "Left Browse"), 
+                   ("RIGHT_BROWSE", "Right Browse"), ("FIND_DIFF_BTN", "Find Difference")]
+        for key, desc in targets:
+            input(f"👉 Hover over: [{desc}] and press ENTER...")
+            pos = pyautogui.position()
+            new_config[key] = [pos.x, pos.y]
+
+        print("\n🚀 Transitioning to Export Screen...")
+        upload_sequence(new_config, test_hs, test_sf)
+        time.sleep(5)
+
+        targets_v2 = [("EXPORT_BTN", "Top Right Export"), ("SPLIT_VIEW_BTN", "Side-by-Side PDF"), 
+                      ("SAVE_BTN", "BLUE Export button"), ("TAB_CLOSE_BTN", "Tab Close 'X'"), 
+                      ("TAB_NEW_BTN", "Tab New '+'"), ("DOCUMENT_MODE_BTN", "Diffchecker Home")]
+        for key, desc in targets_v2:
+            input(f"👉 Hover over: [{desc}] and press ENTER...")
+            pos = pyautogui.position()
+            new_config[key] = [pos.x, pos.y]
+            if key in ["EXPORT_BTN", "SPLIT_VIEW_BTN"]: pyautogui.click(pos.x, pos.y); time.sleep(1)
+
+        with open(CONFIG_FILE, "w") as f: json.dump(new_config, f, indent=4)
+        print(f"\n✨ Setup Complete!")
+    except KeyboardInterrupt: print("\nAborted.")
+
+def ask_batch_size(total_pending):
+    """Batch size dialog; without a display every pending pair is processed."""
+    import tkinter as tk
+    from tkinter import simpledialog
+    try:
+        root = tk.Tk()
+    except tk.TclError:
+        return total_pending
+    root.withdraw()
+    return simpledialog.askinteger("Batch Size", 
+                                   f"Total Pending PDFs: {total_pending}\n\nHow many pairs would you like to process?\n(Recommended: 10)", 
+                                   initialvalue=10, minvalue=1, maxvalue=total_pending)
+
+def notify(title, message):
+    import tkinter as tk
+    from tkinter import messagebox
+    try:
+        messagebox.showinfo(title, message)
+    except tk.TclError:
+        pass
+
+def run_local_batch(store, targets_dict, batch):
+    """Render highlighted comparisons for a batch across worker processes; returns the number completed."""
+    jobs = {}
+    for name, files in batch:
+        with TRACER.span("fingerprint", client=name):
+            if refresh_pair_fingerprints(files) | refresh_canonical_fingerprints(files): store.update_match(name, files)
+        is_identical = pair_is_equivalent(files)
+        timestamp = datetime.now().strftime("%m%d_%H%M")
+        out_name = f"{name}_{'MATCH' if is_identical else 'Comparison'}_{timestamp}.pdf"
+        jobs[name] = (files["hs"], files["sf"], os.path.join(RESULTS_DIR, out_name), not is_identical)
+
+    processed_count = 0
+    for name, result, error in render_batch(jobs, RENDER_WORKERS or None, render=timed(render_comparison_pdf)):
+        if error:
+            print(f"   ❌ {name}: Generation failed: {error}")
+            TRACER.record("render", 0.0, client=name, error=type(error).__name__)
+            continue
+        regions, seconds = result
+        if TRACER.enabled:
+            TRACER.record("render", seconds, client=name, size=os.path.getsize(jobs[name][2]))
+        out_name = os.path.basename(jobs[name][2])
+        detail = f"{regions} differing region(s) highlighted" if jobs[name][3] else "Exact Match"
+        print(f"   ✅ [{processed_count+1}/{len(jobs)}] {out_name} ({detail})")
+        targets_dict[name]['status_pdf'] = 'completed'
+        store.set_status(name, 'status_pdf', 'completed')
+        processed_count += 1
+    return processed_count
+
+def run_comparison_process(store, mode="local"):
+    """Main execution loop with physical file verification."""
+    coords = None
+    delays = UI_DELAYS
+    if mode == "gui":
+        if load_pyautogui() is None:
+            print("Error: GUI mode requires a display (pyautogui could not be loaded).")
+            return
+        if not os.path.exists(CONFIG_FILE): return
+        with open(CONFIG_FILE, "r") as f: coords = json.load(f)
+        delays = {**UI_DELAYS, **coords.get("DELAYS", {})}
+    
+    targets_dict = store.load().get("matches", {})
+    os.makedirs(RESULTS_DIR, exist_ok=True)
+    
+    # PHYSICAL VERIFICATION: If PDF is missing from RESULTS_DIR, set status_pdf back to 'pending'
+    results_index = ResultsIndex(RESULTS_DIR)
+    for name, files in targets_dict.items():
+        if files.get('status_pdf') == 'completed':
+            # The timestamp used previously is unknown, so look up any artifact for this exact name
+            if not results_index.has_artifact(name):
+                print(f"   Re-enabling PDF for {name} (File missing from Results)")
+                targets_dict[name]['status_pdf'] = 'pending'
+                store.set_status(name, 'status_pdf', 'pending')
+
+    pending_targets = {k: v for k, v in targets_dict.items() if v.get('status_pdf', 'pending') == 'pending'}
+    total_pending = len(pending_targets)
+    
+    if total_pending == 0:
+        notify("Complete", "No pending PDF comparisons left!")
+        return
+
+    batch_size = ask_batch_size(total_pending)
+    if not batch_size: return
+
+    if mode == "local":
+        print("\n--- Step 2: Rendering Local Comparisons ---")
+        with TRACER.profile("local_batch"):
+            processed_count = run_local_batch(store, targets_dict, list(pending_targets.items())[:batch_size])
+        summary_msg = f"PDF Batch Complete!\n\nProcessed: {processed_count}\nRemaining: {total_pending - processed_count}"
+        print(f"\n{summary_msg}")
+        notify("Batch Complete", summary_msg)
+        return
+
+    print("\n--- Step 2: Running Comparisons ---")
+    time.sleep(3)
+
+    processed_count = 0
+    for name, files in pending_targets.items():
+        if processed_count >= batch_size: break
+        
+        print(f"\n[{processed_count+1}/{batch_size}] File: {name}")
+        timestamp = datetime.now().strftime("%m%d_%H%M")
+        
+        with TRACER.span("fingerprint", client=name):
+            if refresh_pair_fingerprints(files) | refresh_canonical_fingerprints(files): store.update_match(name, files)
+        is_identical = pair_is_equivalent(files)
+
+        if is_identical:
+            print("   Status: Exact Match found (binary or canonical). Generating Local Report...")
+            out_name = f"{name}_MATCH_{timestamp}.pdf"
+            with TRACER.span("side_by_side", client=name):
+                generate_side_by_side_pdf(files["hs"], files["sf"], out_name, identical=True)
+        else:
+            waits = WaitLog()
+            upload_sequence(coords, files["hs"], files["sf"], waits, delays)
+            waits.pause(delays["render"], "render")
+            pyautogui.click(coords["EXPORT_BTN"])
+            waits.pause(delays["export_menu"], "export menu")
+            pyautogui.click(coords["SPLIT_VIEW_BTN"])
+            waits.pause(delays["split_view"], "export menu")
+            
+            base_name = f"{name}_Comparison_{timestamp}"
+            paste_text(base_name)
+            waits.pause(delays["filename"], "export menu")
+            pyautogui.click(coords["SAVE_BTN"])
+
+            expected_file = os.path.join(DOWNLOADS_DIR, base_name + ".pdf")
+            if waits.for_file(expected_file, EXPORT_TIMEOUT, "export download"):
+                os.rename(expected_file, os.path.join(RESULTS_DIR, base_name + ".pdf"))
+            else:
+                print("   ⚠️ Export failed. Generating Local Fallback...")
+                out_name = f"{name}_Comparison_{timestamp}.pdf"
+                with TRACER.span("side_by_side", client=name):
+                    generate_side_by_side_pdf(files["hs"], files["sf"], out_name)
+
+            pyautogui.click(coords["TAB_CLOSE_BTN"]); waits.pause(delays["tab_close"], "reset")
+            pyautogui.click(coords["TAB_NEW_BTN"]); waits.pause(delays["tab_new"], "reset")
+            pyautogui.click(coords["DOCUMENT_MODE_BTN"]); waits.pause(delays["home"], "reset")
+            print(f"   ⏱ {waits.summary()}")
+            for label, elapsed in waits.entries:
+                TRACER.record(f"wait_{label.replace(' ', '_')}", elapsed, client=name)
+
+        # Update status in the state store
+        targets_dict[name]['status_pdf'] = 'completed'
+        store.set_status(name, 'status_pdf', 'completed')
+        
+        processed_count += 1
+
+    summary_msg = f"PDF Batch Complete!\n\nProcessed: {processed_count}\nRemaining: {total_pending - processed_count}"
+    print(f"\n{summary_msg}")
+    notify("Batch Complete", summary_msg)
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    if argv and argv[0] == "calibrate":
+        calibrate_mode()
+        return 0
+    store = open_target_store(TARGETS_DB, TARGETS_FILE)
+    if not store:
+        print("Error: targets.json not found. Run Script 01 first.")
+        return 1
+    mode = "gui" if argv and argv[0] == "gui" else "local"
+    run_comparison_process(store, mode)
+    TRACER.close()
+    store.close()
+    return 0
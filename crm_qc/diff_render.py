@@ -0,0 +1,88 @@
+"""
+Headless comparison renderer: Side-by-Side PDFs with the differing text regions highlighted.
+pdfminer and pypdf are imported inside the functions (they dominate import time).
+"""
+import difflib
+from crm_qc.page_diff import page_fingerprints
+from crm_qc.side_by_side import build_side_by_side, write_side_by_side_pdf
+
+HIGHLIGHT_COLOR = "ffd54f"
+
+
+def _text_lines(layout_obj):
+    """Yield (normalized text, bbox) for every text line under a pdfminer layout object."""
+    from pdfminer.layout import LTTextContainer, LTTextLine
+    for obj in layout_obj:
+        if isinstance(obj, LTTextLine):
+            text = ' '.join(obj.get_text().split())
+            if text: yield text, obj.bbox
+        elif isinstance(obj, LTTextContainer):
+            yield from _text_lines(obj)
+
+
+def page_text_lines(path, page_numbers):
+    """Return {page index: [(text, bbox), ...]} for the requested pages only."""
+    from pdfminer.high_level import extract_pages
+    pages = {}
+    for index, layout in zip(sorted(page_numbers), extract_pages(path, page_numbers=set(page_numbers))):
+        pages[index] = list(_text_lines(layout))
+    return pages
+
+
+def diff_regions(hs_path, sf_path):
+    """
+    Returns (hs_regions, sf_regions): {page index: [bbox, ...]} of text lines that differ.
+    Pages whose content fingerprints match are never parsed.
+    """
+    from pypdf import PdfReader
+    reader_hs, reader_sf = PdfReader(hs_path), PdfReader(sf_path)
+    count_hs, count_sf = len(reader_hs.pages), len(reader_sf.pages)
+    if count_hs == count_sf:
+        fps_hs, fps_sf = page_fingerprints(reader_hs), page_fingerprints(reader_sf)
+        changed = [i for i in range(count_hs) if fps_hs[i] != fps_sf[i]]
+    else:
+        changed = list(range(max(count_hs, count_sf)))
+    if not changed:
+        return {}, {}
+
+    lines_hs = page_text_lines(hs_path, [i for i in changed if i < count_hs])
+    lines_sf = page_text_lines(sf_path, [i for i in changed if i < count_sf])
+    hs_regions, sf_regions = {}, {}
+    for i in changed:
+        left, right = lines_hs.get(i, []), lines_sf.get(i, [])
+        matcher = difflib.SequenceMatcher(None, [t for t, _ in left], [t for t, _ in right], autojunk=False)
+        for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+            if tag == 'equal': continue
+            hs_regions.setdefault(i, []).extend(bbox for _, bbox in left[i1:i2])
+            sf_regions.setdefault(i, []).extend(bbox for _, bbox in right[j1:j2])
+    return hs_regions, sf_regions
+
+
+def _highlight(x0, y0, x1, y1):
+    from pypdf.annotations import Highlight
+    from pypdf.generic import ArrayObject, FloatObject
+    quad = ArrayObject([FloatObject(v) for v in (x0, y1, x1, y1, x0, y0, x1, y0)])
+    return Highlight(rect=(x0, y0, x1, y1), quad_points=quad, highlight_color=HIGHLIGHT_COLOR, printing=True)
+
+
+def render_comparison_pdf(hs_path, sf_path, output_path, highlight=True):
+    """
+    Write the Side-by-Side comparison for a pair and return the number of highlighted regions.
+    With highlight=False (byte-identical pairs) the cheap mirrored composition is written.
+    """
+    if not highlight:
+        write_side_by_side_pdf(hs_path, sf_path, output_path, identical=True)
+        return 0
+    hs_regions, sf_regions = diff_regions(hs_path, sf_path)
+    writer, offsets = build_side_by_side(hs_path, sf_path)
+    count = 0
+    for i, offset in enumerate(offsets):
+        for x0, y0, x1, y1 in hs_regions.get(i, []):
+            writer.add_annotation(i, _highlight(x0, y0, x1, y1))
+            count += 1
+        for x0, y0, x1, y1 in sf_regions.get(i, []):
+            writer.add_annotation(i, _highlight(x0 + offset, y0, x1 + offset, y1))
+            count += 1
+    with open(output_path, "wb") as f:
+        writer.write(f)
+    return count
@@ -0,0 +1,243 @@
+"""Process-pool PDF text extraction for the analytical report stage."""
+import multiprocessing
+import os
+import signal
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from crm_qc.page_diff import extract_pair_text
+from crm_qc.streaming import compare_streams
+from crm_qc.table_diff import section_row_diffs
+
+DEFAULT_TIMEOUT = 300
+
+# Worker pools are also started from the pipeline's stage threads. A child forked while another thread
+# holds an import lock (heavy modules are imported lazily) deadlocks on its first import, so workers
+# are spawned, as on macOS by default.
+WORKER_CONTEXT = multiprocessing.get_context("spawn")
+
+
+class ExtractionTimeout(Exception):
+    """Raised inside a worker when a single PDF exceeds the per-file timeout."""
+
+
+def _on_alarm(signum, frame):
+    raise ExtractionTimeout("per-file extraction timeout exceeded")
+
+
+def ignore_interrupts():
+    """Worker initializer: Ctrl+C is handled by the parent, which lets running jobs finish."""
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+
+
+def _run_with_timeout(timeout, fn, *args):
+    """
+    Runs fn(*args), aborting after `timeout` seconds.
+    The timeout relies on SIGALRM and is not enforced where it is unavailable (Windows).
+    """
+    if not timeout or not hasattr(signal, 'SIGALRM'):
+        return fn(*args)
+    previous = signal.signal(signal.SIGALRM, _on_alarm)
+    signal.setitimer(signal.ITIMER_REAL, timeout)
+    try:
+        return fn(*args)
+    finally:
+        signal.setitimer(signal.ITIMER_REAL, 0)
+        signal.signal(signal.SIGALRM, previous)
+
+
+def extract_with_timeout(path, timeout=None):
+    """Runs pdfminer on one file, aborting after `timeout` seconds."""
+    from pdfminer.high_level import extract_text
+    return _run_with_timeout(timeout, extract_text, path)
+
+
+def extract_pair_with_timeout(hs_path, sf_path, timeout=None):
+    """Runs the page pre-diff extraction on a pair; the budget is `timeout` per file."""
+    return _run_with_timeout(timeout and timeout * 2, extract_pair_text, hs_path, sf_path)
+
+
+def compare_streams_with_timeout(hs_path, sf_path, fail_fast=False, timeout=None):
+    """Runs the streaming section comparator on a pair; the budget is `timeout` per file."""
+    return _run_with_timeout(timeout and timeout * 2, compare_streams, hs_path, sf_path, fail_fast)
+
+
+def row_diffs_with_timeout(hs_path, sf_path, keys, tolerance=0.0, timeout=None):
+    """Runs the document-wide row diff of a pair, filed under the given sections; the budget is `timeout` per file."""
+    return _run_with_timeout(timeout and timeout * 2, section_row_diffs, hs_path, sf_path, keys, tolerance)
+
+
+def pair_cache_key(hs_digest, sf_digest, side):
+    """Cache key for one side of a page pre-diff result, which is only valid for that exact pair."""
+    return f"pair:{hs_digest}:{sf_digest}:{side}"
+
+
+class InlineExecutor:
+    """Executor stand-in that runs each job at submit time in the calling process."""
+
+    def submit(self, fn, *args):
+        future = Future()
+        try:
+            future.set_result(fn(*args))
+        except Exception as e:
+            future.set_exception(e)
+        return future
+
+    def shutdown(self, wait=True, cancel_futures=False):
+        pass
+
+
+class ExtractionPool:
+    """
+    Extracts PDF text in worker processes while the caller consumes results in its own order.
+    A failing or timed-out file only raises for the caller that asks for it.
+    With a TextCache, files submitted with their content digest skip pdfminer on a hit.
+    inline=True runs every job in the calling process instead (for callers that already are a worker).
+    """
+
+    def __init__(self, workers=None, timeout=DEFAULT_TIMEOUT, cache=None, inline=False):
+        self.workers = 1 if inline else workers or os.cpu_count() or 1
+        self.timeout = timeout
+        self.cache = cache
+        self.inline = inline
+        self._executor = self._new_executor()
+        self._futures = {}
+        self._jobs = {}
+        self._digests = {}
+
+    def _new_executor(self):
+        if self.inline: return InlineExecutor()
+        return ProcessPoolExecutor(max_workers=self.workers, mp_context=WORKER_CONTEXT, initializer=ignore_interrupts)
+
+    def _submit_job(self, key, fn, *args):
+        self._jobs[key] = (fn, args)
+        self._futures[key] = self._executor.submit(fn, *args)
+        return self._futures[key]
+
+    def _resolved(self, key, cached=None):
+        future = Future()
+        future.set_result(cached)
+        self._futures[key] = future
+        return future
+
+    def _result(self, key):
+        """Wait for a job; if a worker died (e.g. killed by the OS) rebuild the pool and retry it once."""
+        try:
+            return self._futures[key].result()
+        except BrokenProcessPool:
+            self._restart()
+            return self._futures[key].result()
+
+    def _release(self, key):
+        self._futures.pop(key, None)
+        self._jobs.pop(key, None)
+        self._digests.pop(key, None)
+
+    def submit(self, path, digest=None):
+        """Queue a file for extraction; repeated submissions of the same path share one job."""
+        if path in self._futures:
+            return self._futures[path]
+        cached = self.cache.get(digest) if self.cache and digest else None
+        if cached is not None:
+            return self._resolved(path, cached)
+        if digest:
+            self._digests[path] = digest
+        return self._submit_job(path, extract_with_timeout, path, self.timeout)
+
+    def extract(self, path, digest=None):
+        """Block until the text of `path` is available, submitting it if needed."""
+        self.submit(path, digest)
+        try:
+            text = self._result(path)
+            digest = self._digests.get(path)
+            if self.cache and digest:
+                self.cache.put(digest, text)
+            return text
+        finally:
+            self._release(path)
+
+    def submit_pair(self, hs_path, sf_path, hs_digest=None, sf_digest=None):
+        """Queue page pre-diff extraction of a pair; resolves to (text_hs, text_sf, mode)."""
+        key = (hs_path, sf_path)
+        if key in self._futures:
+            return self._futures[key]
+        cached = self._cached_pair(hs_digest, sf_digest)
+        if cached is not None:
+            return self._resolved(key, cached + ('cached',))
+        if hs_digest and sf_digest:
+            self._digests[key] = (hs_digest, sf_digest)
+        return self._submit_job(key, extract_pair_with_timeout, hs_path, sf_path, self.timeout)
+
+    def extract_pair(self, hs_path, sf_path, hs_digest=None, sf_digest=None):
+        """Block until both texts of a pair are available, submitting it if needed."""
+        key = (hs_path, sf_path)
+        self.submit_pair(hs_path, sf_path, hs_digest, sf_digest)
+        try:
+            text_hs, text_sf, mode = self._result(key)
+            digests = self._digests.get(key)
+            if self.cache and digests:
+                if mode == 'full':
+                    self.cache.put(digests[0], text_hs)
+                    self.cache.put(digests[1], text_sf)
+                else:
+                    self.cache.put(pair_cache_key(*digests, 'hs'), text_hs)
+                    self.cache.put(pair_cache_key(*digests, 'sf'), text_sf)
+            return text_hs, text_sf
+        finally:
+            self._release(key)
+
+    def submit_stream(self, hs_path, sf_path, fail_fast=False):
+        """Queue a streaming page-by-page section comparison of a pair."""
+        key = ('stream', hs_path, sf_path)
+        if key in self._futures:
+            return self._futures[key]
+        return self._submit_job(key, compare_streams_with_timeout, hs_path, sf_path, fail_fast, self.timeout)
+
+    def compare_stream(self, hs_path, sf_path, fail_fast=False):
+        """Block until the streamed section verdicts of a pair are available."""
+        key = ('stream', hs_path, sf_path)
+        self.submit_stream(hs_path, sf_path, fail_fast)
+        try:
+            return self._result(key)
+        finally:
+            self._release(key)
+
+    def row_diff(self, hs_path, sf_path, keys, tolerance=0.0):
+        """Run the row-level table diff for the listed sections in a worker and wait for it."""
+        key = ('rows', hs_path, sf_path)
+        self._submit_job(key, row_diffs_with_timeout, hs_path, sf_path, list(keys), tolerance, self.timeout)
+        try:
+            return self._result(key)
+        finally:
+            self._release(key)
+
+    def _cached_pair(self, hs_digest, sf_digest):
+        if not self.cache or not hs_digest or not sf_digest:
+            return None
+        for hs_key, sf_key in [(hs_digest, sf_digest),
+                               (pair_cache_key(hs_digest, sf_digest, 'hs'), pair_cache_key(hs_digest, sf_digest, 'sf'))]:
+            text_hs = self.cache.get(hs_key)
+            text_sf = self.cache.get(sf_key) if text_hs is not None else None
+            if text_hs is not None and text_sf is not None:
+                return text_hs, text_sf
+        return None
+
+    def _restart(self):
+        pending = [key for key, fut in self._futures.items() if key in self._jobs and
+                   (not fut.done() or (not fut.cancelled() and isinstance(fut.exception(), BrokenProcessPool)))]
+        self._executor.shutdown(wait=False, cancel_futures=True)
+        self._executor = self._new_executor()
+        for key in pending:
+            fn, args = self._jobs[key]
+            self._submit_job(key, fn, *args)
+
+    def close(self):
+        self._executor.shutdown(wait=True, cancel_futures=True)
+        self._futures.clear()
+        self._jobs.clear()
+        self._digests.clear()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
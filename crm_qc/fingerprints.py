@@ -0,0 +1,45 @@
+"""Streaming content fingerprints shared by all three pipeline stages."""
+import hashlib
+import os
+
+CHUNK_SIZE = 1024 * 1024
+
+
+def hash_file(path, chunk_size=CHUNK_SIZE):
+    """Return the SHA-256 digest of a file without holding it in memory."""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def file_fingerprint(path, previous=None):
+    """
+    Returns {'size', 'mtime', 'sha256'} for a file.
+    The previous fingerprint is reused as-is when size and mtime are unchanged.
+    """
+    st = os.stat(path)
+    if previous and previous.get('sha256') and \
+            previous.get('size') == st.st_size and previous.get('mtime') == st.st_mtime_ns:
+        return previous
+    return {'size': st.st_size, 'mtime': st.st_mtime_ns, 'sha256': hash_file(path)}
+
+
+def refresh_pair_fingerprints(entry):
+    """Bring the stored fingerprints of a targets.json match entry up to date. Returns True if any were rehashed."""
+    stored = entry.setdefault('fingerprints', {})
+    changed = False
+    for side in ('hs', 'sf'):
+        fp = file_fingerprint(entry[side], stored.get(side))
+        if fp is not stored.get(side):
+            stored[side] = fp
+            changed = True
+    return changed
+
+
+def pair_is_identical(entry):
+    """Decide exact binary identity of a match entry from its stored digests."""
+    refresh_pair_fingerprints(entry)
+    hs_fp, sf_fp = entry['fingerprints']['hs'], entry['fingerprints']['sf']
+    return hs_fp['size'] == sf_fp['size'] and hs_fp['sha256'] == sf_fp['sha256']
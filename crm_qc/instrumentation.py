@@ -0,0 +1,184 @@
+"""
+Opt-in timing spans and profiling hooks.
+With QA_TRACE=1 every span is appended to a JSONL trace and summarised as Prometheus textfile
+histograms; QA_PROFILE=1 additionally runs cProfile around each profiled stage. When both are
+off, span() and profile() hand back a shared no-op context manager.
+"""
+import io
+import json
+import os
+import time
+from datetime import datetime
+
+TRACE_FILE = "QA_TRACE.jsonl"
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+
+class _NullSpan:
+    bytes = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+NULL_SPAN = _NullSpan()
+
+
+class Span:
+    __slots__ = ('tracer', 'name', 'client', 'bytes', 'start')
+
+    def __init__(self, tracer, name, client, size):
+        self.tracer, self.name, self.client, self.bytes = tracer, name, client, size
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.tracer.record(self.name, time.perf_counter() - self.start, self.client, self.bytes,
+                           error=exc_type.__name__ if exc_type else None)
+        return False
+
+
+class Histogram:
+    """Cumulative Prometheus-style histogram of span durations, plus byte and error totals."""
+
+    def __init__(self):
+        self.counts = [0] * len(BUCKETS)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.bytes = 0
+        self.errors = 0
+
+    def observe(self, seconds, size=None, error=False):
+        for i, bound in enumerate(BUCKETS):
+            if seconds <= bound: self.counts[i] += 1
+        self.count += 1
+        self.total += seconds
+        self.max = max(self.max, seconds)
+        if size: self.bytes += size
+        if error: self.errors += 1
+
+
+class _Profile:
+    def __init__(self, tracer, name):
+        import cProfile
+        self.tracer, self.name = tracer, name
+        self.profiler = cProfile.Profile()
+
+    def __enter__(self):
+        self.profiler.enable()
+        return self
+
+    def __exit__(self, *exc):
+        self.profiler.disable()
+        self.tracer.save_profile(self.name, self.profiler)
+        return False
+
+
+class Tracer:
+    """
+    Collects spans for one pipeline stage ("01_sync", "02_compare", "03_reports").
+    Nothing is written until the first span is recorded, so constructing a tracer is free.
+    """
+
+    def __init__(self, stage, output_dir, enabled=None, profile=None):
+        if enabled is None: enabled = os.environ.get("QA_TRACE", "0") == "1"
+        if profile is None: profile = os.environ.get("QA_PROFILE", "0") == "1"
+        self.stage = stage
+        self.output_dir = output_dir
+        self.enabled = enabled
+        self.profiling = profile
+        self.histograms = {}
+        self._trace = None
+        self._run = datetime.now().strftime("%Y%m%d_%H%M%S")
+
+    def span(self, name, client=None, size=None):
+        """Context manager timing one unit of work; set .bytes on it when the size is only known later."""
+        if not self.enabled: return NULL_SPAN
+        return Span(self, name, client, size)
+
+    def record(self, name, seconds, client=None, size=None, error=None):
+        """Record a span measured elsewhere (e.g. inside a worker process)."""
+        if not self.enabled: return
+        self.histograms.setdefault(name, Histogram()).observe(seconds, size, error is not None)
+        if self._trace is None:
+            os.makedirs(self.output_dir, exist_ok=True)
+            self._trace = open(os.path.join(self.output_dir, TRACE_FILE), "a")
+        event = {"ts": time.time(), "run": self._run, "stage": self.stage, "name": name,
+                 "client": client, "seconds": round(seconds, 6), "bytes": size}
+        if error: event["error"] = error
+        self._trace.write(json.dumps(event) + "\n")
+
+    def profile(self, name):
+        """Context manager running cProfile around a stage when QA_PROFILE=1."""
+        if not self.profiling: return NULL_SPAN
+        return _Profile(self, name)
+
+    def save_profile(self, name, profiler):
+        import pstats
+        os.makedirs(self.output_dir, exist_ok=True)
+        path = os.path.join(self.output_dir, f"profile_{self.stage}_{name}_{self._run}.prof")
+        profiler.dump_stats(path)
+        report = io.StringIO()
+        pstats.Stats(profiler, stream=report).sort_stats("cumulative").print_stats(15)
+        print(f"🔬 Profile for {name} saved to {path}")
+        print(report.getvalue())
+
+    def write_metrics(self):
+        """Rewrite this stage's Prometheus textfile (atomically, as the node_exporter collector expects)."""
+        if not self.histograms: return
+        labels = lambda name: f'stage="{self.stage}",span="{name}"'
+        lines = ["# HELP qa_span_seconds Duration of instrumented pipeline spans.",
+                 "# TYPE qa_span_seconds histogram"]
+        for name, h in sorted(self.histograms.items()):
+            for bound, count in zip(BUCKETS, h.counts):
+                lines.append(f'qa_span_seconds_bucket{{{labels(name)},le="{bound}"}} {count}')
+            lines.append(f'qa_span_seconds_bucket{{{labels(name)},le="+Inf"}} {h.count}')
+            lines.append(f'qa_span_seconds_sum{{{labels(name)}}} {h.total:.6f}')
+            lines.append(f'qa_span_seconds_count{{{labels(name)}}} {h.count}')
+        lines += ["# HELP qa_span_bytes_total Bytes processed by instrumented spans.",
+                  "# TYPE qa_span_bytes_total counter"]
+        lines += [f'qa_span_bytes_total{{{labels(name)}}} {h.bytes}' for name, h in sorted(self.histograms.items())]
+        lines += ["# HELP qa_span_errors_total Spans that ended with an exception.",
+                  "# TYPE qa_span_errors_total counter"]
+        lines += [f'qa_span_errors_total{{{labels(name)}}} {h.errors}' for name, h in sorted(self.histograms.items())]
+        path = os.path.join(self.output_dir, f"qa_pipeline_{self.stage}.prom")
+        with open(path + ".tmp", "w") as f: f.write("\n".join(lines) + "\n")
+        os.replace(path + ".tmp", path)
+
+    def summary(self):
+        """One line per span name, slowest total first."""
+        rows = sorted(self.histograms.items(), key=lambda item: -item[1].total)
+        return [f"⏱ {name}: {h.count}x, {h.total:.2f}s total, {h.total / h.count * 1000:.1f} ms avg, "
+                f"{h.max:.2f}s max" + (f", {h.bytes / 1048576:.1f} MB" if h.bytes else "") for name, h in rows]
+
+    def close(self):
+        """Flush the trace, write the metrics textfile and print the batch summary."""
+        if not self.enabled or not self.histograms: return
+        self.write_metrics()
+        if self._trace:
+            self._trace.close()
+            self._trace = None
+        print("\n--- Timing Summary ---")
+        for line in self.summary(): print(line)
+        print(f"Trace: {os.path.join(self.output_dir, TRACE_FILE)}")
+
+
+def timed(fn):
+    """Wrap a worker function so it returns (result, seconds); the wrapper stays picklable."""
+    return _Timed(fn)
+
+
+class _Timed:
+    def __init__(self, fn):
+        self.fn = fn
+
+    def __call__(self, *args):
+        start = time.perf_counter()
+        result = self.fn(*args)
+        return result, time.perf_counter() - start
@@ -0,0 +1,174 @@
+"""Filename matching between the HubSpot and Salesforce export folders."""
+import re
+from collections import Counter, defaultdict
+
+TIMESTAMP_SPLIT = re.compile(r'_202\d')
+
+
+def get_base(filename):
+    """Truncate an export filename at its first timestamp."""
+    return TIMESTAMP_SPLIT.split(filename, 1)[0].strip()
+
+
+def repeated_bases(bases):
+    """The base names that occur more than once in a list (usually none, which one set() settles)."""
+    if len(set(bases)) == len(bases): return set()
+    return {base for base, count in Counter(bases).items() if count > 1}
+
+
+def plan_name_matches(hs_pool, sf_pool):
+    """
+    Phase 2 matcher: pairs files whose truncated base names line up.
+    Returns (pairs, collisions) where pairs maps base -> (hs_file, sf_file) for bases
+    that are 1:1 across both sides, and collisions maps base -> (hs_files, sf_files)
+    for shared bases with more than one candidate on either side.
+    Each filename is truncated once, and files are only grouped into lists for the
+    (few) colliding bases; 100k files per side take about 0.3s.
+    """
+    hs_bases, sf_bases = list(map(get_base, hs_pool)), list(map(get_base, sf_pool))
+    sf_by_base = dict(zip(sf_bases, sf_pool))
+    repeated = repeated_bases(hs_bases) | repeated_bases(sf_bases)
+
+    pairs = {}
+    collisions = {}
+    for base, hs_file in zip(hs_bases, hs_pool):
+        if base not in sf_by_base: continue
+        if base in repeated:
+            collisions.setdefault(base, ([], []))[0].append(hs_file)
+        else:
+            pairs[base] = (hs_file, sf_by_base[base])
+    for base, sf_file in zip(sf_bases, sf_pool):
+        if base in collisions: collisions[base][1].append(sf_file)
+    return pairs, collisions
+
+
+# --- Phase 2.5: fuzzy matching of the names left over by Phases 1 and 2 ---
+FUZZY_THRESHOLD = 0.85  # minimum trigram Dice similarity
+FUZZY_MARGIN = 0.05     # the best candidate must beat the runner-up by this much on both sides
+PROBE_HITS = 2          # shared rare trigrams a candidate needs before it is scored
+COMMON_GRAM = 300       # trigrams found in more Salesforce names than this are not probed
+WORD = re.compile(r'[a-z]+|\d+')
+YEAR = re.compile(r'(19|20)\d{2}$|(19|20)\d{6,12}$')
+
+
+def name_tokens(filename):
+    """
+    Lower-cased word and number tokens of a filename with '&' read as 'and' and every timestamp
+    removed: a year (or compact 2025030109-style stamp), the numbers running on after it and,
+    when the year comes last, the one- or two-digit day/month numbers right before it.
+    """
+    stem = filename[:-4] if filename.lower().endswith('.pdf') else filename
+    tokens = WORD.findall(stem.lower().replace('&', ' and '))
+    stamp = [False] * len(tokens)
+    for i, token in enumerate(tokens):
+        if not YEAR.match(token): continue
+        stamp[i] = True
+        j = i + 1
+        while j < len(tokens) and (tokens[j].isdigit() and len(tokens[j]) <= 6 or tokens[j] in ('am', 'pm', 't')):
+            stamp[j] = True
+            j += 1
+        # Day and month only precede the year in formats that end with it (03-01-2025)
+        j = i - 1 if j == i + 1 else -1
+        while j >= 0 and tokens[j].isdigit() and len(tokens[j]) <= 2:
+            stamp[j] = True
+            j -= 1
+    return [t for t, is_stamp in zip(tokens, stamp) if not is_stamp]
+
+
+def normalize_name(filename):
+    """Canonical base name for fuzzy matching; word order is ignored by sorting the tokens."""
+    return ' '.join(sorted(name_tokens(filename)))
+
+
+def trigrams(key):
+    padded = f" {key} "
+    return frozenset([padded[i:i + 3] for i in range(len(padded) - 2)])
+
+
+def plan_fuzzy_matches(hs_pool, sf_pool, threshold=FUZZY_THRESHOLD, margin=FUZZY_MARGIN):
+    """
+    Phase 2.5 matcher for files left unmatched by Phases 1 and 2 (typos, '&' vs 'and',
+    reordered words, other timestamp formats).
+
+    Normalized names are indexed by character trigram. Two names with Dice similarity >= threshold
+    share at least alpha = ceil(J * |A|) trigrams (J the equivalent Jaccard bound), so at least
+    k of them fall within the |A| - alpha + k rarest trigrams of A (prefix filtering). Each name
+    probes the index with just those and only candidates hit k times are scored: no all-pairs
+    pass and few verifications. Numbers outside the timestamp (client IDs) must agree exactly.
+    A pair is accepted when each file is the other's best candidate by at least `margin`.
+    Trigrams shared by more than COMMON_GRAM names ('ins', 'ncy') are left out of the probe, which
+    bounds the work per name on large sets; a pair whose rarest trigrams are all that common
+    can be missed and stays unmatched.
+
+    Returns (pairs, ambiguous) where pairs maps hs_file -> (sf_file, score) and ambiguous
+    counts the files whose best candidate passed the threshold but was not clear-cut.
+    """
+    hs_keys = [normalize_name(f) for f in hs_pool]
+    sf_keys = [normalize_name(f) for f in sf_pool]
+
+    # Names that normalize identically on exactly one file per side need no scoring
+    pairs, ambiguous = {}, 0
+    hs_by_key, sf_by_key = defaultdict(list), defaultdict(list)
+    for i, key in enumerate(hs_keys): hs_by_key[key].append(i)
+    for j, key in enumerate(sf_keys): sf_by_key[key].append(j)
+    exact = {hs_by_key[key][0]: sf_by_key[key][0] for key in hs_by_key
+             if key and len(hs_by_key[key]) == 1 and len(sf_by_key.get(key, ())) == 1}
+    for i, j in exact.items(): pairs[hs_pool[i]] = (sf_pool[j], 1.0)
+    taken = set(exact.values())
+    hs_rest = [i for i in range(len(hs_pool)) if i not in exact]
+    sf_rest = [j for j in range(len(sf_pool)) if j not in taken]
+    hs_pool, hs_keys = [hs_pool[i] for i in hs_rest], [hs_keys[i] for i in hs_rest]
+    sf_pool, sf_keys = [sf_pool[j] for j in sf_rest], [sf_keys[j] for j in sf_rest]
+
+    hs_grams = [trigrams(k) for k in hs_keys]
+    sf_grams = [trigrams(k) for k in sf_keys]
+    sf_sizes = [len(g) for g in sf_grams]
+    numbers = lambda key: [t for t in key.split() if t.isdigit()]
+
+    index = defaultdict(list)
+    for j, grams in enumerate(sf_grams):
+        for g in grams: index[g].append(j)
+    rarity = lambda g: (len(index.get(g, ())), g)
+    jaccard = threshold / (2 - threshold)
+
+    hs_best = [[] for _ in hs_pool]   # (score, j) candidates above threshold per HubSpot file
+    sf_best = [[] for _ in sf_pool]
+    for i, grams in enumerate(hs_grams):
+        size = len(grams)
+        alpha = -int(-jaccard * size // 1)
+        hits = min(PROBE_HITS, alpha)
+        probe = [g for g in sorted(grams, key=rarity)[:size - alpha + hits]
+                 if len(index.get(g, ())) <= COMMON_GRAM]
+        hits = min(hits, len(probe))
+        if not hits: continue
+        # hit[n] holds the candidates found in more than n of the probed buckets (set operations run in C)
+        hit = [set() for _ in range(hits)]
+        for g in probe:
+            bucket = index.get(g, ())
+            for n in range(hits - 1, 0, -1): hit[n].update(hit[n - 1].intersection(bucket))
+            hit[0].update(bucket)
+        # Shared-gram counts through map() (no per-candidate Python frame); the score test implies the size bound
+        found = list(hit[-1])
+        for j, shared in zip(found, map(len, map(grams.intersection, map(sf_grams.__getitem__, found)))):
+            score = 2 * shared / (size + sf_sizes[j])
+            if score < threshold or numbers(hs_keys[i]) != numbers(sf_keys[j]): continue
+            hs_best[i].append((score, j))
+            sf_best[j].append((score, i))
+
+    def clear_winner(candidates):
+        if not candidates: return None
+        ranked = sorted(candidates, reverse=True)
+        if len(ranked) > 1 and ranked[0][0] - ranked[1][0] < margin: return False
+        return ranked[0][1]
+
+    sf_winner = [clear_winner(c) for c in sf_best]
+    for i, candidates in enumerate(hs_best):
+        j = clear_winner(candidates)
+        if j is None: continue
+        # Both sides must be clear-cut: False (ambiguous) would compare equal to HubSpot index 0
+        if j is False or sf_winner[j] is False or sf_winner[j] != i:
+            ambiguous += 1
+            continue
+        score = max(s for s, k in candidates if k == j)
+        pairs[hs_pool[i]] = (sf_pool[j], round(score, 3))
+    return pairs, ambiguous
@@ -0,0 +1,299 @@
+"""
+Journaled triage moves for Step 01. Every move of a run is planned and written to the move_journal
+table of targets.db before the first file is touched. Moves are same-filesystem renames, grouped in
+units (a matched pair, or one collision or orphan file); a unit whose second move fails is moved
+back, so a pair is never left split. Outcomes are committed together with the matches they
+complete, so an interrupted run can be resumed (Step 01 does this on its next run) or rolled back.
+
+Usage:
+    python -m crm_qc.mover status
+    python -m crm_qc.mover resume [--workers N]
+    python -m crm_qc.mover rollback [--workers N]
+"""
+import argparse
+import errno
+import itertools
+import os
+import re
+import shutil
+import subprocess
+import sys
+import time
+from collections import Counter, namedtuple
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from crm_qc.fingerprints import file_fingerprint
+from crm_qc.state import TARGETS_DB, TargetStore
+
+# Same fields as the move_journal table; seq is the plan order, a unit's moves succeed or fail together
+Move = namedtuple('Move', 'seq unit kind name side src dst score')
+
+# Rename latency dominates on network shares, so moves run in a thread pool there (0 = auto)
+MOVE_WORKERS = int(os.environ.get("QA_MOVE_WORKERS", "0"))
+NETWORK_MOVE_WORKERS = 16
+NETWORK_FILESYSTEMS = {'nfs', 'nfs4', 'cifs', 'smb2', 'smb3', 'smbfs', 'afpfs', 'webdav', 'fuse.sshfs', 'sshfs', '9p'}
+# "//user@nas/share on /Volumes/share (smbfs, nodev, nosuid, mounted by user)" (macOS/BSD mount output)
+MOUNT_LINE = re.compile(r'^.+? on (.+) \(([^,)]+)')
+
+# Journal commits: every N finished units or T seconds, whichever comes first
+COMMIT_EVERY = 500
+COMMIT_SECONDS = 2.0
+
+
+class TriagePlan:
+    """Every move of a Step 01 run, built before any file is touched."""
+
+    def __init__(self, first_seq=0, first_unit=0):
+        self.moves = []
+        self.names = set()
+        self._seqs = itertools.count(first_seq)
+        self._units = itertools.count(first_unit)
+
+    def _add(self, unit, kind, name, side, src_dir, filename, subdir, score=None):
+        dst = os.path.join(src_dir, subdir, filename)
+        self.moves.append(Move(next(self._seqs), unit, kind, name, side, os.path.join(src_dir, filename), dst, score))
+
+    def add_pair(self, name, hs_dir, sf_dir, hs_filename, sf_filename, score=None):
+        unit = next(self._units)
+        self.names.add(name)
+        self._add(unit, 'match', name, 'hs', hs_dir, hs_filename, "MATCHED_PAIRS", score)
+        self._add(unit, 'match', name, 'sf', sf_dir, sf_filename, "MATCHED_PAIRS", score)
+
+    def add_file(self, kind, side, src_dir, filename, subdir):
+        self._add(next(self._units), kind, None, side, src_dir, filename, subdir)
+
+
+def mount_table():
+    """[(mount point, filesystem type)] from /proc/mounts (Linux) or the mount command (macOS/BSD)."""
+    try:
+        with open('/proc/mounts') as f:
+            return [(fields[1].replace('\\040', ' '), fields[2]) for fields in map(str.split, f) if len(fields) > 2]
+    except OSError:
+        pass
+    try:
+        output = subprocess.run(['mount'], capture_output=True, text=True, timeout=5).stdout
+    except (OSError, subprocess.SubprocessError):
+        return []
+    return [match.groups() for match in map(MOUNT_LINE.match, output.splitlines()) if match]
+
+
+def filesystem_type(path, table=None):
+    """Type of the filesystem holding path (the longest matching mount point), or None if unknown."""
+    path = os.path.realpath(path)
+    best, fstype = '', None
+    for mount_point, kind in table if table is not None else mount_table():
+        prefix = mount_point.rstrip('/') + '/'
+        if (path == mount_point or path.startswith(prefix)) and len(mount_point) >= len(best):
+            best, fstype = mount_point, kind
+    return fstype
+
+
+def move_workers(*paths):
+    """QA_MOVE_WORKERS when set; otherwise a thread pool on network shares and a single worker on local disks."""
+    if MOVE_WORKERS: return MOVE_WORKERS
+    table = mount_table()
+    network = any(filesystem_type(p, table) in NETWORK_FILESYSTEMS for p in paths)
+    return NETWORK_MOVE_WORKERS if network else 1
+
+
+def rename(src, dst):
+    """
+    Same-filesystem rename. A source already sitting at its destination (moved by an interrupted run)
+    counts as moved; a destination on another device falls back to shutil.move.
+    """
+    try:
+        os.rename(src, dst)
+    except FileNotFoundError:
+        if os.path.exists(src) or not os.path.exists(dst): raise
+    except OSError as e:
+        if e.errno != errno.EXDEV: raise
+        shutil.move(src, dst)
+
+
+def move_unit(moves, fingerprint=True):
+    """
+    Move one unit; returns ({seq: state}, fingerprints, error, seconds). When a move fails, the moves
+    already made are undone; one that cannot be undone stays 'done' so rollback still finds it.
+    Matched pairs are fingerprinted at their destination unless fingerprint=False.
+    """
+    started = time.perf_counter()
+    moved = []
+    try:
+        for move in moves:
+            rename(move.src, move.dst)
+            moved.append(move)
+        fingerprints = None
+        if fingerprint and moves[0].kind == 'match':
+            fingerprints = {move.side: file_fingerprint(move.dst) for move in moves}
+        return {move.seq: 'done' for move in moves}, fingerprints, None, time.perf_counter() - started
+    except OSError as e:
+        states = {move.seq: 'failed' for move in moves}
+        for move in reversed(moved):
+            try:
+                rename(move.dst, move.src)
+            except OSError:
+                states[move.seq] = 'done'
+        return states, None, e, time.perf_counter() - started
+
+
+def match_entry(moves, fingerprints):
+    """The targets entry of a matched pair once both files are in MATCHED_PAIRS."""
+    by_side = {move.side: move for move in moves}
+    entry = {
+        "hs": by_side['hs'].dst,
+        "sf": by_side['sf'].dst,
+        "status_pdf": "pending",
+        "status_excel": "pending",
+        "fingerprints": fingerprints
+    }
+    if by_side['hs'].score is not None: entry["match_score"] = by_side['hs'].score
+    return entry
+
+
+def make_dirs(moves):
+    for d in sorted({os.path.dirname(move.dst) for move in moves}):
+        os.makedirs(d, exist_ok=True)
+
+
+def execute_moves(store, moves, workers=1, on_match=None, tracer=None):
+    """
+    Run planned moves unit by unit in a bounded thread pool, committing their outcomes and the matches
+    they complete every COMMIT_EVERY units. on_match(name, entry) is called as each pair lands.
+    On Ctrl+C the units in flight are finished and committed; the rest stay planned for resume_moves.
+    Returns (Counter of units moved per kind, number of failed units).
+    """
+    make_dirs(moves)
+    moved, failed = Counter(), 0
+    states, matches = {}, []
+    last_commit = time.monotonic()
+
+    def commit():
+        nonlocal last_commit
+        last_commit = time.monotonic()
+        if states: store.finish_moves(states, matches)
+        states.clear()
+        matches.clear()
+
+    def finish(unit, result):
+        nonlocal failed
+        unit_states, fingerprints, error, seconds = result
+        states.update(unit_states)
+        first = unit[0]
+        label = first.name or os.path.basename(first.src)
+        if tracer and tracer.enabled:
+            tracer.record("move", seconds, client=label, error=type(error).__name__ if error else None)
+        if error:
+            failed += 1
+            print(f"   ⚠️ Skipping {label}: {error}")
+            if 'done' in unit_states.values(): print(f"   ⚠️ {label} could not be moved back and is left split")
+        else:
+            moved[first.kind] += 1
+            if first.kind == 'match':
+                entry = match_entry(unit, fingerprints)
+                matches.append((first.unit, first.name, entry))
+                if on_match: on_match(first.name, entry)
+        if len(states) >= COMMIT_EVERY or time.monotonic() - last_commit >= COMMIT_SECONDS: commit()
+
+    units = (list(unit) for _, unit in itertools.groupby(moves, key=lambda move: move.unit))
+    in_flight = {}
+    try:
+        if workers <= 1:
+            # Local disks: renames take microseconds, so a thread hand-off per unit would cost more than it saves.
+            # A unit cut short by Ctrl+C is completed by resume_moves (a finished rename counts as moved).
+            for unit in units: finish(unit, move_unit(unit))
+            return moved, failed
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            try:
+                for unit in units:
+                    in_flight[executor.submit(move_unit, unit)] = unit
+                    if len(in_flight) >= workers * 4:
+                        done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                        for future in done: finish(in_flight.pop(future), future.result())
+            finally:
+                # Also reached on Ctrl+C: units already started are completed, never left half-moved
+                for future in list(in_flight): finish(in_flight.pop(future), future.result())
+    finally:
+        commit()
+    return moved, failed
+
+
+def journal_moves(store, states):
+    return [Move(*row[:-1]) for row in store.journal(states)]
+
+
+def resume_moves(store, on_match=None, workers=None, tracer=None):
+    """Finish the moves an interrupted run left planned; returns what execute_moves returns."""
+    pending = journal_moves(store, ['planned'])
+    workers = workers or move_workers(*{os.path.dirname(move.src) for move in pending})
+    print(f"Resuming {len(pending)} planned move(s) ({workers} worker(s))...")
+    return execute_moves(store, pending, workers, on_match, tracer)
+
+
+def rollback_moves(store, workers=None):
+    """
+    Move every file of the journaled run back to its source folder and drop the matches it recorded.
+    Moves still planned are cancelled; a planned file already at its destination (renamed just before
+    Ctrl+C) is moved back too. Returns (files moved back, files that could not be).
+    """
+    done = journal_moves(store, ['done'])
+    workers = workers or move_workers(*{os.path.dirname(move.src) for move in done})
+    units = [[move._replace(src=move.dst, dst=move.src) for move in reversed(list(unit))]
+             for _, unit in itertools.groupby(reversed(done), key=lambda move: move.unit)]
+    states, names = {}, set()
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as executor:
+        for unit, (unit_states, _, error, _) in zip(units, executor.map(lambda u: move_unit(u, False), units)):
+            if error: print(f"   ⚠️ Could not move back {unit[0].name or os.path.basename(unit[0].src)}: {error}")
+            # A unit that could not be moved back keeps its 'done' state, so rollback can be retried
+            states.update({seq: 'rolled_back' if state == 'done' else 'done' for seq, state in unit_states.items()})
+            if not error and unit[0].kind == 'match': names.add(unit[0].name)
+    for move in journal_moves(store, ['planned']):
+        states[move.seq] = 'cancelled'
+        if os.path.exists(move.src) or not os.path.exists(move.dst): continue
+        try:
+            rename(move.dst, move.src)
+            states[move.seq] = 'rolled_back'
+        except OSError as e:
+            print(f"   ⚠️ Could not move back {os.path.basename(move.dst)}: {e}")
+            states[move.seq] = 'planned'
+    store.finish_moves(states)
+    store.remove_matches(names)
+    restored = sum(state == 'rolled_back' for state in states.values())
+    return restored, sum(state == 'done' for state in states.values())
+
+
+def triage_counts(store):
+    """(collision files triaged, orphan files) of the journaled run, as reported by Step 01."""
+    counts = store.journal_counts()
+    collisions = counts.get(('collision', 'done'), 0)
+    orphans = sum(count for (kind, state), count in counts.items() if kind == 'orphan' and state != 'cancelled')
+    return collisions, orphans
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Inspect, resume or roll back the Step 01 move journal.")
+    parser.add_argument("command", choices=["status", "resume", "rollback"])
+    parser.add_argument("--targets-db", default=TARGETS_DB)
+    parser.add_argument("--workers", type=int, help="thread pool size (default: QA_MOVE_WORKERS or auto)")
+    args = parser.parse_args(argv)
+    if not os.path.exists(args.targets_db):
+        print(f"Error: {args.targets_db} not found. Run Script 01 first.")
+        return 1
+    store = TargetStore(args.targets_db)
+    try:
+        if args.command == "status":
+            meta = store.load()
+            print(f"HubSpot: {meta.get('hs_dir')}\nSalesforce: {meta.get('sf_dir')}")
+            for (kind, state), count in sorted(store.journal_counts().items()):
+                print(f"   {kind:<10} {state:<12} {count}")
+        elif args.command == "resume":
+            moved, failed = resume_moves(store, workers=args.workers)
+            print(f"Moved: {dict(moved)}  Failed: {failed}")
+        else:
+            restored, stuck = rollback_moves(store, args.workers)
+            print(f"Moved back: {restored} file(s)" + (f"  Still moved: {stuck}" if stuck else ""))
+    finally:
+        store.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
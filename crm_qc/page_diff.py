@@ -0,0 +1,172 @@
+"""
+Page-level pre-diff so only pages that differ between the two exports go through pdfminer,
+and the canonical document fingerprint built from the same page digests.
+"""
+import hashlib
+import re
+from crm_qc.fingerprints import pair_is_identical
+
+# Above this share of differing pages a plain full extraction is cheaper than the pre-diff
+MAX_DIFF_RATIO = 0.5
+# Keys that carry object-graph plumbing or encoding details rather than page content
+SKIPPED_KEYS = {'/Parent', '/Length', '/Filter', '/DecodeParms', '/P', '/StructParents', '/Annots'}
+# Embedded font subsets get a random six-letter tag per export (e.g. /ABCDEF+Helvetica)
+SUBSET_TAG = re.compile(r'^/[A-Z]{6}\+')
+
+
+class _ObjectHasher:
+    """Content digest of PDF objects, memoized per indirect object within one document."""
+
+    def __init__(self):
+        from pypdf import generic
+        self.generic = generic
+        self.memo = {}
+
+    def digest(self, obj):
+        h = hashlib.sha256()
+        self._feed(obj, h, set())
+        return h.digest()
+
+    def _feed(self, obj, h, active):
+        generic = self.generic
+        if isinstance(obj, generic.IndirectObject):
+            ref = (obj.idnum, obj.generation)
+            if ref in self.memo:
+                h.update(self.memo[ref])
+                return
+            if ref in active:
+                h.update(b'<cycle>')
+                return
+            active.add(ref)
+            sub = hashlib.sha256()
+            self._feed(obj.get_object(), sub, active)
+            active.discard(ref)
+            self.memo[ref] = sub.digest()
+            h.update(self.memo[ref])
+            return
+        if isinstance(obj, generic.StreamObject):
+            h.update(b'stream')
+            h.update(obj.get_data())
+        if isinstance(obj, generic.DictionaryObject):
+            h.update(b'{')
+            for key in sorted(obj.keys()):
+                if key in SKIPPED_KEYS: continue
+                h.update(key.encode('utf-8', 'replace'))
+                self._feed(obj.raw_get(key), h, active)
+            h.update(b'}')
+        elif isinstance(obj, generic.ArrayObject):
+            h.update(b'[')
+            for item in obj:
+                self._feed(item, h, active)
+            h.update(b']')
+        elif isinstance(obj, generic.NameObject):
+            h.update(SUBSET_TAG.sub('/', obj).encode('utf-8', 'replace'))
+        elif not isinstance(obj, generic.StreamObject):
+            h.update(repr(obj).encode('utf-8', 'replace'))
+
+
+def page_fingerprints(reader):
+    """
+    One digest per page built from the decoded content stream, its resources (fonts,
+    images, form XObjects) and the page geometry. Document-level metadata such as
+    /CreationDate, /Producer or the trailer /ID never enters the digest.
+    """
+    hasher = _ObjectHasher()
+    fingerprints = []
+    for page in reader.pages:
+        h = hashlib.sha256()
+        contents = page.get_contents()
+        h.update(contents.get_data() if contents is not None else b'')
+        h.update(hasher.digest(page.get('/Resources', hasher.generic.DictionaryObject())))
+        h.update(repr([float(v) for v in page.mediabox]).encode())
+        h.update(str(page.get('/Rotate', 0)).encode())
+        fingerprints.append(h.hexdigest())
+    return fingerprints
+
+
+def canonical_fingerprint(path):
+    """
+    Digest of a whole document from its page fingerprints: two exports of the same report hash
+    alike even when their /CreationDate, /ID, /Producer or font subset tags differ.
+    Returns None when the file cannot be parsed.
+    """
+    from pypdf import PdfReader
+    try:
+        pages = page_fingerprints(PdfReader(path))
+    except Exception:
+        return None
+    return hashlib.sha256("\n".join(pages).encode()).hexdigest()
+
+
+def refresh_canonical_fingerprints(entry):
+    """
+    Add the canonical digest to both stored fingerprints of a match entry, unless the pair is
+    already a binary match. The digest is dropped with its fingerprint when the file changes.
+    Returns True if any were computed.
+    """
+    if pair_is_identical(entry): return False
+    stored = entry['fingerprints']
+    changed = False
+    for side in ('hs', 'sf'):
+        if 'canonical' not in stored[side]:
+            stored[side] = dict(stored[side], canonical=canonical_fingerprint(entry[side]))
+            changed = True
+    return changed
+
+
+def pair_is_equivalent(entry):
+    """Binary match, or same page content and fonts under different export metadata."""
+    if pair_is_identical(entry): return True
+    refresh_canonical_fingerprints(entry)
+    hs_canonical = entry['fingerprints']['hs']['canonical']
+    return hs_canonical is not None and hs_canonical == entry['fingerprints']['sf']['canonical']
+
+
+def differing_pages(hs_fingerprints, sf_fingerprints):
+    """Indices of pages whose fingerprints differ, or None when the page counts do not line up."""
+    if len(hs_fingerprints) != len(sf_fingerprints):
+        return None
+    return [i for i, (a, b) in enumerate(zip(hs_fingerprints, sf_fingerprints)) if a != b]
+
+
+def _split_pages(text, count):
+    # pdfminer terminates every page with a form feed
+    parts = text.split('\f')
+    return parts[:count] + [''] * (count - len(parts[:count]))
+
+
+def extract_pair_text(hs_path, sf_path):
+    """
+    Returns (text_hs, text_sf, mode) for a report pair.
+    Pages that differ are extracted with pdfminer on both sides; pages that are identical
+    on both sides are read once with pypdf's lighter text pass, which is all the section
+    segmenter needs to place its boundaries. Falls back to full pdfminer extraction
+    (mode 'full') when page counts differ or most pages changed.
+    """
+    from pdfminer.high_level import extract_text
+    from pypdf import PdfReader
+    try:
+        reader_hs = PdfReader(hs_path)
+        reader_sf = PdfReader(sf_path)
+        diff = differing_pages(page_fingerprints(reader_hs), page_fingerprints(reader_sf))
+    except Exception:
+        diff = None
+    if diff is None or len(diff) > MAX_DIFF_RATIO * len(reader_hs.pages):
+        return extract_text(hs_path), extract_text(sf_path), 'full'
+
+    diff_set = set(diff)
+    pages_hs, pages_sf = {}, {}
+    if diff:
+        pages_hs = dict(zip(diff, _split_pages(extract_text(hs_path, page_numbers=diff_set), len(diff))))
+        pages_sf = dict(zip(diff, _split_pages(extract_text(sf_path, page_numbers=diff_set), len(diff))))
+
+    parts_hs, parts_sf = [], []
+    for i, page in enumerate(reader_hs.pages):
+        if i in diff_set:
+            parts_hs.append(pages_hs[i])
+            parts_sf.append(pages_sf[i])
+        else:
+            shared = page.extract_text() + '\n'
+            parts_hs.append(shared)
+            parts_sf.append(shared)
+    return '\f'.join(parts_hs) + '\f', '\f'.join(parts_sf) + '\f', 'pagediff'
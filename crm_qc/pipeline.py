@@ -0,0 +1,371 @@
+"""
+Headless pipelined run of Steps 01-03. Pairs flow from matching through rendering into the
+analytical workbook over bounded queues, so every stage works on a different pair at the same
+time and a batch takes about as long as its slowest stage.
+
+Usage:
+    python -m crm_qc.pipeline --hs-dir HS --sf-dir SF --template TEMPLATE.xlsx [--batch-size N]
+    python -m crm_qc.pipeline --config pipeline.json    # same keys: hs_dir, sf_dir, template, ...
+    python -m crm_qc.pipeline [--batch-size N]          # resume pending pairs from targets.db
+"""
+import argparse
+import json
+import os
+import queue
+import sys
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from datetime import datetime
+from crm_qc import compare, reports, sync
+from crm_qc.diff_render import render_comparison_pdf
+from crm_qc.extraction import WORKER_CONTEXT, ExtractionPool, ignore_interrupts
+from crm_qc.fingerprints import refresh_pair_fingerprints
+from crm_qc.page_diff import pair_is_equivalent, refresh_canonical_fingerprints
+from crm_qc.instrumentation import Tracer, timed
+from crm_qc.results_index import ResultsIndex
+from crm_qc.row_index import RowIndex, input_signature
+from crm_qc.state import TARGETS_DB, TARGETS_FILE, TargetStore, open_target_store
+from crm_qc.text_cache import TextCache
+from crm_qc.warehouse import Warehouse
+
+DEFAULT_QUEUE_SIZE = 32
+DONE = None  # end-of-stream marker passed down each queue
+
+
+class StatusWriter(threading.Thread):
+    """
+    Owns the pipeline's only store connection (SQLite connections stay on one thread).
+    Stage threads queue their writes, which are held until `ready` is set, i.e. until
+    Step 01 has written the new match table that they update.
+    """
+
+    def __init__(self, db_path, ready):
+        super().__init__(name="status-writer", daemon=True)
+        self.db_path = db_path
+        self.ready = ready
+        self.updates = queue.Queue()
+
+    def set_statuses(self, names, field, value):
+        self.updates.put(('status', list(names), field, value))
+
+    def update_match(self, name, entry):
+        self.updates.put(('entry', name, dict(entry)))
+
+    def set_report_rows(self, rows):
+        self.updates.put(('rows', dict(rows)))
+
+    def clear_report_rows(self):
+        self.updates.put(('clear_rows',))
+
+    def stop(self):
+        self.updates.put(DONE)
+        self.join()
+
+    def run(self):
+        self.ready.wait()
+        store = TargetStore(self.db_path)
+        try:
+            while True:
+                update = self.updates.get()
+                if update is DONE: break
+                if update[0] == 'status':
+                    store.set_statuses(*update[1:])
+                elif update[0] == 'rows':
+                    store.set_report_rows(*update[1:])
+                elif update[0] == 'clear_rows':
+                    store.clear_report_rows()
+                else:
+                    store.update_match(*update[1:])
+        finally:
+            store.close()
+
+
+class Pipeline:
+    """Match -> render -> analyse, one thread per stage, connected by bounded queues."""
+
+    def __init__(self, db_path=TARGETS_DB, batch_size=None, render_workers=None, extraction_workers=None,
+                 queue_size=DEFAULT_QUEUE_SIZE, flush_when_idle=False):
+        self.sync, self.compare, self.reports = sync, compare, reports
+        self.db_path = db_path
+        self.batch_size = batch_size
+        # Watch mode saves the workbook as soon as the analysis stage runs out of work
+        self.flush_when_idle = flush_when_idle
+        self.render_workers = render_workers or self.compare.RENDER_WORKERS or os.cpu_count() or 1
+        self.extraction_workers = extraction_workers or self.reports.EXTRACTION_WORKERS or None
+        self.to_render = queue.Queue(queue_size)
+        self.to_analyse = queue.Queue(queue_size)
+        self.store_ready = threading.Event()
+        self.writer = StatusWriter(db_path, self.store_ready)
+        self.tracer = Tracer("pipeline", self.reports.RESULTS_DIR)
+        self.counts = {'queued': 0, 'rendered': 0, 'analysed': 0, 'failed': 0}
+        self.errors = []
+        self.failed = threading.Event()
+
+    def admit(self, item):
+        """Queue a pair for rendering unless the batch is full; returns False once it is."""
+        if self.batch_size and self.counts['queued'] >= self.batch_size: return False
+        self.counts['queued'] += 1
+        self.to_render.put(item)
+        return True
+
+    # --- Stage 1: matching (or resuming from the store) ---
+    def match_stage(self, hs_dir, sf_dir, template_path):
+        try:
+            self.sync.organize_targets(hs_dir, sf_dir, template_path, targets_db=self.db_path,
+                                       on_match=lambda name, entry: self.admit((name, entry, None)))
+        finally:
+            self.store_ready.set()
+            self.to_render.put(DONE)
+
+    def feed_pending(self, matches):
+        """Queue pairs left pending by an earlier run; rendered ones skip straight to analysis."""
+        results_index = ResultsIndex(self.compare.RESULTS_DIR)
+        for name, entry in matches.items():
+            if entry.get('status_excel') == 'completed': continue
+            artifact = None
+            if entry.get('status_pdf') == 'completed':
+                artifact = results_index.latest(name)
+            if not self.admit((name, entry, artifact)): break
+
+    def resume_stage(self, matches):
+        try:
+            self.feed_pending(matches)
+        finally:
+            self.to_render.put(DONE)
+
+    # --- Stage 2: local comparison PDFs ---
+    def render_stage(self):
+        in_flight = {}
+        source_done = False
+        try:
+            with ProcessPoolExecutor(max_workers=self.render_workers, mp_context=WORKER_CONTEXT,
+                                     initializer=ignore_interrupts) as executor:
+                while True:
+                    while not source_done and len(in_flight) < self.render_workers * 2:
+                        try:
+                            item = self.to_render.get(timeout=0.05 if in_flight else None)
+                        except queue.Empty:
+                            break
+                        if item is DONE:
+                            source_done = True
+                            break
+                        name, entry, artifact = item
+                        if artifact:
+                            self.to_analyse.put(item)
+                            continue
+                        if refresh_pair_fingerprints(entry) | refresh_canonical_fingerprints(entry):
+                            self.writer.update_match(name, entry)
+                        identical = pair_is_equivalent(entry)
+                        timestamp = datetime.now().strftime("%m%d_%H%M")
+                        out_path = os.path.join(self.compare.RESULTS_DIR,
+                                                f"{name}_{'MATCH' if identical else 'Comparison'}_{timestamp}.pdf")
+                        future = executor.submit(timed(render_comparison_pdf), entry['hs'], entry['sf'], out_path,
+                                                 not identical)
+                        in_flight[future] = (name, entry, out_path)
+                    if not in_flight:
+                        if source_done: break
+                        continue
+                    done, _ = wait(in_flight, timeout=0.05, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        name, entry, out_path = in_flight.pop(future)
+                        try:
+                            regions, seconds = future.result()
+                        except Exception as e:
+                            print(f"   ❌ {name}: Generation failed: {e}")
+                            self.counts['failed'] += 1
+                            continue
+                        self.tracer.record("render", seconds, client=name)
+                        self.writer.set_statuses([name], 'status_pdf', 'completed')
+                        self.counts['rendered'] += 1
+                        print(f"   ✅ {os.path.basename(out_path)} rendered")
+                        self.to_analyse.put((name, entry, out_path))
+        finally:
+            if not source_done: drain(self.to_render)
+            self.to_analyse.put(DONE)
+
+    # --- Stage 3: analytical workbook and evidence log ---
+    def analysis_stage(self, template_path):
+        reports = self.reports
+        pending_rows, pending_lines = {}, []
+        last_checkpoint = time.monotonic()
+        wb = warehouse = None
+
+        def save_checkpoint():
+            nonlocal last_checkpoint
+            last_checkpoint = time.monotonic()
+            if not pending_rows: return
+            wb.save(reports.OUTPUT_EXCEL)
+            with open(reports.LOG_FILE, "a") as f: f.write("\n".join(pending_lines) + "\n")
+            if warehouse: warehouse.flush()
+            self.writer.set_statuses(list(pending_rows), 'status_excel', 'completed')
+            self.writer.set_report_rows(pending_rows)
+            print(f"   [CHECKPOINT] {len(pending_rows)} client(s) saved")
+            pending_rows.clear()
+            pending_lines.clear()
+
+        window = deque()
+        source_done = False
+        # The setup runs inside the try as well: if the workbook cannot be opened, the render stage
+        # must still be drained or it blocks on the bounded queue
+        try:
+            if os.path.exists(reports.OUTPUT_EXCEL):
+                target_excel = reports.OUTPUT_EXCEL
+                store = TargetStore(self.db_path)  # read-only here; writes go through the status writer
+                indexed = {name: row for name, (row, _) in store.report_rows().items()}
+                store.close()
+            else:
+                target_excel = template_path
+                indexed = {}
+                self.writer.clear_report_rows()
+            import openpyxl
+            wb = openpyxl.load_workbook(target_excel)
+            sheet = wb[reports.SHEET_NAME]
+            header_row = 3
+            col_map = {str(cell.value).strip(): idx + 1 for idx, cell in enumerate(sheet[header_row]) if cell.value}
+            report_col_idx = col_map.get('Report ') or col_map.get('Report', 4)
+            row_index = RowIndex(sheet, report_col_idx, indexed, header_row)
+            warehouse = Warehouse(reports.RESULTS_DB, stage="pipeline") if reports.WAREHOUSE else None
+            text_cache = TextCache(reports.TEXT_CACHE_DIR, max_bytes=reports.TEXT_CACHE_MAX_MB * 1024 * 1024)
+
+            with ExtractionPool(self.extraction_workers, reports.EXTRACTION_TIMEOUT, cache=text_cache) as pool:
+                callbacks = reports.analysis_callbacks(pool)
+                while window or not source_done:
+                    # Keep the extraction workers busy on pairs ahead of the one being written
+                    while not source_done and len(window) <= pool.workers * 2:
+                        try:
+                            item = self.to_analyse.get(block=not window)
+                        except queue.Empty:
+                            break
+                        if item is DONE:
+                            source_done = True
+                            break
+                        window.append(item)
+                        reports.queue_extraction(pool, item[1])
+                    if not window: continue
+                    name, entry, _ = window.popleft()
+                    client_lines = []
+                    started = time.perf_counter()
+                    row_idx = reports.analyse_into_row(sheet, row_index, col_map, name, entry, client_lines, warehouse,
+                                                       **callbacks)
+                    if row_idx:
+                        self.tracer.record("analyse", time.perf_counter() - started, client=name)
+                        pending_rows[name] = (row_idx, input_signature(entry))
+                        pending_lines.extend(client_lines)
+                        print(f"   [FINALIZED] {name} (Row {row_idx})")
+                        self.counts['analysed'] += 1
+                        if (len(pending_rows) >= reports.CHECKPOINT_EVERY
+                                or time.monotonic() - last_checkpoint >= reports.CHECKPOINT_SECONDS
+                                or (self.flush_when_idle and not window and self.to_analyse.empty())):
+                            save_checkpoint()
+                    else:
+                        self.counts['failed'] += 1
+        except BaseException:
+            # Set before draining, which lasts until the source stops: watch mode stops feeding on it
+            self.failed.set()
+            raise
+        finally:
+            try:
+                save_checkpoint()
+                if warehouse: warehouse.close()
+            finally:
+                if not source_done: drain(self.to_analyse)
+
+    def _guard(self, stage, *args):
+        try:
+            stage(*args)
+        except BaseException as e:
+            self.failed.set()
+            self.errors.append((stage.__name__, e))
+            print(f"   ❌ {stage.__name__} stopped: {e}")
+
+    def start(self, template_path):
+        """Start the status writer and the render and analysis stages; pairs are fed through admit()."""
+        os.makedirs(self.compare.RESULTS_DIR, exist_ok=True)
+        self.writer.start()
+        self.threads = [threading.Thread(target=self._guard, args=(self.render_stage,)),
+                        threading.Thread(target=self._guard, args=(self.analysis_stage, template_path))]
+        for thread in self.threads: thread.start()
+
+    def finish(self):
+        """Wait for the stages to drain after the source has queued DONE; returns the per-stage counts."""
+        for thread in self.threads: thread.join()
+        self.writer.stop()
+        self.tracer.close()
+        return self.counts
+
+    def run(self, template_path, hs_dir=None, sf_dir=None, matches=None):
+        """Run every stage to completion; returns the per-stage counts."""
+        if hs_dir:
+            source = threading.Thread(target=self._guard, args=(self.match_stage, hs_dir, sf_dir, template_path))
+        else:
+            self.store_ready.set()
+            source = threading.Thread(target=self._guard, args=(self.resume_stage, matches))
+        self.start(template_path)
+        source.start()
+        source.join()
+        return self.finish()
+
+
+def drain(q):
+    """Consume a queue up to its end marker so a stage that stopped early never blocks its producer."""
+    while q.get() is not DONE: pass
+
+
+def load_config(path):
+    with open(path, "r") as f:
+        return json.load(f)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Headless pipelined run of Steps 01-03.")
+    parser.add_argument("--config", help="JSON file with any of the options below (underscored keys)")
+    parser.add_argument("--hs-dir", help="HubSpot source folder (omit to resume from targets.db)")
+    parser.add_argument("--sf-dir", help="Salesforce source folder")
+    parser.add_argument("--template", help="Excel data template (.xlsx)")
+    parser.add_argument("--batch-size", type=int, help="maximum number of pairs to process")
+    parser.add_argument("--render-workers", type=int)
+    parser.add_argument("--extraction-workers", type=int)
+    parser.add_argument("--targets-db", help=f"state store (default {TARGETS_DB})")
+    parser.add_argument("--queue-size", type=int, help=f"pairs buffered between stages (default {DEFAULT_QUEUE_SIZE})")
+    args = parser.parse_args(argv)
+    options = load_config(args.config) if args.config else {}
+    options.update({k: v for k, v in vars(args).items() if v is not None and k != 'config'})
+
+    db_path = options.get("targets_db") or TARGETS_DB
+    pipeline = Pipeline(db_path, options.get("batch_size"), options.get("render_workers"),
+                        options.get("extraction_workers"), options.get("queue_size") or DEFAULT_QUEUE_SIZE)
+    matches = None
+    template_path = options.get("template")
+    if options.get("hs_dir"):
+        if not options.get("sf_dir") or not template_path:
+            parser.error("--hs-dir requires --sf-dir and --template")
+    else:
+        store = open_target_store(db_path, TARGETS_FILE)
+        if not store:
+            print("Error: no source folders given and targets.db not found.")
+            return 1
+        state = store.load()
+        matches = state.get("matches", {})
+        # Clients whose exports changed since their row was written are queued again
+        pipeline.reports.reconcile_report_rows(store, matches)
+        store.close()
+        template_path = template_path or state.get("template_path")
+        if not template_path:
+            print("Error: template_path missing from targets.db. Pass --template.")
+            return 1
+
+    if not os.path.exists(pipeline.reports.OUTPUT_EXCEL) and not os.path.isfile(template_path):
+        print(f"Error: template {template_path} not found.")
+        return 1
+
+    started = time.monotonic()
+    counts = pipeline.run(template_path, options.get("hs_dir"), options.get("sf_dir"), matches)
+    print(f"\nPIPELINE COMPLETE in {time.monotonic() - started:.1f}s: {counts['queued']} queued, "
+          f"{counts['rendered']} rendered, {counts['analysed']} analysed, {counts['failed']} failed")
+    return 1 if pipeline.errors else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,616 @@
+"""
+Step 03: analyse every rendered pair into the QA workbook, the evidence log and the results
+warehouse. Run through 03_GENERATE_ANALYTICAL_REPORTS.py; the pipeline and watch mode call
+analyse_into_row() directly. openpyxl and tkinter are imported by the functions that use them.
+"""
+import os
+import shutil
+import time
+from datetime import datetime
+from crm_qc.fingerprints import pair_is_identical, refresh_pair_fingerprints
+from crm_qc.extraction import ExtractionPool
+from crm_qc.text_cache import TextCache
+from crm_qc.sections import SECTIONS, compare_sections, segment_sections
+from crm_qc.page_diff import extract_pair_text, pair_is_equivalent
+from crm_qc.state import BASE_DIR, TARGETS_DB, TARGETS_FILE, open_target_store
+from crm_qc.results_index import ResultsIndex
+from crm_qc.row_index import RowIndex, SavedColumn, clear_row, input_signature, restore_row, scan_report_column
+from crm_qc.shards import RowBuffer, ShardWriter, clear_shards, plan_shards, read_shard, run_shards, shard_path
+from crm_qc.instrumentation import Tracer
+from crm_qc.warehouse import WAREHOUSE_FILE, Warehouse
+from crm_qc.workbook_stream import rewrite_workbook
+
+DOWNLOADS_DIR = os.path.expanduser("~/Downloads/")
+RESULTS_DIR = os.path.join(DOWNLOADS_DIR, "QA_ANALYTICS_RESULTS")
+OUTPUT_EXCEL = os.path.join(RESULTS_DIR, 'QA_ANALYTICS_REPORT_FINAL.xlsx')
+LOG_FILE = os.path.join(RESULTS_DIR, "QA_TECHNICAL_EVIDENCE.md")
+RESULTS_DB = os.path.join(RESULTS_DIR, WAREHOUSE_FILE)
+
+SHEET_NAME = 'QA Report Test Tracker'
+TESTER_NAME = "Semaj Andrews"
+
+# Text extraction pool (0 workers = one per CPU core; timeout is per PDF, in seconds)
+EXTRACTION_WORKERS = int(os.environ.get("QA_EXTRACTION_WORKERS", "0"))
+EXTRACTION_TIMEOUT = float(os.environ.get("QA_EXTRACTION_TIMEOUT", "300"))
+
+# Extracted-text cache, keyed by PDF content digest (size cap in MB, least recently used evicted first)
+TEXT_CACHE_DIR = os.path.join(BASE_DIR, ".text_cache")
+TEXT_CACHE_MAX_MB = int(os.environ.get("QA_TEXT_CACHE_MB", "1024"))
+
+# Checkpoint policy: persist workbook, evidence log and statuses every N clients or T seconds
+CHECKPOINT_EVERY = int(os.environ.get("QA_CHECKPOINT_EVERY", "25"))
+CHECKPOINT_SECONDS = float(os.environ.get("QA_CHECKPOINT_SECONDS", "60"))
+
+# Page pre-diff: only pages that differ between the two exports are parsed by pdfminer
+PAGE_DIFF = os.environ.get("QA_PAGE_DIFF", "1") != "0"
+
+# Streaming mode: pages are parsed lazily and each section is compared as soon as both sides close it,
+# bounding memory by one section; with fail-fast, parsing stops at the first discrepancy
+STREAMING = os.environ.get("QA_STREAMING", "0") == "1"
+STREAM_FAIL_FAST = os.environ.get("QA_STREAM_FAIL_FAST", "0") == "1"
+NOT_EVALUATED = "Not evaluated"
+
+# Row-level table diff for discrepant sections; numeric cells within the tolerance count as equal
+TABLE_DIFF = os.environ.get("QA_TABLE_DIFF", "1") != "0"
+NUMERIC_TOLERANCE = float(os.environ.get("QA_NUMERIC_TOLERANCE", "0"))
+MAX_LOGGED_ROWS = 20
+
+# Per-run SQLite record of every verdict, queried with python -m crm_qc.warehouse
+WAREHOUSE = os.environ.get("QA_WAREHOUSE", "1") != "0"
+
+# Sharded mode: worker processes analyse slices of SHARD_SIZE clients into shard files, which one
+# final pass merges into the workbook in batch order (one workbook load and save per batch)
+SHARDED = os.environ.get("QA_SHARDED", "0") == "1"
+SHARD_SIZE = int(os.environ.get("QA_SHARD_SIZE", "50"))
+SHARD_DIR = os.path.join(RESULTS_DIR, ".shards")
+
+# Timing spans (QA_TRACE=1) and cProfile (QA_PROFILE=1); both are no-ops by default
+TRACER = Tracer("03_reports", RESULTS_DIR)
+
+def extract_pair_texts(hs_path, sf_path):
+    """Default in-process extraction of both sides of a pair."""
+    text_hs, text_sf, _ = extract_pair_text(hs_path, sf_path)
+    return text_hs, text_sf
+
+def format_row_diff(diff):
+    """One evidence-log line for a differing table row."""
+    hs = f"`{diff.hs}`" if diff.hs is not None else "(missing)"
+    sf = f"`{diff.sf}`" if diff.sf is not None else "(missing)"
+    return f"  - HubSpot {hs} | Salesforce {sf}"
+
+def process_client_analysis(sheet, row_idx, col_map, client_name, paths, client_lines, extract=extract_pair_texts,
+                            compare_stream=None, row_diff=None, record=None):
+    """
+    Analyse one pair into a workbook row and its evidence-log lines; returns False on failure.
+    When given, record is filled with the mode, overall verdict and {section: (result, reason,
+    differing_rows)} for the results warehouse.
+    """
+    if record is None: record = {}
+    record['mode'] = 'error'
+    hs_path, sf_path = paths['hs'], paths['sf']
+    print(f"--- PROCESSING: {client_name} ---")
+    client_lines.append(f"\n### Client: {client_name}")
+    
+    if not os.path.exists(hs_path) or not os.path.exists(sf_path):
+        msg = "Error: File paths could not be verified."
+        print(f"   [{msg}]")
+        client_lines.append(f"- {msg}")
+        return False
+
+    # Exports of the same data usually differ only in metadata, so the canonical digest widens this path
+    identical = pair_is_identical(paths)
+    if identical or pair_is_equivalent(paths):
+        if identical:
+            print("   Status: Exact binary match identified.")
+            client_lines.append("- **Overall Result: 0** (Verified Binary Match)")
+            mode, reason = 'binary', "Verified Binary Match"
+        else:
+            print("   Status: Canonical match identified (same page content, export metadata differs).")
+            client_lines.append("- **Overall Result: 0** (Verified Canonical Match: export metadata differs)")
+            mode, reason = 'canonical', "Verified Canonical Match"
+        record.update(mode=mode, verdict=0, tester=TESTER_NAME, sections={sec['key']: (0, reason, None) for sec in SECTIONS})
+        sheet.cell(row=row_idx, column=col_map.get('Tester', 3)).value = TESTER_NAME
+        report_col = col_map.get('Report ') or col_map.get('Report', 4)
+        sheet.cell(row=row_idx, column=report_col).value = client_name
+        for sec in SECTIONS:
+            col_idx = col_map.get(sec['key'])
+            if col_idx: sheet.cell(row=row_idx, column=col_idx).value = 0
+        res_col = col_map.get('Test Result')
+        if res_col: sheet.cell(row=row_idx, column=res_col).value = 0
+        return True
+
+    try:
+        if compare_stream:
+            with TRACER.span("stream_compare", client=client_name):
+                verdicts = compare_stream(hs_path, sf_path)
+        else:
+            with TRACER.span("extract", client=client_name) as span:
+                text_hs, text_sf = extract(hs_path, sf_path)
+                span.bytes = len(text_hs) + len(text_sf)
+            with TRACER.span("segment_compare", client=client_name):
+                verdicts = compare_sections(segment_sections(text_hs), segment_sections(text_sf))
+    except Exception as e:
+        msg = f"Error: Data extraction failed - {e}"
+        print(f"   [{msg}]")
+        client_lines.append(f"- {msg}")
+        return False
+
+    # Pinpoint the differing rows of every discrepant section (evidence only unless a tolerance is set).
+    # Rows are diffed document-wide: a section is only downgraded when no row anywhere differs beyond
+    # the tolerance, and rows the diff cannot place are listed under the first discrepant section.
+    row_diffs = None
+    discrepant = [sec['key'] for sec in SECTIONS
+                  if sec['key'] in verdicts and verdicts[sec['key']][0] == 1 and verdicts[sec['key']][2]]
+    if row_diff and discrepant:
+        try:
+            with TRACER.span("row_diff", client=client_name):
+                row_diffs = row_diff(hs_path, sf_path, discrepant)
+        except Exception as e:
+            client_lines.append(f"- Row diff unavailable: {e}")
+    within_tolerance = bool(row_diffs and row_diffs.tolerated and not row_diffs.unattributed
+                            and not any(row_diffs.sections.values()))
+
+    record.update(mode='sections', tester=TESTER_NAME, sections={})
+    any_failure = False
+    summary_present_in_both = False
+    sheet.cell(row=row_idx, column=col_map.get('Tester', 3)).value = TESTER_NAME
+    report_col = col_map.get('Report ') or col_map.get('Report', 4)
+    sheet.cell(row=row_idx, column=report_col).value = client_name
+
+    for section in SECTIONS:
+        if section['key'] not in verdicts:
+            # Fail-fast streaming stopped before this section was judged; a blank cell would read as a match
+            client_lines.append(f"- **{section['key']}**: {NOT_EVALUATED} (stopped after first discrepancy)")
+            record['sections'][section['key']] = (None, NOT_EVALUATED, None)
+            col_idx = col_map.get(section['key'])
+            if col_idx: sheet.cell(row=row_idx, column=col_idx).value = NOT_EVALUATED
+            continue
+        result, reason, present_in_both = verdicts[section['key']]
+        if section['key'] == 'Summary Page': summary_present_in_both = present_in_both
+        diffed = row_diffs is not None and section['key'] in row_diffs.sections
+        differences = row_diffs.sections[section['key']] if diffed else []
+        unattributed = row_diffs.unattributed if diffed and section['key'] == discrepant[0] else []
+        if diffed and within_tolerance:
+            result, reason = 0, f"Data Match within numeric tolerance ({row_diffs.tolerated} rows)"
+            
+        if result == 1: any_failure = True
+        client_lines.append(f"- **{section['key']}**: {result} ({reason})")
+        record['sections'][section['key']] = (result, reason, len(differences) + len(unattributed) if diffed else None)
+        client_lines.extend(format_row_diff(diff) for diff in differences[:MAX_LOGGED_ROWS])
+        if len(differences) > MAX_LOGGED_ROWS:
+            client_lines.append(f"  - ... {len(differences) - MAX_LOGGED_ROWS} more differing rows")
+        if unattributed:
+            client_lines.append("  - Differing rows whose section could not be determined:")
+            client_lines.extend(format_row_diff(diff) for diff in unattributed[:MAX_LOGGED_ROWS])
+            if len(unattributed) > MAX_LOGGED_ROWS:
+                client_lines.append(f"  - ... {len(unattributed) - MAX_LOGGED_ROWS} more differing rows")
+        
+        col_idx = col_map.get(section['key'])
+        if col_idx: sheet.cell(row=row_idx, column=col_idx).value = result
+        
+    summary_key = 'Summary Page'
+    summary_col = col_map.get(summary_key)
+    if any_failure and summary_col and summary_present_in_both:
+        sheet.cell(row=row_idx, column=summary_col).value = 1
+        record['sections'][summary_key] = (1, "Inferred mismatch: Supplemental data errors detected", None)
+        for i, line in enumerate(client_lines):
+            if f"**{summary_key}**: 0" in line:
+                client_lines[i] = f"- **{summary_key}**: 1 (Inferred mismatch: Supplemental data errors detected)"
+                break
+    
+    test_result_col = col_map.get('Test Result')
+    overall = 1 if any_failure else 0
+    if test_result_col: sheet.cell(row=row_idx, column=test_result_col).value = overall
+    client_lines.append(f"- **Analytical Verdict**: {overall}")
+    record['verdict'] = overall
+    return True
+
+def result_columns(col_map):
+    """Every cell process_client_analysis writes, i.e. what is cleared before a row is rewritten."""
+    columns = [col_map.get('Tester', 3), col_map.get('Report ') or col_map.get('Report', 4)]
+    columns += [col_map[sec['key']] for sec in SECTIONS if sec['key'] in col_map]
+    if col_map.get('Test Result'): columns.append(col_map['Test Result'])
+    return columns
+
+def analyse_into_row(sheet, row_index, col_map, client_name, paths, client_lines, warehouse=None, **callbacks):
+    """
+    Analyse one client into its indexed row, rewritten in place, or the next free row.
+    Returns the row written, or None when the analysis failed (an existing row is left as it was).
+    Successes and failures alike are buffered into the warehouse when one is given.
+    """
+    row_idx, in_place = row_index.locate(client_name)
+    saved = clear_row(sheet, row_idx, result_columns(col_map)) if in_place else None
+    record = {}
+    started = time.perf_counter()
+    ok = process_client_analysis(sheet, row_idx, col_map, client_name, paths, client_lines, record=record, **callbacks)
+    seconds = time.perf_counter() - started
+    if ok:
+        if in_place: client_lines.insert(1, f"- Re-analysed in place (Row {row_idx}): source exports changed")
+        row_index.assign(client_name, row_idx)
+    elif saved:
+        restore_row(sheet, row_idx, saved)
+    if warehouse: warehouse.record(client_name, row_idx if ok else None, paths, record, client_lines, seconds)
+    return row_idx if ok else None
+
+def scan_workbook_rows(after_row=None):
+    """
+    {name: row} from the Report column of the saved workbook, read-only. With after_row, only the
+    rows below it are read.
+    """
+    import openpyxl
+    wb_check = openpyxl.load_workbook(OUTPUT_EXCEL, read_only=True)
+    try:
+        sheet_check = wb_check[SHEET_NAME]
+        header_row = 3
+        report_col_idx = 4
+        header_values = next(sheet_check.iter_rows(min_row=header_row, max_row=header_row, values_only=True), ())
+        for idx, value in enumerate(header_values):
+            if value and "Report" in str(value):
+                report_col_idx = idx + 1
+                break
+        first_row = after_row + 1 if after_row else header_row
+        return scan_report_column(sheet_check.iter_rows(min_row=first_row, max_col=report_col_idx, values_only=True),
+                                  header_row, report_col_idx, first_row)
+    finally:
+        wb_check.close()
+
+def reconcile_report_rows(store, targets_dict):
+    """
+    Derive status_excel from the persisted row index: a client is completed while it has a workbook row
+    and its exports still hash to what that row was computed from. Returns {name: (row, signature)}.
+    Rows below the last indexed one are read back from the workbook: a run stopped between saving the
+    workbook and writing the index leaves its last checkpoint there. Exports found here to have changed
+    since they were last hashed were never rendered, so their comparison PDF is deleted and status_pdf
+    reset to pending for Step 02 (or the pipeline) to render it again.
+    """
+    if not os.path.exists(OUTPUT_EXCEL):
+        store.clear_report_rows()
+        rows = {}
+    else:
+        rows = store.report_rows()
+        # Workbook written before the index existed (no rows yet) or checkpoint saved after the last indexed row
+        last_row = max((row for row, _ in rows.values()), default=None)
+        unindexed = {name: row for name, row in scan_workbook_rows(last_row).items() if name not in rows}
+        if unindexed and rows:
+            print(f"{len(unindexed)} client(s) found in the workbook below the last indexed row; indexing them.")
+        rows.update({name: (row, None) for name, row in unindexed.items()})
+
+    backfill, changed, rerender = {}, [], []
+    results_index = None
+    for name, entry in targets_dict.items():
+        status = 'pending'
+        if name in rows:
+            status = 'completed'
+            row, signature = rows[name]
+            seen = input_signature(entry)
+            try:
+                refreshed = refresh_pair_fingerprints(entry)
+            except OSError:
+                refreshed = False  # a missing export is reported when the client is next processed
+            current = input_signature(entry)
+            if refreshed and seen and current != seen and entry.get('status_pdf') == 'completed':
+                # Reset before the new digests are stored, so a crash in between is detected again next run
+                results_index = results_index or ResultsIndex(RESULTS_DIR)
+                discard_artifacts(results_index, name)
+                entry['status_pdf'] = 'pending'
+                store.set_status(name, 'status_pdf', 'pending')
+                rerender.append(name)
+            if refreshed: store.update_match(name, entry)
+            if signature is None:
+                if current: backfill[name] = rows[name] = (row, current)
+            elif current and current != signature:
+                changed.append(name)
+                status = 'pending'
+        entry['status_excel'] = status
+    if backfill: store.set_report_rows(backfill)
+    for status in ('completed', 'pending'):
+        store.set_statuses([n for n, v in targets_dict.items() if v['status_excel'] == status], 'status_excel', status)
+    if changed:
+        print(f"{len(changed)} client(s) changed since their row was written; they will be re-analysed in place.")
+    if rerender:
+        print(f"{len(rerender)} comparison PDF(s) predate the new exports and were removed; they will be rendered again.")
+    return rows
+
+def discard_artifacts(results_index, name):
+    """Delete every comparison PDF of a client from the results directory."""
+    for filename in results_index.artifacts(name):
+        try:
+            os.remove(os.path.join(RESULTS_DIR, filename))
+        except FileNotFoundError:
+            pass
+
+def queue_extraction(pool, paths):
+    """Start background extraction for a pair unless it will take the binary-match path."""
+    try:
+        if not os.path.exists(paths['hs']) or not os.path.exists(paths['sf']): return
+        if pair_is_equivalent(paths): return
+    except OSError:
+        return
+    fingerprints = paths['fingerprints']
+    if STREAMING:
+        pool.submit_stream(paths['hs'], paths['sf'], STREAM_FAIL_FAST)
+    elif PAGE_DIFF:
+        pool.submit_pair(paths['hs'], paths['sf'], fingerprints['hs']['sha256'], fingerprints['sf']['sha256'])
+    else:
+        pool.submit(paths['hs'], fingerprints['hs']['sha256'])
+        pool.submit(paths['sf'], fingerprints['sf']['sha256'])
+
+def analysis_callbacks(pool):
+    """The extract / compare_stream / row_diff arguments of process_client_analysis, backed by the pool."""
+    callbacks = {'compare_stream': None, 'row_diff': None}
+    if TABLE_DIFF:
+        callbacks['row_diff'] = lambda hs_path, sf_path, keys: pool.row_diff(hs_path, sf_path, keys, NUMERIC_TOLERANCE)
+    if STREAMING:
+        callbacks['compare_stream'] = lambda hs_path, sf_path: pool.compare_stream(hs_path, sf_path, STREAM_FAIL_FAST)
+    if PAGE_DIFF:
+        callbacks['extract'] = pool.extract_pair
+    else:
+        callbacks['extract'] = lambda hs_path, sf_path: (pool.extract(hs_path), pool.extract(sf_path))
+    return callbacks
+
+def read_col_map(path, header_row=3):
+    """Header -> column mapping of the tracker sheet, read without loading the whole workbook."""
+    import openpyxl
+    wb = openpyxl.load_workbook(path, read_only=True)
+    try:
+        header = next(wb[SHEET_NAME].iter_rows(min_row=header_row, max_row=header_row, values_only=True), ())
+    finally:
+        wb.close()
+    return {str(value).strip(): idx + 1 for idx, value in enumerate(header) if value}
+
+def analyse_shard(path, items, col_map):
+    """
+    Worker process: analyse one slice of the batch into a shard file, one line per client with its
+    row cells, evidence-log lines, warehouse record and refreshed fingerprints. Returns the count.
+    """
+    text_cache = TextCache(TEXT_CACHE_DIR, max_bytes=TEXT_CACHE_MAX_MB * 1024 * 1024)
+    with ExtractionPool(timeout=EXTRACTION_TIMEOUT, cache=text_cache, inline=True) as pool, ShardWriter(path) as shard:
+        callbacks = analysis_callbacks(pool)
+        for client_name, paths in items:
+            queue_extraction(pool, paths)
+            row, client_lines, record = RowBuffer(), [], {}
+            started = time.perf_counter()
+            ok = process_client_analysis(row, None, col_map, client_name, paths, client_lines, record=record,
+                                         **callbacks)
+            shard.write({'name': client_name, 'ok': ok, 'cells': row.cells, 'lines': client_lines, 'record': record,
+                         'seconds': time.perf_counter() - started, 'fingerprints': paths.get('fingerprints')})
+        return shard.count
+
+def read_report_cells(path, report_col, rows, after_row, header_row=3):
+    """{row: Report cell} of a saved workbook for the given rows and every row below after_row, read-only."""
+    import openpyxl
+    wb = openpyxl.load_workbook(path, read_only=True)
+    try:
+        cells = {}
+        for row_idx, values in enumerate(wb[SHEET_NAME].iter_rows(min_row=1, max_col=report_col, values_only=True), 1):
+            if row_idx > header_row and (row_idx in rows or row_idx > after_row) and len(values) >= report_col:
+                if values[report_col - 1] is not None: cells[row_idx] = values[report_col - 1]
+        return cells
+    finally:
+        wb.close()
+
+def merge_shards(row_index, col_map, shard_paths, targets_dict, log, warehouse=None):
+    """
+    Final pass: read shard results in batch order and give every client its indexed row (rewritten in
+    place) or the next free one. Evidence-log blocks go to `log`. Returns ({name: row} of the rows
+    written, {row: {column: value}} edits for rewrite_workbook).
+    """
+    written, edits = {}, {}
+    columns = result_columns(col_map)
+    for path in shard_paths:
+        for result in read_shard(path):
+            client_name, client_lines = result['name'], result['lines']
+            paths = targets_dict[client_name]
+            if result['fingerprints']: paths['fingerprints'] = result['fingerprints']
+            row_idx = None
+            if result['ok']:
+                row_idx, in_place = row_index.locate(client_name)
+                edit = dict.fromkeys(columns) if in_place else {}
+                if in_place:
+                    client_lines.insert(1, f"- Re-analysed in place (Row {row_idx}): source exports changed")
+                edit.update((int(column), value) for column, value in result['cells'].items())
+                edits[row_idx] = edit
+                row_index.assign(client_name, row_idx)
+                log.write("\n".join(client_lines) + "\n")
+                written[client_name] = row_idx
+                print(f"   [FINALIZED] {client_name} (Row {row_idx})")
+            if warehouse:
+                warehouse.record(client_name, row_idx, paths, result['record'], client_lines, result['seconds'])
+        if warehouse: warehouse.flush()
+    return written, edits
+
+def analyse_sharded(store, targets_dict, ready_items, batch_size, target_excel, template_path, report_rows):
+    """
+    Sharded batch: no worksheet is held while clients are analysed, and the workbook is rewritten once
+    at the end by streaming it row by row, so memory stays flat however many rows it already has.
+    Pairs whose exports are missing are set aside before the batch is cut, so, as in the sequential
+    path, they neither fill the batch nor unbalance the shards. On Ctrl+C the running shards finish
+    and every finished shard is still merged. Returns the number of rows written.
+    """
+    header_row = 3
+    col_map = read_col_map(target_excel, header_row)
+    missing = [(name, paths) for name, paths in ready_items
+               if not os.path.exists(paths['hs']) or not os.path.exists(paths['sf'])]
+    missing_names = {name for name, _ in missing}
+    batch_items = [item for item in ready_items if item[0] not in missing_names][:batch_size]
+    for name, _ in missing: print(f"   Skipping {name} (Error: File paths could not be verified)")
+    os.makedirs(SHARD_DIR, exist_ok=True)
+    clear_shards(SHARD_DIR)
+    jobs = {index: (shard_path(SHARD_DIR, index), shard, col_map)
+            for index, shard in enumerate(plan_shards(batch_items, SHARD_SIZE))}
+    print(f"Analysing {len(batch_items)} client(s) in {len(jobs)} shard(s)...")
+    try:
+        with TRACER.profile("analytics"), TRACER.span("shard_analysis"):
+            for index, count, error in run_shards(analyse_shard, jobs, EXTRACTION_WORKERS or None):
+                if error: print(f"   ❌ Shard {index + 1}/{len(jobs)} failed: {error}")
+                else: print(f"   [SHARD] {index + 1}/{len(jobs)} analysed ({count} clients)")
+    except KeyboardInterrupt:
+        print("Interrupted: merging the shards that finished.")
+    finished = [jobs[index][0] for index in sorted(jobs) if os.path.exists(jobs[index][0])]
+
+    # Only the Report cells row allocation looks at are read: the batch's indexed rows and the tail
+    report_col_idx = col_map.get('Report ') or col_map.get('Report', 4)
+    indexed = {name: row for name, (row, _) in report_rows.items()}
+    last_row = max(indexed.values(), default=header_row)
+    with TRACER.span("wb_scan"):
+        saved = read_report_cells(target_excel, report_col_idx, {indexed[n] for n, _ in batch_items if n in indexed},
+                                  last_row, header_row)
+    row_index = RowIndex(SavedColumn(saved), report_col_idx, indexed, header_row)
+    if not os.path.isfile(template_path):
+        print(f"   ⚠️ Template {template_path} not found: column widths and merged cells are not carried over.")
+        template_path = None
+    warehouse = Warehouse(RESULTS_DB) if WAREHOUSE else None
+    if warehouse:
+        for name, paths in missing:
+            lines = [f"\n### Client: {name}", "- Error: File paths could not be verified."]
+            warehouse.record(name, None, paths, {}, lines, 0.0)
+    merge_log = LOG_FILE + ".merge"
+    try:
+        with TRACER.span("shard_merge"), open(merge_log, "w") as log:
+            written, edits = merge_shards(row_index, col_map, finished, targets_dict, log, warehouse)
+        if written:
+            # Same order as a checkpoint: workbook first, then the log and the statuses derived from it
+            with TRACER.span("wb_save") as span:
+                rewrite_workbook(target_excel, OUTPUT_EXCEL, SHEET_NAME, edits, template_path)
+                if TRACER.enabled: span.bytes = os.path.getsize(OUTPUT_EXCEL)
+            with TRACER.span("log_write"), open(merge_log) as src, open(LOG_FILE, "a") as dst:
+                shutil.copyfileobj(src, dst)
+            with TRACER.span("store_write"):
+                for name in written:
+                    targets_dict[name]['status_excel'] = 'completed'
+                    store.update_match(name, targets_dict[name])
+                store.set_statuses(list(written), 'status_excel', 'completed')
+                store.set_report_rows({name: (row, input_signature(targets_dict[name])) for name, row in written.items()})
+            print(f"   [CHECKPOINT] {len(written)} client(s) saved")
+    finally:
+        if warehouse: warehouse.close()
+        if os.path.exists(merge_log): os.remove(merge_log)
+        clear_shards(SHARD_DIR)
+    return len(written)
+
+def generate_final_analytics():
+    """Generate Excel report and text log with batching and physical verification."""
+    import openpyxl
+    import tkinter as tk
+    from tkinter import simpledialog, messagebox
+    store = open_target_store(TARGETS_DB, TARGETS_FILE)
+    if not store:
+        print(f"Error: {os.path.basename(TARGETS_FILE)} not found. Please run Script 01 first.")
+        return
+
+    config_meta = store.load()
+
+    template_path = config_meta.get("template_path")
+    if not template_path:
+        print("Error: template_path missing from targets.json. Re-run Script 01.")
+        return
+
+    targets_dict = config_meta.get("matches", {})
+
+    if not os.path.exists(RESULTS_DIR):
+        os.makedirs(RESULTS_DIR)
+
+    root = tk.Tk()
+    root.withdraw()
+    
+    report_rows = reconcile_report_rows(store, targets_dict)
+
+    # PHYSICAL VERIFICATION: a pair is only ready once its comparison PDF exists in RESULTS_DIR
+    results_index = ResultsIndex(RESULTS_DIR)
+    ready_targets = {k: v for k, v in targets_dict.items() 
+                     if v.get('status_pdf') == 'completed' and v.get('status_excel', 'pending') == 'pending'}
+    missing_artifacts = [k for k in ready_targets if not results_index.has_artifact(k)]
+    for name in missing_artifacts:
+        print(f"   Skipping {name} (Comparison PDF missing from Results, re-run Script 02)")
+        del ready_targets[name]
+    total_ready = len(ready_targets)
+    
+    if total_ready == 0:
+        if any(v.get('status_pdf', 'pending') == 'pending' for v in targets_dict.values()):
+            messagebox.showwarning("Prerequisite Not Met", "No files ready. Run Script 02 first.")
+        else:
+            messagebox.showinfo("Complete", "All processed!")
+        return
+
+    batch_size = simpledialog.askinteger("Batch Size", f"Files Ready: {total_ready}\nHow many?", 
+                                       initialvalue=total_ready, minvalue=1, maxvalue=total_ready)
+    if not batch_size: return
+
+    target_excel = OUTPUT_EXCEL if os.path.exists(OUTPUT_EXCEL) else template_path
+    if SHARDED:
+        processed_count = analyse_sharded(store, targets_dict, list(ready_targets.items()), batch_size,
+                                          target_excel, template_path, report_rows)
+        TRACER.close()
+        store.close()
+        messagebox.showinfo("Batch Complete", f"Processed: {processed_count}")
+        return
+
+    with TRACER.span("wb_load"):
+        wb = openpyxl.load_workbook(target_excel)
+    sheet = wb[SHEET_NAME]
+    header_row = 3
+    col_map = {str(cell.value).strip(): idx + 1 for idx, cell in enumerate(sheet[header_row]) if cell.value}
+
+    report_col_idx = col_map.get('Report ') or col_map.get('Report', 4)
+    row_index = RowIndex(sheet, report_col_idx, {name: row for name, (row, _) in report_rows.items()}, header_row)
+
+    processed_count = 0
+    ready_items = list(ready_targets.items())
+    pending_rows, pending_lines = {}, []
+    last_checkpoint = time.monotonic()
+    warehouse = Warehouse(RESULTS_DB) if WAREHOUSE else None
+
+    def save_checkpoint():
+        """Persist the workbook first; statuses are re-derived from it after a crash."""
+        nonlocal last_checkpoint
+        last_checkpoint = time.monotonic()
+        if not pending_rows: return
+        with TRACER.span("wb_save") as span:
+            wb.save(OUTPUT_EXCEL)
+            if TRACER.enabled: span.bytes = os.path.getsize(OUTPUT_EXCEL)
+        with TRACER.span("log_write"):
+            with open(LOG_FILE, "a") as f: f.write("\n".join(pending_lines) + "\n")
+        if warehouse:
+            with TRACER.span("warehouse_write"): warehouse.flush()
+        with TRACER.span("store_write"):
+            for name in pending_rows:
+                targets_dict[name]['status_excel'] = 'completed'
+                store.update_match(name, targets_dict[name])
+            store.set_statuses(list(pending_rows), 'status_excel', 'completed')
+            store.set_report_rows({name: (row, input_signature(targets_dict[name])) for name, row in pending_rows.items()})
+        print(f"   [CHECKPOINT] {len(pending_rows)} client(s) saved")
+        pending_rows.clear()
+        pending_lines.clear()
+
+    text_cache = TextCache(TEXT_CACHE_DIR, max_bytes=TEXT_CACHE_MAX_MB * 1024 * 1024)
+    with TRACER.profile("analytics"), ExtractionPool(EXTRACTION_WORKERS or None, EXTRACTION_TIMEOUT, cache=text_cache) as pool:
+        # Workers parse upcoming pairs while results are written here in client order
+        lookahead = pool.workers * 2
+        callbacks = analysis_callbacks(pool)
+        next_prefetch = 0
+        try:
+            for i, (client_name, paths) in enumerate(ready_items):
+                if processed_count >= batch_size: break
+                while next_prefetch < min(len(ready_items), i + lookahead):
+                    queue_extraction(pool, ready_items[next_prefetch][1])
+                    next_prefetch += 1
+                client_lines = []
+                row_idx = analyse_into_row(sheet, row_index, col_map, client_name, paths, client_lines, warehouse,
+                                           **callbacks)
+                if row_idx:
+                    pending_rows[client_name] = row_idx
+                    pending_lines.extend(client_lines)
+                    print(f"   [FINALIZED] {client_name} (Row {row_idx})")
+                    processed_count += 1
+                    if len(pending_rows) >= CHECKPOINT_EVERY or time.monotonic() - last_checkpoint >= CHECKPOINT_SECONDS:
+                        save_checkpoint()
+        finally:
+            # Also reached on Ctrl+C, so an interrupted batch keeps every finished row
+            save_checkpoint()
+            if warehouse: warehouse.close()
+
+    cache_stats = text_cache.stats()
+    print(f"Text cache: {cache_stats['hits']} hits, {cache_stats['misses']} misses, {cache_stats['bytes'] / 1048576:.1f} MB on disk")
+    TRACER.close()
+    store.close()
+    messagebox.showinfo("Batch Complete", f"Processed: {processed_count}")
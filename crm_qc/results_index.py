@@ -0,0 +1,41 @@
+"""One-scan index of the comparison PDFs written to the results directory."""
+import os
+import re
+from collections import defaultdict
+
+# Artifacts are named {name}_MATCH_{mmdd_HHMM}.pdf or {name}_Comparison_{mmdd_HHMM}.pdf
+ARTIFACT_PATTERN = re.compile(r'^(?P<name>.+)_(?P<kind>MATCH|Comparison)_(?P<ts>\d{4}_\d{4})\.pdf$')
+
+
+class ResultsIndex:
+    """Maps exact client names to their comparison artifacts after a single directory scan."""
+
+    def __init__(self, results_dir):
+        self.results_dir = results_dir
+        self._artifacts = defaultdict(list)
+        if os.path.isdir(results_dir):
+            with os.scandir(results_dir) as entries:
+                for entry in entries:
+                    match = ARTIFACT_PATTERN.match(entry.name)
+                    if match and entry.is_file():
+                        self._artifacts[match.group('name')].append((match.group('ts'), match.group('kind'), entry.name))
+
+    def add(self, filename):
+        """Register an artifact written after the scan; ignores names outside the naming scheme."""
+        match = ARTIFACT_PATTERN.match(filename)
+        if match:
+            self._artifacts[match.group('name')].append((match.group('ts'), match.group('kind'), filename))
+
+    def has_artifact(self, name):
+        return bool(self._artifacts.get(name))
+
+    def artifacts(self, name):
+        """Filenames for a client, oldest timestamp first."""
+        return [filename for _, _, filename in sorted(self._artifacts.get(name, []))]
+
+    def latest(self, name):
+        found = self.artifacts(name)
+        return os.path.join(self.results_dir, found[-1]) if found else None
+
+    def __len__(self):
+        return sum(len(v) for v in self._artifacts.values())
@@ -0,0 +1,79 @@
+"""
+Client -> row index for the QA workbook. Rows are looked up from the index kept in targets.db
+instead of scanning the Report column, so a client whose exports changed is rewritten in place
+and new clients are appended after the last known row.
+"""
+from collections import namedtuple
+
+_SavedCell = namedtuple('_SavedCell', 'value')
+
+
+def input_signature(entry):
+    """The content digests a workbook row was computed from."""
+    fingerprints = entry.get('fingerprints') or {}
+    if not all(fingerprints.get(side, {}).get('sha256') for side in ('hs', 'sf')): return None
+    return {side: fingerprints[side]['sha256'] for side in ('hs', 'sf')}
+
+
+def scan_report_column(rows, header_row=3, report_col=4, first_row=None):
+    """
+    Build {name: row} from workbook rows (an iterable of value tuples starting at first_row, by
+    default the header row). Used to seed the index from a workbook written before the index
+    existed, and to pick up rows saved after the last indexed one by a run that crashed.
+    """
+    index = {}
+    for row_idx, values in enumerate(rows, start=first_row or header_row):
+        if row_idx <= header_row or len(values) < report_col: continue
+        value = values[report_col - 1]
+        if value: index.setdefault(str(value).strip(), row_idx)
+    return index
+
+
+class RowIndex:
+    """Row allocation for one open worksheet, seeded with the persisted {name: row} index."""
+
+    def __init__(self, sheet, report_col, rows, header_row=3):
+        self.sheet = sheet
+        self.report_col = report_col
+        self.rows = dict(rows)
+        self.next_row = max(self.rows.values(), default=header_row) + 1
+
+    def locate(self, name):
+        """
+        Returns (row, in_place). An indexed row is reused only while its Report cell still names the
+        client; otherwise the next blank row after the last known one is handed out.
+        """
+        row = self.rows.get(name)
+        if row and str(self.sheet.cell(row=row, column=self.report_col).value or '').strip() == name:
+            return row, True
+        while self.sheet.cell(row=self.next_row, column=self.report_col).value: self.next_row += 1
+        return self.next_row, False
+
+    def assign(self, name, row):
+        self.rows[name] = row
+        self.next_row = max(self.next_row, row + 1)
+
+
+class SavedColumn:
+    """Worksheet stand-in for RowIndex: the {row: value} cells of one column of a saved workbook."""
+
+    def __init__(self, values):
+        self.values = values
+
+    def cell(self, row=None, column=None):
+        return _SavedCell(self.values.get(row))
+
+
+def clear_row(sheet, row, columns):
+    """Blank the given cells of a row before it is rewritten; returns their old values for restore_row."""
+    saved = {}
+    for col in columns:
+        cell = sheet.cell(row=row, column=col)
+        saved[col] = cell.value
+        cell.value = None
+    return saved
+
+
+def restore_row(sheet, row, saved):
+    for col, value in saved.items():
+        sheet.cell(row=row, column=col).value = value
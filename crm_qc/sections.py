@@ -0,0 +1,134 @@
+"""Report section definitions and the single-pass section segmenter."""
+import re
+from bisect import bisect_left
+
+SECTIONS = [
+    {'key': 'Summary Page', 'marker': 'Year Over Year Comparison of Calls', 'next_marker': 'Calls by Agency'},
+    {'key': 'Site Page', 'marker': 'Calls by Agency', 'next_marker': 'Calls by Day of Week'},
+    {'key': 'Day of Week', 'marker': 'Calls by Day of Week', 'next_marker': 'Calls by Hour of Day'},
+    {'key': 'Hour of Day', 'marker': 'Calls by Hour of Day', 'next_marker': 'Calls by Outcome'},
+    {'key': 'Outcome', 'marker': 'Calls by Outcome', 'next_marker': 'Calls by Diagnosis'},
+    {'key': 'Diagnosis', 'marker': 'Calls by Diagnosis', 'next_marker': None}
+]
+
+WHITESPACE = re.compile(r'\s+')
+
+
+def clean_text(text, marker_to_purge=None):
+    """Normalize whitespace and remove redundant headers to handle multi-page wraps."""
+    if not text: return ""
+    
+    if marker_to_purge:
+        text = re.sub(re.escape(marker_to_purge), '', text, flags=re.IGNORECASE)
+    
+    text = WHITESPACE.sub(' ', text).strip()
+    return text
+
+
+class SectionSegmenter:
+    """
+    Slices PDF text into every configured section with one scan of the document.
+    All start/end markers are compiled into a single zero-width matcher so overlapping
+    occurrences are still found; boundaries follow the 'Reach Next Expected Text' rules:
+    a section runs from the first occurrence of its marker to the next occurrence of its
+    next_marker, falling back to the nearest other section marker, then to the end of text.
+    """
+
+    def __init__(self, sections=SECTIONS):
+        self.sections = sections
+        markers = []
+        for sec in sections:
+            for m in (sec['marker'], sec['next_marker']):
+                if m and m not in markers: markers.append(m)
+        self.markers = markers
+        # Longest first so a marker that prefixes another does not shadow it
+        order = sorted(range(len(markers)), key=lambda i: -len(markers[i]))
+        alternatives = '|'.join(f'(?P<m{i}>{re.escape(markers[i])})' for i in order)
+        self.pattern = re.compile(f'(?=(?:{alternatives}))', re.IGNORECASE)
+        self.prefixes = {i: [j for j in range(len(markers))
+                             if j != i and markers[i].lower().startswith(markers[j].lower())]
+                         for i in range(len(markers))}
+        self.index = {m: i for i, m in enumerate(markers)}
+        self.purge_patterns = {sec['marker']: re.compile(re.escape(sec['marker']), re.IGNORECASE)
+                               for sec in sections}
+
+    def find_markers(self, text):
+        """Return the sorted start positions of every marker occurrence, keyed by marker index."""
+        positions = [[] for _ in self.markers]
+        for match in self.pattern.finditer(text):
+            i = int(match.lastgroup[1:])
+            positions[i].append(match.start())
+            for j in self.prefixes[i]:
+                positions[j].append(match.start())
+        return positions
+
+    @staticmethod
+    def _first_at_or_after(found, pos):
+        k = bisect_left(found, pos)
+        return found[k] if k < len(found) else None
+
+    def raw_sections(self, text):
+        """Return {section key: raw slice or None when the start marker is absent}."""
+        positions = self.find_markers(text)
+        result = {}
+        for sec in self.sections:
+            found = positions[self.index[sec['marker']]]
+            if not found:
+                result[sec['key']] = None
+                continue
+            start_idx = found[0]
+            search_from = start_idx + len(sec['marker'])
+            end_idx = None
+            if sec['next_marker']:
+                end_idx = self._first_at_or_after(positions[self.index[sec['next_marker']]], search_from)
+                if end_idx is None:
+                    candidates = (self._first_at_or_after(positions[self.index[other['marker']]], search_from)
+                                  for other in self.sections if other['marker'] != sec['marker'])
+                    end_idx = min((c for c in candidates if c is not None), default=None)
+            if end_idx is None:
+                end_idx = len(text)
+            result[sec['key']] = text[start_idx:end_idx].strip()
+        return result
+
+    def normalize(self, section, raw):
+        """clean_text for one raw slice: purge the section's own header and collapse whitespace."""
+        if raw is None: return None
+        return WHITESPACE.sub(' ', self.purge_patterns[section['marker']].sub('', raw)).strip()
+
+    def segment(self, text):
+        """Return {section key: normalized section text or None when the section is absent}."""
+        raw = self.raw_sections(text)
+        return {sec['key']: self.normalize(sec, raw[sec['key']]) for sec in self.sections}
+
+
+_default_segmenter = None
+
+
+def segment_sections(text, sections=None):
+    """Segment a document with the (cached) segmenter for SECTIONS or a custom section list."""
+    global _default_segmenter
+    if sections is not None:
+        return SectionSegmenter(sections).segment(text)
+    if _default_segmenter is None:
+        _default_segmenter = SectionSegmenter()
+    return _default_segmenter.segment(text)
+
+
+def judge_section(clean_hs, clean_sf):
+    """Verdict for one section as (result, reason, present_in_both)."""
+    if clean_hs is None and clean_sf is None:
+        return 0, "Section missing in both sources (Acceptable)", False
+    if clean_hs is None or clean_sf is None:
+        return 1, "Section presence mismatch", False
+    if len(clean_hs) < 10 and len(clean_sf) < 10:
+        return 0, "Empty table match", True
+    if len(clean_hs) < 10 or len(clean_sf) < 10:
+        return 1, "Content volume mismatch (One side empty)", True
+    if clean_hs == clean_sf:
+        return 0, "Data Match", True
+    return 1, "Data Discrepancy Identified", True
+
+
+def compare_sections(hs_sections, sf_sections, sections=SECTIONS):
+    """Judge every section of two segmented documents: {key: (result, reason, present_in_both)}."""
+    return {sec['key']: judge_section(hs_sections[sec['key']], sf_sections[sec['key']]) for sec in sections}
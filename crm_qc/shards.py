@@ -0,0 +1,106 @@
+"""
+Sharded workbook generation for Step 03. Worker processes analyse contiguous slices of the batch
+into compact JSON-lines shard files instead of a shared worksheet; one final pass streams the
+shards into the workbook in batch order, so the workbook is loaded and saved exactly once.
+"""
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from crm_qc.extraction import WORKER_CONTEXT, ignore_interrupts
+
+SHARD_SUFFIX = ".jsonl"
+
+
+class _Cell:
+    __slots__ = ('cells', 'column')
+
+    def __init__(self, cells, column):
+        self.cells, self.column = cells, column
+
+    @property
+    def value(self):
+        return self.cells.get(self.column)
+
+    @value.setter
+    def value(self, value):
+        self.cells[self.column] = value
+
+
+class RowBuffer:
+    """Worksheet stand-in for one client: records the {column: value} cells written to its row."""
+
+    def __init__(self):
+        self.cells = {}
+
+    def cell(self, row=None, column=None):
+        return _Cell(self.cells, column)
+
+
+def plan_shards(items, size):
+    """Split the batch into contiguous slices; merging them in index order keeps the batch order."""
+    size = max(1, size)
+    return [items[start:start + size] for start in range(0, len(items), size)]
+
+
+def shard_path(shard_dir, index):
+    return os.path.join(shard_dir, f"shard_{index:05d}{SHARD_SUFFIX}")
+
+
+class ShardWriter:
+    """Writes one shard to a temporary file that only replaces the shard path once it is complete."""
+
+    def __init__(self, path):
+        self.path = path
+        self.tmp_path = f"{path}.{os.getpid()}.tmp"
+        self.count = 0
+
+    def __enter__(self):
+        self.file = open(self.tmp_path, "w")
+        return self
+
+    def write(self, result):
+        self.file.write(json.dumps(result, separators=(',', ':')) + "\n")
+        self.count += 1
+
+    def __exit__(self, exc_type, exc, tb):
+        self.file.close()
+        if exc_type is None:
+            os.replace(self.tmp_path, self.path)
+        else:
+            os.remove(self.tmp_path)
+
+
+def read_shard(path):
+    """Yield the client results of a shard one at a time."""
+    with open(path) as f:
+        for line in f:
+            yield json.loads(line)
+
+
+def clear_shards(shard_dir):
+    """Remove shard files (including partial ones) left by an earlier or interrupted run."""
+    if not os.path.isdir(shard_dir): return
+    for name in os.listdir(shard_dir):
+        if name.endswith(SHARD_SUFFIX) or name.endswith(".tmp"):
+            try: os.remove(os.path.join(shard_dir, name))
+            except OSError: pass
+
+
+def run_shards(worker, jobs, workers=None):
+    """
+    Run worker(*args) for every {index: args} shard in one process pool (shards are few and
+    self-contained, so workers are not recycled). Yields (index, result, error) as shards finish.
+    On Ctrl+C or when the caller stops early, shards not yet started are cancelled and the running
+    ones finish, so every shard file that exists afterwards is complete.
+    """
+    workers = min(workers or os.cpu_count() or 1, len(jobs)) or 1
+    executor = ProcessPoolExecutor(max_workers=workers, mp_context=WORKER_CONTEXT, initializer=ignore_interrupts)
+    try:
+        futures = {executor.submit(worker, *args): index for index, args in jobs.items()}
+        for future in as_completed(futures):
+            try:
+                yield futures[future], future.result(), None
+            except Exception as e:
+                yield futures[future], None, e
+    finally:
+        executor.shutdown(wait=True, cancel_futures=True)
@@ -0,0 +1,99 @@
+"""Local Side-by-Side PDF composition of HubSpot/Salesforce report pairs."""
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+DEFAULT_WIDTH = 612.0
+DEFAULT_HEIGHT = 792.0
+# Worker processes are replaced after this many pairs so one 500-page report cannot pin memory
+TASKS_PER_WORKER = 8
+
+
+def _add_mirrored_page(writer, page):
+    """
+    Adds a double-width page showing `page` on both halves without merging content:
+    the source page becomes one Form XObject that is drawn twice.
+    """
+    from pypdf.generic import ArrayObject, DecodedStreamObject, DictionaryObject, FloatObject, NameObject
+    width = float(page.mediabox.width)
+    height = float(page.mediabox.height)
+    form = DecodedStreamObject()
+    contents = page.get_contents()
+    form.set_data(contents.get_data() if contents is not None else b'')
+    form[NameObject('/Type')] = NameObject('/XObject')
+    form[NameObject('/Subtype')] = NameObject('/Form')
+    form[NameObject('/BBox')] = ArrayObject([FloatObject(v) for v in page.mediabox])
+    if '/Resources' in page:
+        form[NameObject('/Resources')] = page['/Resources'].clone(writer)
+    form_ref = writer._add_object(form)
+
+    draw = DecodedStreamObject()
+    draw.set_data(f"q /SrcPage Do Q q 1 0 0 1 {width} 0 cm /SrcPage Do Q".encode())
+    new_page = writer.add_blank_page(width=width * 2, height=height)
+    new_page[NameObject('/Resources')] = DictionaryObject({
+        NameObject('/XObject'): DictionaryObject({NameObject('/SrcPage'): form_ref})})
+    new_page[NameObject('/Contents')] = writer._add_object(draw)
+    return width
+
+
+def build_side_by_side(hs_path, sf_path, identical=False):
+    """
+    Returns (writer, offsets): a PdfWriter holding one double-width page per page index,
+    HubSpot on the left and Salesforce on the right, and the x offset of the right half
+    of every output page. Byte-identical pairs (identical=True) read only one file and
+    reuse each imported page for both halves.
+    """
+    from pypdf import PdfReader, PdfWriter, PageObject, Transformation
+    if identical:
+        writer = PdfWriter()
+        offsets = [_add_mirrored_page(writer, page) for page in PdfReader(hs_path).pages]
+        return writer, offsets
+
+    reader_hs = PdfReader(hs_path)
+    reader_sf = PdfReader(sf_path)
+    writer = PdfWriter()
+    offsets = []
+    num_pages = max(len(reader_hs.pages), len(reader_sf.pages))
+    for i in range(num_pages):
+        hs_width = DEFAULT_WIDTH
+        hs_height = DEFAULT_HEIGHT
+        if i < len(reader_hs.pages):
+            hs_page = reader_hs.pages[i]
+            hs_width = float(hs_page.mediabox.width)
+            hs_height = float(hs_page.mediabox.height)
+        new_page = PageObject.create_blank_page(width=hs_width * 2, height=hs_height)
+        if i < len(reader_hs.pages):
+            new_page.merge_page(reader_hs.pages[i])
+        if i < len(reader_sf.pages):
+            sf_page = reader_sf.pages[i]
+            op = Transformation().translate(tx=hs_width, ty=0)
+            new_page.merge_transformed_page(sf_page, op)
+        writer.add_page(new_page)
+        offsets.append(hs_width)
+    return writer, offsets
+
+
+def write_side_by_side_pdf(hs_path, sf_path, output_path, identical=False):
+    """Compose a pair into a single Side-by-Side PDF at output_path."""
+    writer, _ = build_side_by_side(hs_path, sf_path, identical)
+    with open(output_path, "wb") as f:
+        writer.write(f)
+
+
+def render_batch(jobs, workers=None, render=write_side_by_side_pdf):
+    """
+    Runs render(*args) for every {key: args} job across worker processes.
+    Yields (key, result, error) as jobs finish; a failing pair never stops the batch.
+    """
+    workers = workers or os.cpu_count() or 1
+    items = list(jobs.items())
+    # Workers are recycled by rebuilding the pool every round; max_tasks_per_child deadlocks on
+    # Python 3.11 once a worker retires and is never replaced
+    round_size = workers * TASKS_PER_WORKER
+    for start in range(0, len(items), round_size):
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            futures = {executor.submit(render, *args): key for key, args in items[start:start + round_size]}
+            for future in as_completed(futures):
+                try:
+                    yield futures[future], future.result(), None
+                except Exception as e:
+                    yield futures[future], None, e
@@ -0,0 +1,241 @@
+"""
+SQLite-backed state store for the match table that used to live only in targets.json.
+Status flips are single-row UPDATEs committed atomically in WAL mode, so a crash
+can no longer leave a half-written mapping file behind.
+
+Usage:
+    python -m crm_qc.state export [targets.json]   # write the store back out as JSON
+    python -m crm_qc.state import [targets.json]   # replace the store with a JSON file
+"""
+import json
+import os
+import sqlite3
+import sys
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+TARGETS_DB = os.path.join(BASE_DIR, "targets.db")
+TARGETS_FILE = os.path.join(BASE_DIR, "targets.json")
+
+STATUS_FIELDS = ('status_pdf', 'status_excel')
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS matches (
+    name TEXT PRIMARY KEY,
+    position INTEGER NOT NULL,
+    data TEXT NOT NULL,
+    status_pdf TEXT NOT NULL DEFAULT 'pending',
+    status_excel TEXT NOT NULL DEFAULT 'pending'
+);
+CREATE INDEX IF NOT EXISTS idx_matches_position ON matches(position);
+CREATE TABLE IF NOT EXISTS report_rows (
+    name TEXT PRIMARY KEY,
+    row INTEGER NOT NULL,
+    signature TEXT
+);
+CREATE TABLE IF NOT EXISTS move_journal (
+    seq INTEGER PRIMARY KEY,
+    unit INTEGER NOT NULL,
+    kind TEXT NOT NULL,
+    name TEXT,
+    side TEXT NOT NULL,
+    src TEXT NOT NULL,
+    dst TEXT NOT NULL,
+    score REAL,
+    state TEXT NOT NULL DEFAULT 'planned'
+);
+CREATE INDEX IF NOT EXISTS idx_move_journal_state ON move_journal(state, seq);
+"""
+JOURNAL_FIELDS = "seq, unit, kind, name, side, src, dst, score"
+
+
+class TargetStore:
+    """Match table keyed by client name, preserving the original targets.json ordering."""
+
+    def __init__(self, path=TARGETS_DB):
+        self.path = path
+        self.conn = sqlite3.connect(path)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript(SCHEMA)
+
+    def is_empty(self):
+        return self.conn.execute("SELECT COUNT(*) FROM meta").fetchone()[0] == 0
+
+    def load(self):
+        """Return the full state in the targets.json layout."""
+        meta = {key: json.loads(value) for key, value in self.conn.execute("SELECT key, value FROM meta")}
+        matches = {}
+        for name, data, status_pdf, status_excel in self.conn.execute(
+                "SELECT name, data, status_pdf, status_excel FROM matches ORDER BY position"):
+            entry = json.loads(data)
+            entry['status_pdf'] = status_pdf
+            entry['status_excel'] = status_excel
+            matches[name] = entry
+        meta['matches'] = matches
+        return meta
+
+    def replace(self, meta):
+        """Swap the whole state for a new one (Script 01 output or a JSON import) in one transaction."""
+        with self.conn:
+            self.conn.execute("DELETE FROM meta")
+            self.conn.execute("DELETE FROM matches")
+            self.conn.executemany("INSERT INTO meta (key, value) VALUES (?, ?)",
+                                  [(k, json.dumps(v)) for k, v in meta.items() if k != 'matches'])
+            self.conn.executemany(
+                "INSERT INTO matches (name, position, data, status_pdf, status_excel) VALUES (?, ?, ?, ?, ?)",
+                [self._row(pos, name, entry) for pos, (name, entry) in enumerate(meta.get('matches', {}).items())])
+
+    @staticmethod
+    def _row(position, name, entry):
+        data = {k: v for k, v in entry.items() if k not in STATUS_FIELDS}
+        return (name, position, json.dumps(data),
+                entry.get('status_pdf', 'pending'), entry.get('status_excel', 'pending'))
+
+    def set_status(self, name, field, value):
+        """Flip one status field of one match."""
+        self.set_statuses([name], field, value)
+
+    def set_statuses(self, names, field, value):
+        """Flip one status field for many matches in a single commit."""
+        if field not in STATUS_FIELDS:
+            raise ValueError(f"Unknown status field: {field}")
+        with self.conn:
+            self.conn.executemany(f"UPDATE matches SET {field} = ? WHERE name = ?", [(value, n) for n in names])
+
+    def update_match(self, name, entry):
+        """Persist the non-status payload of one match (paths, fingerprints)."""
+        data = {k: v for k, v in entry.items() if k not in STATUS_FIELDS}
+        with self.conn:
+            self.conn.execute("UPDATE matches SET data = ? WHERE name = ?", (json.dumps(data), name))
+
+    def add_match(self, name, entry):
+        """Insert one match at the end of the table; a client matched again keeps its position and is reset."""
+        with self.conn:
+            row = self.conn.execute("SELECT position FROM matches WHERE name = ?", (name,)).fetchone()
+            position = row[0] if row else self.conn.execute(
+                "SELECT COALESCE(MAX(position) + 1, 0) FROM matches").fetchone()[0]
+            self.conn.execute(
+                "INSERT OR REPLACE INTO matches (name, position, data, status_pdf, status_excel) VALUES (?, ?, ?, ?, ?)",
+                self._row(position, name, entry))
+
+    def report_rows(self):
+        """Return {name: (row, signature)} for every client written to the QA workbook."""
+        return {name: (row, json.loads(signature) if signature else None)
+                for name, row, signature in self.conn.execute("SELECT name, row, signature FROM report_rows")}
+
+    def set_report_rows(self, rows):
+        """Record the workbook row and input signature of many clients ({name: (row, signature)}) in one commit."""
+        with self.conn:
+            self.conn.executemany("INSERT OR REPLACE INTO report_rows (name, row, signature) VALUES (?, ?, ?)",
+                                  [(name, row, json.dumps(signature) if signature else None)
+                                   for name, (row, signature) in rows.items()])
+
+    def clear_report_rows(self):
+        """Forget the row index, e.g. once the workbook it describes has been deleted."""
+        with self.conn:
+            self.conn.execute("DELETE FROM report_rows")
+
+    # --- Step 01 move journal: one row per planned file move, in plan order ---
+    def begin_triage(self, meta, moves):
+        """Swap in a new Step 01 run: its meta, no matches yet, and every planned move, in one transaction."""
+        with self.conn:
+            self.conn.execute("DELETE FROM meta")
+            self.conn.execute("DELETE FROM matches")
+            self.conn.execute("DELETE FROM move_journal")
+            self.conn.executemany("INSERT INTO meta (key, value) VALUES (?, ?)",
+                                  [(k, json.dumps(v)) for k, v in meta.items() if k != 'matches'])
+            self._insert_moves(moves)
+
+    def _insert_moves(self, moves):
+        self.conn.executemany(f"INSERT INTO move_journal ({JOURNAL_FIELDS}) VALUES (?, ?, ?, ?, ?, ?, ?, ?)", moves)
+
+    def append_moves(self, moves):
+        """Journal more planned moves after the current ones (watch mode), keeping the run's matches."""
+        with self.conn:
+            self._insert_moves(moves)
+
+    def journal_end(self):
+        """(next seq, next unit) for appended moves; units double as match positions, so they start after both."""
+        seq, unit = self.conn.execute(
+            "SELECT COALESCE(MAX(seq) + 1, 0), COALESCE(MAX(unit) + 1, 0) FROM move_journal").fetchone()
+        position = self.conn.execute("SELECT COALESCE(MAX(position) + 1, 0) FROM matches").fetchone()[0]
+        return seq, max(unit, position)
+
+    def journal(self, states=None):
+        """Journal rows (the JOURNAL_FIELDS tuple plus state) in plan order, optionally only in the given states."""
+        where = f"WHERE state IN ({', '.join('?' * len(states))})" if states else ""
+        return self.conn.execute(f"SELECT {JOURNAL_FIELDS}, state FROM move_journal {where} ORDER BY seq",
+                                 tuple(states or ())).fetchall()
+
+    def journal_counts(self):
+        """{(kind, state): number of moves} for the current journal."""
+        return {(kind, state): count for kind, state, count in self.conn.execute(
+            "SELECT kind, state, COUNT(*) FROM move_journal GROUP BY kind, state")}
+
+    def finish_moves(self, states, matches=()):
+        """
+        Record move outcomes ({seq: state}) and the matches they completed ([(position, name, entry)]) in one
+        commit. As with add_match, a client matched again keeps its position and is reset.
+        """
+        with self.conn:
+            self.conn.executemany("UPDATE move_journal SET state = ? WHERE seq = ?",
+                                  [(state, seq) for seq, state in states.items()])
+            self.conn.executemany(
+                "INSERT INTO matches (name, position, data, status_pdf, status_excel) VALUES (?, ?, ?, ?, ?) "
+                "ON CONFLICT(name) DO UPDATE SET data = excluded.data, status_pdf = excluded.status_pdf, "
+                "status_excel = excluded.status_excel",
+                [self._row(position, name, entry) for position, name, entry in matches])
+
+    def remove_matches(self, names):
+        with self.conn:
+            self.conn.executemany("DELETE FROM matches WHERE name = ?", [(n,) for n in names])
+
+    def import_json(self, json_path=TARGETS_FILE):
+        with open(json_path, "r") as f:
+            self.replace(json.load(f))
+
+    def export_json(self, json_path=TARGETS_FILE):
+        """Write the state back out as a targets.json file (atomically)."""
+        tmp_path = json_path + ".tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(self.load(), f, indent=4)
+        os.replace(tmp_path, json_path)
+
+    def close(self):
+        self.conn.close()
+
+
+def open_target_store(db_path=TARGETS_DB, json_path=TARGETS_FILE):
+    """
+    Open the state store, migrating an existing targets.json on first use.
+    Returns None when neither the store nor a targets.json exists yet.
+    """
+    if not os.path.exists(db_path) and not os.path.exists(json_path):
+        return None
+    store = TargetStore(db_path)
+    if store.is_empty() and os.path.exists(json_path):
+        print(f"Migrating {os.path.basename(json_path)} into {os.path.basename(db_path)}...")
+        store.import_json(json_path)
+    if store.is_empty():
+        store.close()
+        return None
+    return store
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2 or sys.argv[1] not in ("export", "import"):
+        print(__doc__)
+        sys.exit(1)
+    json_path = sys.argv[2] if len(sys.argv) > 2 else TARGETS_FILE
+    store = TargetStore(TARGETS_DB)
+    if sys.argv[1] == "export":
+        store.export_json(json_path)
+        print(f"Exported {TARGETS_DB} -> {json_path}")
+    else:
+        store.import_json(json_path)
+        print(f"Imported {json_path} -> {TARGETS_DB}")
+    store.close()
@@ -0,0 +1,136 @@
+"""
+Streaming section comparison: pdfminer pages are parsed lazily and fed to a per-document
+section state machine, so memory is bounded by the open sections rather than the document.
+"""
+from io import StringIO
+from crm_qc.sections import SectionSegmenter, judge_section
+
+
+def iter_page_texts(path, laparams=None):
+    """Yield the extract_text output of each page in turn; joined they equal extract_text(path)."""
+    from pdfminer.converter import TextConverter
+    from pdfminer.layout import LAParams
+    from pdfminer.pdfinterp import PDFPageInterpreter, PDFResourceManager
+    from pdfminer.pdfpage import PDFPage
+    with open(path, 'rb') as fp, StringIO() as output:
+        rsrcmgr = PDFResourceManager(caching=True)
+        device = TextConverter(rsrcmgr, output, laparams=laparams or LAParams())
+        interpreter = PDFPageInterpreter(rsrcmgr, device)
+        for page in PDFPage.get_pages(fp, caching=True):
+            interpreter.process_page(page)
+            yield output.getvalue()
+            output.seek(0)
+            output.truncate(0)
+        device.close()
+
+
+class SectionStream:
+    """
+    Incremental equivalent of SectionSegmenter.segment for text that arrives page by page.
+    feed() returns the sections whose end boundary is now certain; finish() resolves the rest.
+    Only text from the earliest still-open section start is kept.
+    """
+
+    def __init__(self, segmenter):
+        self.segmenter = segmenter
+        self.sections = segmenter.sections
+        self.section_markers = {segmenter.index[sec['marker']] for sec in self.sections}
+        self.length = 0
+        self.buffer = ''
+        self.buffer_start = 0
+        self.state = {sec['key']: {'start': None, 'end': None, 'alt_end': None} for sec in self.sections}
+        self.emitted = set()
+
+    def feed(self, text):
+        page_start = self.length
+        self.buffer += text
+        self.length += len(text)
+        occurrences = sorted((pos + page_start, i)
+                             for i, found in enumerate(self.segmenter.find_markers(text)) for pos in found)
+        for pos, marker_idx in occurrences:
+            for sec in self.sections:
+                st = self.state[sec['key']]
+                if st['end'] is not None: continue
+                if st['start'] is None:
+                    if marker_idx == self.segmenter.index[sec['marker']]: st['start'] = pos
+                    continue
+                if not sec['next_marker'] or pos < st['start'] + len(sec['marker']): continue
+                if marker_idx == self.segmenter.index[sec['next_marker']]:
+                    st['end'] = pos
+                elif st['alt_end'] is None and marker_idx in self.section_markers and \
+                        self.segmenter.markers[marker_idx] != sec['marker']:
+                    st['alt_end'] = pos
+        closed = self._emit(lambda st: st['end'] is not None)
+        self._trim()
+        return closed
+
+    def finish(self):
+        """End of document: unresolved sections run to their fallback boundary or the end of text."""
+        for st in self.state.values():
+            if st['start'] is not None and st['end'] is None:
+                st['end'] = st['alt_end'] if st['alt_end'] is not None else self.length
+        result = self._emit(lambda st: True)
+        self.buffer = ''
+        return result
+
+    def _emit(self, ready):
+        result = {}
+        for sec in self.sections:
+            key = sec['key']
+            st = self.state[key]
+            if key in self.emitted or not ready(st): continue
+            raw = None
+            if st['start'] is not None:
+                raw = self.buffer[st['start'] - self.buffer_start:st['end'] - self.buffer_start].strip()
+            result[key] = self.segmenter.normalize(sec, raw)
+            self.emitted.add(key)
+        return result
+
+    def _trim(self):
+        open_starts = [st['start'] for key, st in self.state.items()
+                       if key not in self.emitted and st['start'] is not None]
+        keep_from = min(open_starts) if open_starts else self.length
+        if keep_from > self.buffer_start:
+            self.buffer = self.buffer[keep_from - self.buffer_start:]
+            self.buffer_start = keep_from
+
+
+def compare_streams(hs_path, sf_path, fail_fast=False, laparams=None):
+    """
+    Compare two reports section by section while both are still being parsed.
+    Each section is judged as soon as both sides have closed it. Returns
+    {key: (result, reason, present_in_both)}; with fail_fast, parsing stops at the first
+    discrepancy and sections not yet judged are left out of the result.
+    """
+    segmenter = SectionSegmenter()
+    sides = {
+        'hs': (iter_page_texts(hs_path, laparams), SectionStream(segmenter)),
+        'sf': (iter_page_texts(sf_path, laparams), SectionStream(segmenter)),
+    }
+    closed = {'hs': {}, 'sf': {}}
+    resolved = {'hs': 0, 'sf': 0}
+    finished = set()
+    verdicts = {}
+    try:
+        while len(verdicts) < len(segmenter.sections):
+            active = [side for side in sides if side not in finished]
+            if not active: break
+            # Advance whichever side is behind so closed-but-unjudged text stays small
+            side = min(active, key=lambda s: resolved[s])
+            pages, stream = sides[side]
+            page = next(pages, None)
+            if page is None:
+                newly_closed = stream.finish()
+                finished.add(side)
+            else:
+                newly_closed = stream.feed(page)
+            closed[side].update(newly_closed)
+            resolved[side] += len(newly_closed)
+            for key in [k for k in closed['hs'] if k in closed['sf']]:
+                verdicts[key] = judge_section(closed['hs'].pop(key), closed['sf'].pop(key))
+                if fail_fast and verdicts[key][0] == 1:
+                    return verdicts
+    finally:
+        for pages, _ in sides.values():
+            pages.close()
+    return verdicts
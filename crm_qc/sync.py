@@ -0,0 +1,160 @@
+"""
+Step 01: match the HubSpot and Salesforce exports, triage collisions and orphans and record
+the pairs in targets.db. Run through 01_SYNC_TARGET_FOLDERS.py; organize_targets() is the
+dialog-free entry point used by the pipeline. tkinter is only imported by the dialogs.
+"""
+import os
+from crm_qc.matching import get_base, plan_fuzzy_matches, plan_name_matches
+from crm_qc.mover import TriagePlan, execute_moves, move_workers, resume_moves, triage_counts
+from crm_qc.state import TARGETS_DB, TargetStore
+from crm_qc.instrumentation import Tracer
+
+# Configuration
+RESULTS_DIR = os.path.join(os.path.expanduser("~/Downloads/"), "QA_ANALYTICS_RESULTS")
+
+# Phase 2.5 fuzzy pairing of leftover names (trigram Dice similarity, 0-1)
+FUZZY_MATCH = os.environ.get("QA_FUZZY_MATCH", "1") != "0"
+FUZZY_THRESHOLD = float(os.environ.get("QA_FUZZY_THRESHOLD", "0.85"))
+
+# Timing spans (QA_TRACE=1) and cProfile (QA_PROFILE=1); both are no-ops by default
+TRACER = Tracer("01_sync", RESULTS_DIR)
+
+def select_directory(title):
+    import tkinter as tk
+    from tkinter import filedialog
+    root = tk.Tk()
+    root.withdraw()
+    path = filedialog.askdirectory(title=title)
+    root.destroy()
+    return path
+
+def select_file(title, filetypes):
+    import tkinter as tk
+    from tkinter import filedialog
+    root = tk.Tk()
+    root.withdraw()
+    path = filedialog.askopenfilename(title=title, filetypes=filetypes)
+    root.destroy()
+    return path
+
+def synchronize_file_targets():
+    """Logic to match and organize files for comparison."""
+    print("Initializing Multi-Pass Synchronization Engine...")
+    
+    hs_dir = select_directory("STEP 1: Select HubSpot Source Folder (PDFs)")
+    if not hs_dir: return
+    print(f"HubSpot Folder Selected: {hs_dir}")
+    
+    sf_dir = select_directory("STEP 2: Select Salesforce Source Folder (PDFs)")
+    if not sf_dir: return
+    print(f"Salesforce Folder Selected: {sf_dir}")
+
+    template_path = select_file("STEP 3: Select Excel Data Template (.xlsx)", [("Excel files", "*.xlsx"), ("All files", "*.*")])
+    if not template_path: return
+    print(f"Template Selected: {template_path}")
+
+    with TRACER.profile("sync"):
+        matches, collision_count, unmatched_count = organize_targets(hs_dir, sf_dir, template_path)
+    TRACER.close()
+        
+    summary = f"COMPLETED:\nMatches Found: {len(matches)}\nCollisions Triaged: {collision_count}\nRemaining Unmatched: {unmatched_count}"
+    print(f"\n{summary}")
+    from tkinter import messagebox
+    messagebox.showinfo("Extraction Complete", summary)
+
+def plan_triage(hs_dir, sf_dir):
+    """Phases 1-3 as a TriagePlan: every match, collision and orphan move, decided before any file moves."""
+    # Initial lists
+    with TRACER.span("list_sources"):
+        hs_pool = [f for f in os.listdir(hs_dir) if f.endswith('.pdf')]
+        sf_pool = [f for f in os.listdir(sf_dir) if f.endswith('.pdf')]
+
+    plan = TriagePlan()
+
+    # --- Phase 1: Filename Match ---
+    print("Phase 1: Checking for exact filename matches...")
+    exact_matches = set(hs_pool).intersection(sf_pool)
+    for filename in sorted(exact_matches):
+        plan.add_pair(filename, hs_dir, sf_dir, filename, filename)
+
+    hs_pool = [f for f in hs_pool if f not in exact_matches]
+    sf_pool = [f for f in sf_pool if f not in exact_matches]
+
+    # --- Phase 2: Name Match ---
+    print("Phase 2: Matching by truncating timestamps...")
+    with TRACER.span("plan_name_matches"):
+        name_pairs, collisions = plan_name_matches(hs_pool, sf_pool)
+    hs_consumed, sf_consumed = set(), set()
+
+    for base, (hs_filename, sf_filename) in name_pairs.items():
+        plan.add_pair(base, hs_dir, sf_dir, hs_filename, sf_filename)
+        print(f"   Phase 2 Match: [{hs_filename}] <-> [{sf_filename}]")
+        hs_consumed.add(hs_filename)
+        sf_consumed.add(sf_filename)
+
+    # Bases with several candidates on either side cannot be paired safely
+    for base, (hs_files, sf_files) in collisions.items():
+        print(f"   Collision: [{base}] ({len(hs_files)} HubSpot / {len(sf_files)} Salesforce)")
+        for side, src_dir, files, consumed in [('hs', hs_dir, hs_files, hs_consumed), ('sf', sf_dir, sf_files, sf_consumed)]:
+            for f in files:
+                plan.add_file('collision', side, src_dir, f, "TRIAGE_COLLISIONS")
+                consumed.add(f)
+
+    hs_pool = [f for f in hs_pool if f not in hs_consumed]
+    sf_pool = [f for f in sf_pool if f not in sf_consumed]
+
+    # --- Phase 2.5: Fuzzy Match ---
+    if FUZZY_MATCH and hs_pool and sf_pool:
+        print(f"Phase 2.5: Fuzzy matching {len(hs_pool)} HubSpot / {len(sf_pool)} Salesforce leftovers...")
+        with TRACER.span("plan_fuzzy_matches"):
+            fuzzy_pairs, ambiguous = plan_fuzzy_matches(hs_pool, sf_pool, FUZZY_THRESHOLD)
+        for hs_filename, (sf_filename, score) in fuzzy_pairs.items():
+            name = get_base(hs_filename)
+            if name in plan.names: name = hs_filename
+            plan.add_pair(name, hs_dir, sf_dir, hs_filename, sf_filename, score)
+            print(f"   Phase 2.5 Match ({score:.2f}): [{hs_filename}] <-> [{sf_filename}]")
+            hs_consumed.add(hs_filename)
+            sf_consumed.add(sf_filename)
+        if ambiguous: print(f"   {ambiguous} name(s) had no clear best candidate; left unmatched")
+        hs_pool = [f for f in hs_pool if f not in hs_consumed]
+        sf_pool = [f for f in sf_pool if f not in sf_consumed]
+
+    # --- Phase 3: Orphan Processing ---
+    for f in hs_pool: plan.add_file('orphan', 'hs', hs_dir, f, "UNMATCHED_PAIRS")
+    for f in sf_pool: plan.add_file('orphan', 'sf', sf_dir, f, "UNMATCHED_PAIRS")
+    return plan
+
+def organize_targets(hs_dir, sf_dir, template_path, targets_db=TARGETS_DB, on_match=None):
+    """
+    Match, triage and record the PDFs of two source folders without any dialogs.
+    All moves are planned and journaled in targets.db before the first file moves; pairs are recorded
+    as they land, and a run that was interrupted is resumed here before anything else.
+    on_match(name, entry) is called as each pair is moved.
+    Returns (matches, collision_count, unmatched_count).
+    """
+    store = TargetStore(targets_db)
+    try:
+        if store.journal(['planned']):
+            with TRACER.span("resume_moves"):
+                resume_moves(store, on_match, tracer=TRACER)
+            previous = store.load()
+            if (previous.get('hs_dir'), previous.get('sf_dir')) == (hs_dir, sf_dir):
+                print("Interrupted run completed; run Step 01 again to triage files added since.")
+                return (previous['matches'], *triage_counts(store))
+
+        plan = plan_triage(hs_dir, sf_dir)
+        # Store metadata for the 02 and 03 scripts; matches are added as their files are moved
+        meta = {
+            "hs_dir": hs_dir,
+            "sf_dir": sf_dir,
+            "template_path": template_path
+        }
+        with TRACER.span("store_write"):
+            store.begin_triage(meta, plan.moves)
+        workers = move_workers(hs_dir, sf_dir)
+        print(f"Moving {len(plan.moves)} file(s) ({workers} worker(s))...")
+        with TRACER.span("execute_moves"):
+            execute_moves(store, plan.moves, workers, on_match, TRACER)
+        return (store.load()['matches'], *triage_counts(store))
+    finally:
+        store.close()
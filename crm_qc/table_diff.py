@@ -0,0 +1,170 @@
+"""Row-level table diff: pinpoints the rows behind a section discrepancy."""
+import re
+from collections import Counter, defaultdict, deque, namedtuple
+from crm_qc.page_diff import page_fingerprints
+from crm_qc.sections import SECTIONS
+
+NUMBER = re.compile(r'^\(?[-+]?\$?\d[\d,]*(?:\.\d+)?%?\)?$')
+NON_NUMERIC = re.compile(r'[^\d.]')
+
+Row = namedtuple('Row', 'text label values section', defaults=(None,))
+RowDiff = namedtuple('RowDiff', 'label hs sf section', defaults=(None,))
+TableDiff = namedtuple('TableDiff', 'sections unattributed tolerated')
+
+
+def _parse_number(token):
+    value = float(NON_NUMERIC.sub('', token))
+    negative = (token.startswith('(') and token.endswith(')')) or token.lstrip('($').startswith('-')
+    return -value if negative else value
+
+
+def parse_row(text, section=None):
+    """Split a row into its label (the non-numeric cells) and a tuple of numeric cells."""
+    label, values = [], []
+    for token in text.split():
+        if NUMBER.match(token):
+            values.append(_parse_number(token))
+        else:
+            label.append(token)
+    return Row(text, ' '.join(label).lower(), tuple(values), section)
+
+
+def _layout_lines(layout_obj):
+    from pdfminer.layout import LTTextContainer, LTTextLine
+    for obj in layout_obj:
+        if isinstance(obj, LTTextLine):
+            if obj.get_text().strip(): yield obj
+        elif isinstance(obj, LTTextContainer):
+            yield from _layout_lines(obj)
+
+
+def page_rows(layout):
+    """
+    Rebuild table rows from one pdfminer page: text lines whose vertical centres fall within
+    half a line height of each other form a row, read left to right.
+    """
+    lines = sorted(_layout_lines(layout), key=lambda l: (-(l.y0 + l.y1) / 2, l.x0))
+    rows, current, centre = [], [], None
+    for line in lines:
+        mid = (line.y0 + line.y1) / 2
+        if current and abs(mid - centre) > max(line.height, 1.0) / 2:
+            rows.append(current)
+            current = []
+        if not current: centre = mid
+        current.append(line)
+    if current: rows.append(current)
+    return [' '.join(' '.join(l.get_text().split()) for l in sorted(row, key=lambda l: l.x0)) for row in rows]
+
+
+class SectionTracker:
+    """
+    Assigns rows to report sections by following section markers in reading order. Layout order can
+    differ from extract_text's (which emits a table's label column before its numbers), so the
+    assignment is a best guess used to file evidence, never to scope the diff.
+    """
+
+    def __init__(self, sections=SECTIONS):
+        starts = {sec['marker'].lower(): sec['key'] for sec in sections}
+        markers = set(starts)
+        markers.update(sec['next_marker'].lower() for sec in sections if sec['next_marker'])
+        self.starts = starts
+        self.pattern = re.compile('|'.join(re.escape(m) for m in sorted(markers, key=len, reverse=True)),
+                                  re.IGNORECASE)
+        self.current = None
+
+    def scan(self, text):
+        """Advance past marker occurrences in text; return the text with the markers removed."""
+        for match in self.pattern.finditer(text):
+            self.current = self.starts.get(match.group(0).lower())
+        return self.pattern.sub(' ', text)
+
+
+def changed_rows(hs_path, sf_path, sections=SECTIONS):
+    """
+    Returns (hs_rows, sf_rows): every Row of the pages that differ between the two exports, tagged
+    with the section the tracker had open. Identical pages can hold no differing rows, so they are
+    only scanned (with pypdf's cheap text extraction) to keep track of which section is open.
+    """
+    from pdfminer.high_level import extract_pages
+    from pypdf import PdfReader
+    reader_hs, reader_sf = PdfReader(hs_path), PdfReader(sf_path)
+    count_hs, count_sf = len(reader_hs.pages), len(reader_sf.pages)
+    if count_hs == count_sf:
+        fps_hs, fps_sf = page_fingerprints(reader_hs), page_fingerprints(reader_sf)
+        changed = [i for i in range(count_hs) if fps_hs[i] != fps_sf[i]]
+    else:
+        changed = None
+    result = []
+    for path, reader, count in ((hs_path, reader_hs, count_hs), (sf_path, reader_sf, count_sf)):
+        pages = range(count) if changed is None else changed
+        wanted = set(pages)
+        tracker, rows = SectionTracker(sections), []
+        layouts = extract_pages(path, page_numbers=set(pages)) if pages else iter(())
+        last = pages[-1] if pages else -1
+        for i in range(last + 1):
+            if i not in wanted:
+                tracker.scan(reader.pages[i].extract_text() or '')
+                continue
+            for text in page_rows(next(layouts)):
+                text = ' '.join(tracker.scan(text).split())
+                if text: rows.append(parse_row(text, tracker.current))
+        result.append(rows)
+    return tuple(result)
+
+
+def _values_match(a, b, tolerance):
+    return len(a) == len(b) and all(abs(x - y) <= tolerance for x, y in zip(a, b))
+
+
+def diff_rows(hs_rows, sf_rows, tolerance=0.0):
+    """
+    Compare two row lists in linear time. Identical rows cancel out through their hashes;
+    the remainder are paired by label and their numeric cells compared within tolerance.
+    Returns ([RowDiff, ...], number of rows that differed only within tolerance).
+    """
+    common = Counter(r.text for r in hs_rows) & Counter(r.text for r in sf_rows)
+    leftover_hs, leftover_sf = [], []
+    for rows, leftover in ((hs_rows, leftover_hs), (sf_rows, leftover_sf)):
+        remaining = Counter(common)
+        for row in rows:
+            if remaining[row.text]:
+                remaining[row.text] -= 1
+            else:
+                leftover.append(row)
+
+    by_label = defaultdict(deque)
+    for row in leftover_sf: by_label[row.label].append(row)
+    differences, tolerated, paired = [], 0, set()
+    for row in leftover_hs:
+        candidates = by_label.get(row.label)
+        if not candidates:
+            differences.append(RowDiff(row.label, row.text, None, row.section))
+            continue
+        other = candidates.popleft()
+        paired.add(id(other))
+        if tolerance and _values_match(row.values, other.values, tolerance):
+            tolerated += 1
+        else:
+            differences.append(RowDiff(row.label, row.text, other.text, row.section or other.section))
+    differences.extend(RowDiff(row.label, None, row.text, row.section) for row in leftover_sf if id(row) not in paired)
+    return differences, tolerated
+
+
+def section_row_diffs(hs_path, sf_path, keys, tolerance=0.0, sections=SECTIONS):
+    """
+    Diff the rows of every changed page, whatever section they fall in, and file the differences
+    under the requested (discrepant) sections. Returns a TableDiff: {section key: [RowDiff, ...]},
+    the differences the tracker placed outside those sections, and the document-wide count of rows
+    that differed only within tolerance. With a single requested section every difference is its own.
+    """
+    hs_rows, sf_rows = changed_rows(hs_path, sf_path, sections)
+    differences, tolerated = diff_rows(hs_rows, sf_rows, tolerance)
+    by_section, unattributed = {key: [] for key in keys}, []
+    for diff in differences:
+        if len(by_section) == 1:
+            next(iter(by_section.values())).append(diff)
+        elif diff.section in by_section:
+            by_section[diff.section].append(diff)
+        else:
+            unattributed.append(diff)
+    return TableDiff(by_section, unattributed, tolerated)
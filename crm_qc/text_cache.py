@@ -0,0 +1,100 @@
+"""Persistent, compressed cache of extracted PDF text keyed by file content."""
+import hashlib
+import os
+import zlib
+
+DEFAULT_MAX_BYTES = 1024 * 1024 * 1024
+ENTRY_SUFFIX = ".txt.z"
+
+
+def extractor_settings(laparams=None):
+    """Describe the extractor configuration so a pdfminer upgrade or layout change invalidates entries."""
+    import pdfminer
+    from pdfminer.layout import LAParams
+    return f"pdfminer.six={pdfminer.__version__};{laparams or LAParams()!r}"
+
+
+class TextCache:
+    """
+    On-disk store of extract_text output, one zlib-compressed file per (content digest, settings).
+    Reads refresh an entry's mtime; when the cache grows past max_bytes the least recently
+    used entries are evicted.
+    """
+
+    def __init__(self, root, max_bytes=DEFAULT_MAX_BYTES, settings=None):
+        self.root = root
+        self.max_bytes = max_bytes
+        self.settings = settings or extractor_settings()
+        self.hits = 0
+        self.misses = 0
+        self._bytes = None
+        os.makedirs(root, exist_ok=True)
+
+    def _path(self, digest):
+        key = hashlib.sha256(f"{digest}|{self.settings}".encode()).hexdigest()
+        return os.path.join(self.root, key[:2], key + ENTRY_SUFFIX)
+
+    def _entries(self):
+        for dirpath, _, files in os.walk(self.root):
+            for name in files:
+                if name.endswith(ENTRY_SUFFIX):
+                    yield os.path.join(dirpath, name)
+
+    def _total_bytes(self):
+        if self._bytes is None:
+            self._bytes = sum(os.path.getsize(p) for p in self._entries())
+        return self._bytes
+
+    def get(self, digest):
+        """Return the cached text for a content digest, or None."""
+        path = self._path(digest)
+        try:
+            with open(path, 'rb') as f:
+                text = zlib.decompress(f.read()).decode('utf-8')
+        except (OSError, zlib.error, UnicodeDecodeError):
+            self.misses += 1
+            return None
+        try: os.utime(path)
+        except OSError: pass
+        self.hits += 1
+        return text
+
+    def put(self, digest, text):
+        """Store text for a content digest, evicting old entries if the size cap is exceeded."""
+        path = self._path(digest)
+        data = zlib.compress(text.encode('utf-8'), 6)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'wb') as f:
+            f.write(data)
+        previous = os.path.getsize(path) if os.path.exists(path) else 0
+        os.replace(tmp_path, path)
+        self._bytes = self._total_bytes() - previous + len(data)
+        if self._bytes > self.max_bytes:
+            self.evict()
+
+    def evict(self, target_bytes=None):
+        """Delete least recently used entries until the cache fits in target_bytes (default: 90% of the cap)."""
+        if target_bytes is None:
+            target_bytes = int(self.max_bytes * 0.9)
+        entries = []
+        for p in self._entries():
+            try:
+                st = os.stat(p)
+            except OSError:
+                continue
+            entries.append((st.st_mtime_ns, st.st_size, p))
+        entries.sort()
+        total = sum(size for _, size, _ in entries)
+        for _, size, p in entries:
+            if total <= target_bytes: break
+            try:
+                os.remove(p)
+                total -= size
+            except OSError:
+                pass
+        self._bytes = total
+
+    def stats(self):
+        """Hit/miss counters for this session plus the current on-disk footprint."""
+        return {"hits": self.hits, "misses": self.misses, "bytes": self._total_bytes()}
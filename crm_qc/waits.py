@@ -0,0 +1,62 @@
+"""Timed, event-driven waits for the GUI automation path."""
+import os
+import time
+
+
+def wait_for_stable_file(path, timeout, settle=1.0, poll=0.25):
+    """
+    Block until `path` exists and its size has not changed for `settle` seconds.
+    Returns False if that does not happen before `timeout` seconds have passed.
+    """
+    deadline = time.monotonic() + timeout
+    last_size, stable_since = None, None
+    while time.monotonic() < deadline:
+        try:
+            size = os.path.getsize(path)
+        except OSError:
+            size = None
+        now = time.monotonic()
+        if size is not None and size > 0 and size == last_size:
+            if now - stable_since >= settle:
+                return True
+        else:
+            last_size, stable_since = size, now
+        time.sleep(poll)
+    return False
+
+
+class WaitLog:
+    """Runs every wait of one pair and records how long each took."""
+
+    def __init__(self):
+        self.entries = []
+
+    def _record(self, label, started):
+        elapsed = time.monotonic() - started
+        self.entries.append((label, elapsed))
+        return elapsed
+
+    def pause(self, seconds, label):
+        """Fixed UI settle delay (no observable completion signal exists for it)."""
+        started = time.monotonic()
+        time.sleep(seconds)
+        self._record(label, started)
+
+    def for_file(self, path, timeout, label, settle=1.0):
+        """Wait for a download to appear and finish growing."""
+        started = time.monotonic()
+        ok = wait_for_stable_file(path, timeout, settle=settle)
+        elapsed = self._record(label, started)
+        print(f"   ⏱ {label}: {elapsed:.1f}s{'' if ok else ' (timed out)'}")
+        return ok
+
+    def total(self):
+        return sum(elapsed for _, elapsed in self.entries)
+
+    def summary(self):
+        """One line with the time spent per wait label, in first-seen order."""
+        per_label = {}
+        for label, elapsed in self.entries:
+            per_label[label] = per_label.get(label, 0.0) + elapsed
+        parts = ", ".join(f"{label} {elapsed:.1f}s" for label, elapsed in per_label.items())
+        return f"Waits: {parts} (total {self.total():.1f}s)"
@@ -0,0 +1,256 @@
+"""
+Local results warehouse for Step 03. Every analysed client is recorded per run with its
+per-section verdicts and reasons, timing, input fingerprints and evidence-log block, in an
+indexed SQLite file next to the Excel tracker, so cross-run questions need neither the
+workbook nor the markdown log.
+
+Usage:
+    python -m crm_qc.warehouse runs [--limit N]
+    python -m crm_qc.warehouse failures --section Diagnosis [--last 3]
+    python -m crm_qc.warehouse client NAME
+    python -m crm_qc.warehouse sql "SELECT ..."
+    python -m crm_qc.warehouse export-workbook --template TEMPLATE.xlsx --out OUT.xlsx [--run RUN_ID]
+    python -m crm_qc.warehouse export-log --out OUT.md [--run RUN_ID]
+"""
+import argparse
+import os
+import sqlite3
+import sys
+from datetime import datetime
+
+WAREHOUSE_FILE = "QA_RESULTS.db"
+DEFAULT_DB = os.path.join(os.path.expanduser("~/Downloads/"), "QA_ANALYTICS_RESULTS", WAREHOUSE_FILE)
+DEFAULT_SHEET = 'QA Report Test Tracker'
+HEADER_ROW = 3
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    run_id TEXT PRIMARY KEY,
+    stage TEXT NOT NULL,
+    started TEXT NOT NULL,
+    finished TEXT
+);
+CREATE TABLE IF NOT EXISTS clients (
+    run_id TEXT NOT NULL,
+    seq INTEGER NOT NULL,
+    name TEXT NOT NULL,
+    row INTEGER,
+    mode TEXT NOT NULL,
+    verdict INTEGER,
+    tester TEXT,
+    seconds REAL,
+    hs_path TEXT,
+    sf_path TEXT,
+    hs_sha256 TEXT,
+    sf_sha256 TEXT,
+    recorded TEXT NOT NULL,
+    evidence TEXT,
+    PRIMARY KEY (run_id, seq)
+);
+CREATE TABLE IF NOT EXISTS sections (
+    run_id TEXT NOT NULL,
+    seq INTEGER NOT NULL,
+    name TEXT NOT NULL,
+    section TEXT NOT NULL,
+    result INTEGER,
+    reason TEXT,
+    differing_rows INTEGER,
+    PRIMARY KEY (run_id, seq, section)
+);
+CREATE INDEX IF NOT EXISTS idx_runs_started ON runs(started);
+CREATE INDEX IF NOT EXISTS idx_clients_name ON clients(name, run_id);
+CREATE INDEX IF NOT EXISTS idx_sections_section ON sections(section, result, run_id);
+"""
+
+
+class Warehouse:
+    """
+    One writer per run. Records are buffered by record() and committed by flush(), which the
+    callers tie to their workbook checkpoints. Use on a single thread (SQLite connection).
+    """
+
+    def __init__(self, path=DEFAULT_DB, stage="03_reports"):
+        self.path = path
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self.conn = sqlite3.connect(path)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript(SCHEMA)
+        self.stage = stage
+        self.run_id = None
+        self.seq = 0
+        self.pending_clients, self.pending_sections = [], []
+
+    def start_run(self):
+        """Open a run; ids are timestamps, suffixed when two runs start within the same second."""
+        base = datetime.now().strftime("%Y%m%d_%H%M%S")
+        run_id, n = base, 1
+        while self.conn.execute("SELECT 1 FROM runs WHERE run_id = ?", (run_id,)).fetchone():
+            n += 1
+            run_id = f"{base}_{n}"
+        with self.conn:
+            self.conn.execute("INSERT INTO runs (run_id, stage, started) VALUES (?, ?, ?)",
+                              (run_id, self.stage, datetime.now().isoformat(timespec='seconds')))
+        self.run_id = run_id
+        return run_id
+
+    def record(self, name, row, paths, record, client_lines, seconds):
+        """Buffer one analysed client (record is the dict filled by process_client_analysis)."""
+        if self.run_id is None: self.start_run()
+        self.seq += 1
+        fingerprints = paths.get('fingerprints') or {}
+        sha = lambda side: (fingerprints.get(side) or {}).get('sha256')
+        self.pending_clients.append((
+            self.run_id, self.seq, name, row, record.get('mode', 'error'), record.get('verdict'),
+            record.get('tester'), round(seconds, 4), paths.get('hs'), paths.get('sf'), sha('hs'), sha('sf'),
+            datetime.now().isoformat(timespec='seconds'), "\n".join(client_lines)))
+        for section, (result, reason, differing_rows) in record.get('sections', {}).items():
+            self.pending_sections.append((self.run_id, self.seq, name, section, result, reason, differing_rows))
+
+    def flush(self):
+        if not self.pending_clients: return
+        with self.conn:
+            self.conn.executemany("INSERT INTO clients VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                                  self.pending_clients)
+            self.conn.executemany("INSERT INTO sections VALUES (?, ?, ?, ?, ?, ?, ?)", self.pending_sections)
+        self.pending_clients.clear()
+        self.pending_sections.clear()
+
+    def close(self):
+        self.flush()
+        if self.run_id:
+            with self.conn:
+                self.conn.execute("UPDATE runs SET finished = ? WHERE run_id = ?",
+                                  (datetime.now().isoformat(timespec='seconds'), self.run_id))
+        self.conn.close()
+
+
+# --- Queries ---
+def recent_runs(conn, limit=20):
+    return conn.execute("""
+        SELECT r.run_id, r.started, r.finished, COUNT(c.seq), SUM(c.verdict = 1), SUM(c.mode = 'error')
+        FROM (SELECT * FROM runs ORDER BY started DESC, run_id DESC LIMIT ?) r
+        LEFT JOIN clients c ON c.run_id = r.run_id
+        GROUP BY r.run_id ORDER BY r.started DESC, r.run_id DESC""", (limit,)).fetchall()
+
+
+def section_failures(conn, section, last=3):
+    """Clients that failed a section in any of the last N runs, with how many of those runs they failed."""
+    return conn.execute("""
+        SELECT s.name, COUNT(DISTINCT s.run_id), MAX(s.run_id)
+        FROM sections s
+        WHERE s.section = ? AND s.result = 1
+          AND s.run_id IN (SELECT run_id FROM runs ORDER BY started DESC, run_id DESC LIMIT ?)
+        GROUP BY s.name ORDER BY COUNT(DISTINCT s.run_id) DESC, s.name""", (section, last)).fetchall()
+
+
+def client_history(conn, name):
+    return conn.execute("""
+        SELECT c.run_id, c.row, c.mode, c.verdict, c.seconds, c.hs_sha256, c.sf_sha256,
+               (SELECT GROUP_CONCAT(s.section || '=' || COALESCE(s.result, '-'), ', ')
+                FROM sections s WHERE s.run_id = c.run_id AND s.seq = c.seq)
+        FROM clients c WHERE c.name = ? ORDER BY c.run_id, c.seq""", (name,)).fetchall()
+
+
+def latest_results(conn, run_id=None):
+    """The most recent successful record of every client (as of run_id), in workbook row order."""
+    cutoff, params = ("AND run_id <= ?", (run_id,)) if run_id else ("", ())
+    return conn.execute(f"""
+        SELECT run_id, seq, name, row, verdict, tester FROM (
+            SELECT *, ROW_NUMBER() OVER (PARTITION BY name ORDER BY run_id DESC, seq DESC) AS newest
+            FROM clients WHERE mode != 'error' {cutoff})
+        WHERE newest = 1 ORDER BY row, run_id, seq""", params).fetchall()
+
+
+def export_workbook(conn, template_path, out_path, sheet_name=DEFAULT_SHEET, run_id=None):
+    """Rebuild the QA workbook from the latest record of every client; returns the number of rows."""
+    import openpyxl
+    wb = openpyxl.load_workbook(template_path)
+    sheet = wb[sheet_name]
+    col_map = {str(cell.value).strip(): idx + 1 for idx, cell in enumerate(sheet[HEADER_ROW]) if cell.value}
+    report_col = col_map.get('Report ') or col_map.get('Report', 4)
+    next_row = HEADER_ROW + 1
+    rows = latest_results(conn, run_id)
+    for record_run, seq, name, row, verdict, tester in rows:
+        row = row or next_row
+        next_row = max(next_row, row + 1)
+        sheet.cell(row=row, column=col_map.get('Tester', 3)).value = tester
+        sheet.cell(row=row, column=report_col).value = name
+        for section, result, reason in conn.execute(
+                "SELECT section, result, reason FROM sections WHERE run_id = ? AND seq = ?", (record_run, seq)):
+            # Sections without a result were not evaluated (fail-fast streaming); the tracker shows the reason
+            if section in col_map: sheet.cell(row=row, column=col_map[section]).value = reason if result is None else result
+        if col_map.get('Test Result'): sheet.cell(row=row, column=col_map['Test Result']).value = verdict
+    wb.save(out_path)
+    return len(rows)
+
+
+def export_log(conn, out_path, run_id=None):
+    """Rebuild the evidence log (every successful client block, in the order it was written)."""
+    where = "AND run_id = ?" if run_id else ""
+    blocks = conn.execute(f"SELECT evidence FROM clients WHERE mode != 'error' {where} ORDER BY run_id, seq",
+                          (run_id,) if run_id else ()).fetchall()
+    with open(out_path, "w") as f:
+        for (evidence,) in blocks: f.write(evidence + "\n")
+    return len(blocks)
+
+
+def print_rows(header, rows):
+    print("\t".join(header))
+    for row in rows: print("\t".join("" if v is None else str(v) for v in row))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Query and export the Step 03 results warehouse.")
+    parser.add_argument("--db", default=DEFAULT_DB, help=f"warehouse file (default {DEFAULT_DB})")
+    commands = parser.add_subparsers(dest="command", required=True)
+    runs = commands.add_parser("runs", help="list recent runs")
+    runs.add_argument("--limit", type=int, default=20)
+    failures = commands.add_parser("failures", help="clients that failed a section in the last N runs")
+    failures.add_argument("--section", required=True, help="section key, e.g. Diagnosis or 'Summary Page'")
+    failures.add_argument("--last", type=int, default=3)
+    client = commands.add_parser("client", help="verdict history of one client")
+    client.add_argument("name")
+    sql = commands.add_parser("sql", help="run a read-only SQL query")
+    sql.add_argument("query")
+    workbook = commands.add_parser("export-workbook", help="regenerate the QA workbook")
+    workbook.add_argument("--template", required=True)
+    workbook.add_argument("--out", required=True)
+    workbook.add_argument("--sheet", default=DEFAULT_SHEET)
+    workbook.add_argument("--run", help="state as of this run (default: latest)")
+    log = commands.add_parser("export-log", help="regenerate the evidence log")
+    log.add_argument("--out", required=True)
+    log.add_argument("--run", help="only this run (default: all runs)")
+    args = parser.parse_args(argv)
+
+    if not os.path.exists(args.db):
+        print(f"Error: {args.db} not found. Run Script 03 first.")
+        return 1
+    conn = sqlite3.connect(f"file:{args.db}?mode=ro", uri=True)
+    try:
+        if args.command == "runs":
+            print_rows(["run_id", "started", "finished", "clients", "failed", "errors"], recent_runs(conn, args.limit))
+        elif args.command == "failures":
+            print_rows(["client", "runs_failed", "last_failed_run"], section_failures(conn, args.section, args.last))
+        elif args.command == "client":
+            print_rows(["run_id", "row", "mode", "verdict", "seconds", "hs_sha256", "sf_sha256", "sections"],
+                       client_history(conn, args.name))
+        elif args.command == "sql":
+            cursor = conn.execute(args.query)
+            print_rows([d[0] for d in cursor.description or ()], cursor.fetchall())
+        elif args.command == "export-workbook":
+            count = export_workbook(conn, args.template, args.out, args.sheet, args.run)
+            print(f"Wrote {count} client rows to {args.out}")
+        else:
+            count = export_log(conn, args.out, args.run)
+            print(f"Wrote {count} client blocks to {args.out}")
+    except sqlite3.Error as e:
+        print(f"Error: {e}")
+        return 1
+    finally:
+        conn.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,183 @@
+"""
+Watch mode: polls the HubSpot and Salesforce source folders and pushes every newly matched
+pair through rendering and analysis as soon as both of its exports have landed.
+
+Usage:
+    python -m crm_qc.watch --hs-dir HS --sf-dir SF --template TEMPLATE.xlsx [--interval 2] [--settle 3]
+"""
+import argparse
+import os
+import sys
+import time
+from crm_qc.matching import get_base, plan_name_matches
+from crm_qc.mover import TriagePlan, execute_moves, resume_moves
+from crm_qc.pipeline import DEFAULT_QUEUE_SIZE, DONE, Pipeline, load_config
+from crm_qc.state import TARGETS_DB, TargetStore
+
+DEFAULT_INTERVAL = 2.0
+DEFAULT_SETTLE = 3.0
+
+
+class FolderWatcher:
+    """
+    Polls the top level of one source folder. A PDF is reported once, after its size and
+    mtime have held still for `settle` seconds (exports still being written are skipped).
+    Matched and triaged files are moved into subfolders, so they are never scanned again.
+    """
+
+    def __init__(self, directory, settle=DEFAULT_SETTLE):
+        self.directory = directory
+        self.settle = settle
+        self.seen = {}
+        self.reported = set()
+
+    def poll(self, now=None):
+        """Return the names of PDFs that became stable since the last poll."""
+        now = time.monotonic() if now is None else now
+        current = {}
+        with os.scandir(self.directory) as entries:
+            for entry in entries:
+                if entry.name.endswith('.pdf') and entry.is_file():
+                    stat = entry.stat()
+                    current[entry.name] = (stat.st_size, stat.st_mtime_ns)
+        ready = []
+        for name, signature in current.items():
+            if name in self.reported: continue
+            previous = self.seen.get(name)
+            if previous is None or previous[0] != signature:
+                self.seen[name] = (signature, now)
+            elif now - previous[1] >= self.settle:
+                ready.append(name)
+                self.reported.add(name)
+        for name in [n for n in self.seen if n not in current]:
+            del self.seen[name]
+            self.reported.discard(name)
+        return sorted(ready)
+
+
+class IncrementalMatcher:
+    """
+    Step 01's Phase 1/Phase 2 matching applied to new arrivals only. A file without a
+    counterpart is not triaged as an orphan: it waits in its source folder for the other side.
+    Moves go through the Step 01 move journal, so a pair is recorded in the same commit as its
+    files' moves and an interrupted watch is resumed like an interrupted Step 01 run.
+    """
+
+    def __init__(self, store, hs_dir, sf_dir):
+        self.store = store
+        self.hs_dir = hs_dir
+        self.sf_dir = sf_dir
+        self.hs_waiting = set()
+        self.sf_waiting = set()
+
+    def add(self, hs_new, sf_new):
+        """Register stable arrivals; returns [(name, entry)] for the pairs they complete, once recorded."""
+        self.hs_waiting.update(hs_new)
+        self.sf_waiting.update(sf_new)
+        plan = TriagePlan(*self.store.journal_end())
+
+        # Phase 1: exact filenames
+        for filename in sorted(self.hs_waiting & self.sf_waiting):
+            self._pair(plan, filename, filename, filename)
+
+        # Phase 2: truncated names, limited to the bases touched by these arrivals
+        bases = {get_base(f) for f in (*hs_new, *sf_new)}
+        hs_pool = [f for f in self.hs_waiting if get_base(f) in bases]
+        sf_pool = [f for f in self.sf_waiting if get_base(f) in bases]
+        pairs, collisions = plan_name_matches(hs_pool, sf_pool)
+        for base, (hs_filename, sf_filename) in pairs.items():
+            self._pair(plan, hs_filename, sf_filename, base)
+        for base, (hs_files, sf_files) in collisions.items():
+            print(f"   Collision: [{base}] ({len(hs_files)} HubSpot / {len(sf_files)} Salesforce)")
+            for side, src_dir, files, waiting in [('hs', self.hs_dir, hs_files, self.hs_waiting),
+                                                  ('sf', self.sf_dir, sf_files, self.sf_waiting)]:
+                for f in files:
+                    plan.add_file('collision', side, src_dir, f, "TRIAGE_COLLISIONS")
+                    waiting.discard(f)
+        if not plan.moves: return []
+
+        matched = []
+        def on_match(name, entry):
+            print(f"   Matched: [{os.path.basename(entry['hs'])}] <-> [{os.path.basename(entry['sf'])}]")
+            matched.append((name, entry))
+        self.store.append_moves(plan.moves)
+        execute_moves(self.store, plan.moves, on_match=on_match)
+        return matched
+
+    def _pair(self, plan, hs_filename, sf_filename, name):
+        # A pair that cannot be moved is dropped from the waiting sets; it is reported again if the file changes
+        self.hs_waiting.discard(hs_filename)
+        self.sf_waiting.discard(sf_filename)
+        plan.add_pair(name, self.hs_dir, self.sf_dir, hs_filename, sf_filename)
+
+
+def watch(hs_dir, sf_dir, template_path, db_path=TARGETS_DB, interval=DEFAULT_INTERVAL, settle=DEFAULT_SETTLE,
+          render_workers=None, extraction_workers=None, queue_size=DEFAULT_QUEUE_SIZE):
+    """Run until interrupted; pairs still queued when stopping are finished first."""
+    pipeline = Pipeline(db_path, None, render_workers, extraction_workers, queue_size, flush_when_idle=True)
+    store = TargetStore(db_path)
+    if store.is_empty():
+        store.replace({"hs_dir": hs_dir, "sf_dir": sf_dir, "template_path": template_path, "matches": {}})
+    # Pairs whose moves an earlier run or watch left planned are moved and recorded first
+    if store.journal(['planned']): resume_moves(store)
+    pending = store.load().get("matches", {})
+    # Exports replaced while nothing was watching are re-analysed in place
+    pipeline.reports.reconcile_report_rows(store, pending)
+
+    pipeline.store_ready.set()
+    pipeline.start(template_path)
+    watchers = FolderWatcher(hs_dir, settle), FolderWatcher(sf_dir, settle)
+    matcher = IncrementalMatcher(store, hs_dir, sf_dir)
+    try:
+        pipeline.feed_pending(pending)
+        print(f"👀 Watching {hs_dir} and {sf_dir} (Ctrl+C to stop)")
+        while True:
+            if pipeline.failed.is_set():
+                print("\nStopping: a pipeline stage failed.")
+                break
+            hs_new, sf_new = (w.poll() for w in watchers)
+            if hs_new or sf_new:
+                for name, entry in matcher.add(hs_new, sf_new):
+                    pipeline.admit((name, entry, None))
+            time.sleep(interval)
+    except KeyboardInterrupt:
+        print("\nStopping: finishing pairs already queued...")
+    finally:
+        pipeline.to_render.put(DONE)
+        counts = pipeline.finish()
+        store.close()
+    print(f"WATCH STOPPED: {counts['rendered']} rendered, {counts['analysed']} analysed, {counts['failed']} failed")
+    return counts
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Continuously reconcile new exports as they land.")
+    parser.add_argument("--config", help="JSON file with any of the options below (underscored keys)")
+    parser.add_argument("--hs-dir", help="HubSpot source folder")
+    parser.add_argument("--sf-dir", help="Salesforce source folder")
+    parser.add_argument("--template", help="Excel data template (.xlsx)")
+    parser.add_argument("--interval", type=float, help=f"seconds between polls (default {DEFAULT_INTERVAL})")
+    parser.add_argument("--settle", type=float,
+                        help=f"seconds a file must stay unchanged before it is matched (default {DEFAULT_SETTLE})")
+    parser.add_argument("--render-workers", type=int)
+    parser.add_argument("--extraction-workers", type=int)
+    parser.add_argument("--targets-db", help=f"state store (default {TARGETS_DB})")
+    parser.add_argument("--queue-size", type=int, help=f"pairs buffered between stages (default {DEFAULT_QUEUE_SIZE})")
+    args = parser.parse_args(argv)
+    options = load_config(args.config) if args.config else {}
+    options.update({k: v for k, v in vars(args).items() if v is not None and k != 'config'})
+    if not options.get("hs_dir") or not options.get("sf_dir") or not options.get("template"):
+        parser.error("--hs-dir, --sf-dir and --template are required")
+    if not os.path.isfile(options["template"]):
+        print(f"Error: template {options['template']} not found.")
+        return 1
+
+    watch(options["hs_dir"], options["sf_dir"], options["template"], options.get("targets_db") or TARGETS_DB,
+          options.get("interval", DEFAULT_INTERVAL), options.get("settle", DEFAULT_SETTLE),
+          options.get("render_workers"), options.get("extraction_workers"),
+          options.get("queue_size") or DEFAULT_QUEUE_SIZE)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
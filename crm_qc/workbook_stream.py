@@ -0,0 +1,91 @@
+"""
+Streamed workbook rewrite for the sharded Step 03 merge. The saved workbook is read one row at a
+time (read-only) and written one row at a time (write-only) with a batch of row edits applied on
+the way, so memory does not grow with the number of rows already in the tracker.
+"""
+import os
+from copy import copy
+
+STYLE_ATTRS = ('font', 'fill', 'border', 'alignment', 'number_format', 'protection')
+# Sheet settings carried over from the template; read-only sheets do not expose them
+LAYOUT_ATTRS = ('sheet_properties', 'sheet_format', 'page_margins', 'page_setup', 'print_options')
+
+
+class StyleCopier:
+    """Builds write-only cells styled like read-only ones, translating each distinct style once."""
+
+    def __init__(self):
+        self.styles = {}
+
+    def cell(self, sheet, source, value):
+        from openpyxl.cell import WriteOnlyCell
+        cell = WriteOnlyCell(sheet, value)
+        key = tuple(source.style_array)
+        style = self.styles.get(key)
+        if style is None:
+            for attr in STYLE_ATTRS: setattr(cell, attr, copy(getattr(source, attr)))
+            self.styles[key] = copy(cell._style)
+        else:
+            cell._style = copy(style)
+        return cell
+
+
+def copy_layout(source, target):
+    """Copy column widths, row heights, merged cells, panes, filters, conditional formats and validations."""
+    for key, dim in source.column_dimensions.items():
+        target.column_dimensions[key] = copy(dim)
+        target.column_dimensions[key].worksheet = target
+    for key, dim in source.row_dimensions.items():
+        target.row_dimensions[key] = copy(dim)
+        target.row_dimensions[key].worksheet = target
+    for attr in LAYOUT_ATTRS: setattr(target, attr, copy(getattr(source, attr)))
+    for merged in source.merged_cells.ranges: target.merged_cells.add(merged.coord)
+    target.freeze_panes = source.freeze_panes
+    target.auto_filter.ref = source.auto_filter.ref
+    for formatting in source.conditional_formatting:
+        for rule in formatting.rules: target.conditional_formatting.add(str(formatting.sqref), rule)
+    for validation in source.data_validations.dataValidation:
+        target.data_validations.append(copy(validation))
+
+
+def _row_values(sheet, styles, cells, edit):
+    width = max(len(cells), max(edit, default=0))
+    values = []
+    for column in range(1, width + 1):
+        source = cells[column - 1] if column <= len(cells) else None
+        value = edit[column] if column in edit else getattr(source, 'value', None)
+        values.append(styles.cell(sheet, source, value) if getattr(source, 'has_style', False) else value)
+    return values
+
+
+def rewrite_workbook(source_path, output_path, sheet_name, edits, layout_path=None):
+    """
+    Copy source_path to output_path one row at a time, applying {row: {column: value}} edits to
+    sheet_name (None clears a cell; rows past the end of the sheet are appended). Cell values and
+    styles are copied as they are; sheet layout comes from the sheets of layout_path (the template
+    the workbook was made from) with the same title. Charts and images are not carried over, as
+    with any openpyxl save. output_path is only replaced once the new file is complete.
+    """
+    import openpyxl
+    layout = openpyxl.load_workbook(layout_path) if layout_path else None
+    source = openpyxl.load_workbook(source_path, read_only=True)
+    target = openpyxl.Workbook(write_only=True)
+    styles = StyleCopier()
+    tmp_path = f"{output_path}.{os.getpid()}.tmp"
+    try:
+        for source_sheet in source.worksheets:
+            sheet = target.create_sheet(source_sheet.title)
+            if layout and source_sheet.title in layout.sheetnames: copy_layout(layout[source_sheet.title], sheet)
+            sheet_edits = edits if source_sheet.title == sheet_name else {}
+            row_idx = 0
+            for row_idx, cells in enumerate(source_sheet.iter_rows(min_row=1), 1):
+                sheet.append(_row_values(sheet, styles, cells, sheet_edits.get(row_idx, {})))
+            for row in sorted(r for r in sheet_edits if r > row_idx):
+                for _ in range(row_idx + 1, row): sheet.append([])
+                sheet.append(_row_values(sheet, styles, (), sheet_edits[row]))
+                row_idx = row
+        target.save(tmp_path)
+        os.replace(tmp_path, output_path)
+    finally:
+        source.close()
+        if os.path.exists(tmp_path): os.remove(tmp_path)
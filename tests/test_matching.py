@@ -0,0 +1,24 @@
+from crm_qc.matching import plan_fuzzy_matches, plan_name_matches
+
+
+def test_fuzzy_pair_accepted_when_both_sides_are_clear():
+    pairs, ambiguous = plan_fuzzy_matches(['Acme Widgetz Corp_2025-01-01.pdf'], ['Acme Widgets Corp_2024-12-01.pdf'])
+    assert pairs == {'Acme Widgetz Corp_2025-01-01.pdf': ('Acme Widgets Corp_2024-12-01.pdf', 0.882)}
+    assert ambiguous == 0
+
+
+def test_fuzzy_pair_rejected_when_salesforce_side_is_ambiguous():
+    # Each HubSpot file's only candidate is the Salesforce file, which cannot tell the two apart
+    hs = ['Acme Widgetz Corp_2025-01-01.pdf', 'Acme Widgetq Corp_2025-01-01.pdf']
+    sf = ['Acme Widgets Corp_2024-12-01.pdf']
+    pairs, ambiguous = plan_fuzzy_matches(hs, sf)
+    assert pairs == {}
+    assert ambiguous == 2
+
+
+def test_name_matches_pair_unique_bases_and_group_collisions():
+    hs = ['Acme_2025_0301.pdf', 'Beta_2025_0301.pdf', 'Beta_2025_0401.pdf', 'Gamma_2025_0301.pdf']
+    sf = ['Beta_2025_0302.pdf', 'Acme_2025_0302.pdf', 'Delta_2025_0302.pdf']
+    pairs, collisions = plan_name_matches(hs, sf)
+    assert pairs == {'Acme': ('Acme_2025_0301.pdf', 'Acme_2025_0302.pdf')}
+    assert collisions == {'Beta': (['Beta_2025_0301.pdf', 'Beta_2025_0401.pdf'], ['Beta_2025_0302.pdf'])}
@@ -0,0 +1,93 @@
+import os
+import pytest
+from crm_qc import mover
+from crm_qc.mover import TriagePlan, execute_moves, move_unit, resume_moves, rollback_moves
+from crm_qc.state import TargetStore
+
+
+@pytest.fixture
+def triage(tmp_path):
+    """Two folders with two pairs and an orphan, their moves planned and journaled."""
+    hs_dir, sf_dir = tmp_path / 'hubspot', tmp_path / 'salesforce'
+    hs_dir.mkdir()
+    sf_dir.mkdir()
+    for folder, names in ((hs_dir, ('A_2025.pdf', 'B_2025.pdf', 'Orphan_2025.pdf')), (sf_dir, ('A_2024.pdf', 'B_2024.pdf'))):
+        for name in names: (folder / name).write_bytes(name.encode())
+    plan = TriagePlan()
+    plan.add_pair('A', str(hs_dir), str(sf_dir), 'A_2025.pdf', 'A_2024.pdf')
+    plan.add_pair('B', str(hs_dir), str(sf_dir), 'B_2025.pdf', 'B_2024.pdf')
+    plan.add_file('orphan', 'hs', str(hs_dir), 'Orphan_2025.pdf', 'UNMATCHED_PAIRS')
+    store = TargetStore(str(tmp_path / 'targets.db'))
+    store.begin_triage({'hs_dir': str(hs_dir), 'sf_dir': str(sf_dir)}, plan.moves)
+    yield store, plan, hs_dir, sf_dir
+    store.close()
+
+
+def interrupt_after(monkeypatch, renames):
+    """Let the first `renames` renames through, then raise KeyboardInterrupt as Ctrl+C would."""
+    real_rename, calls = mover.rename, [0]
+
+    def rename(src, dst):
+        calls[0] += 1
+        if calls[0] > renames: raise KeyboardInterrupt
+        real_rename(src, dst)
+    monkeypatch.setattr(mover, 'rename', rename)
+
+
+def states(store):
+    return [row[-1] for row in store.journal()]
+
+
+def test_interrupted_triage_is_resumed_and_the_split_pair_completed(triage, monkeypatch):
+    store, plan, hs_dir, sf_dir = triage
+    interrupt_after(monkeypatch, 3)  # pair A, then B's HubSpot file only
+    with pytest.raises(KeyboardInterrupt):
+        execute_moves(store, plan.moves)
+    assert states(store) == ['done', 'done', 'planned', 'planned', 'planned']
+    assert list(store.load()['matches']) == ['A']
+    assert (hs_dir / 'MATCHED_PAIRS' / 'B_2025.pdf').exists() and (sf_dir / 'B_2024.pdf').exists()
+
+    monkeypatch.undo()
+    moved, failed = resume_moves(store, workers=1)
+    assert (dict(moved), failed) == ({'match': 1, 'orphan': 1}, 0)
+    assert states(store) == ['done'] * 5
+    matches = store.load()['matches']
+    assert list(matches) == ['A', 'B']
+    assert matches['B']['sf'] == str(sf_dir / 'MATCHED_PAIRS' / 'B_2024.pdf')
+    assert matches['B']['fingerprints']['hs']['sha256']
+    assert sorted(os.listdir(hs_dir / 'UNMATCHED_PAIRS')) == ['Orphan_2025.pdf']
+
+
+def test_rollback_restores_the_sources_and_cancels_what_was_still_planned(triage, monkeypatch):
+    store, plan, hs_dir, sf_dir = triage
+    interrupt_after(monkeypatch, 3)
+    with pytest.raises(KeyboardInterrupt):
+        execute_moves(store, plan.moves)
+    monkeypatch.undo()
+
+    # B's HubSpot file was renamed but never journaled as done; it is found at its destination
+    restored, stuck = rollback_moves(store, workers=1)
+    assert (restored, stuck) == (3, 0)
+    assert states(store) == ['rolled_back', 'rolled_back', 'rolled_back', 'cancelled', 'cancelled']
+    assert store.load()['matches'] == {}
+    assert sorted(f for f in os.listdir(hs_dir) if f.endswith('.pdf')) == ['A_2025.pdf', 'B_2025.pdf', 'Orphan_2025.pdf']
+    assert sorted(f for f in os.listdir(sf_dir) if f.endswith('.pdf')) == ['A_2024.pdf', 'B_2024.pdf']
+
+
+def test_rollback_after_a_completed_triage_moves_everything_back(triage):
+    store, plan, hs_dir, sf_dir = triage
+    execute_moves(store, plan.moves)
+    assert rollback_moves(store, workers=1) == (5, 0)
+    assert sorted(f for f in os.listdir(hs_dir) if f.endswith('.pdf')) == ['A_2025.pdf', 'B_2025.pdf', 'Orphan_2025.pdf']
+    assert sorted(f for f in os.listdir(sf_dir) if f.endswith('.pdf')) == ['A_2024.pdf', 'B_2024.pdf']
+    assert store.load()['matches'] == {}
+
+
+def test_move_unit_moves_a_pair_back_when_its_second_file_fails(triage):
+    store, plan, hs_dir, sf_dir = triage
+    mover.make_dirs(plan.moves)
+    os.remove(sf_dir / 'A_2024.pdf')
+    unit_states, fingerprints, error, _ = move_unit(plan.moves[:2])
+    assert isinstance(error, FileNotFoundError) and fingerprints is None
+    assert unit_states == {0: 'failed', 1: 'failed'}
+    assert (hs_dir / 'A_2025.pdf').exists() and not (hs_dir / 'MATCHED_PAIRS' / 'A_2025.pdf').exists()
@@ -0,0 +1,85 @@
+import os
+import openpyxl
+from benchmarks.corpus import make_template
+from crm_qc import reports
+from crm_qc.fingerprints import refresh_pair_fingerprints
+from crm_qc.row_index import RowIndex, input_signature, scan_report_column
+from crm_qc.state import TargetStore
+
+
+def make_client(tmp_path, name, content=b'hs'):
+    entry = {'hs': str(tmp_path / f'{name}_hs.pdf'), 'sf': str(tmp_path / f'{name}_sf.pdf'),
+             'status_pdf': 'completed', 'status_excel': 'completed'}
+    (tmp_path / f'{name}_hs.pdf').write_bytes(content)
+    (tmp_path / f'{name}_sf.pdf').write_bytes(b'sf')
+    refresh_pair_fingerprints(entry)
+    return entry
+
+
+def setup_results(tmp_path, monkeypatch, workbook_rows):
+    results = tmp_path / 'results'
+    results.mkdir()
+    monkeypatch.setattr(reports, 'RESULTS_DIR', str(results))
+    monkeypatch.setattr(reports, 'OUTPUT_EXCEL', str(results / 'report.xlsx'))
+    make_template(reports.OUTPUT_EXCEL)
+    wb = openpyxl.load_workbook(reports.OUTPUT_EXCEL)
+    for name, row in workbook_rows.items():
+        wb[reports.SHEET_NAME].cell(row=row, column=4).value = name
+    wb.save(reports.OUTPUT_EXCEL)
+    return results
+
+
+def test_scan_report_column_skips_header_and_keeps_first_occurrence():
+    rows = [('#', None, None, 'Report '), (1, None, None, 'A'), (2, None, None, None), (3, None, None, 'A'),
+            (4, None, None, 'B')]
+    assert scan_report_column(rows, header_row=3, report_col=4) == {'A': 4, 'B': 7}
+    assert scan_report_column(rows[3:], header_row=3, report_col=4, first_row=6) == {'A': 6, 'B': 7}
+
+
+def test_row_index_reuses_a_row_only_while_it_still_names_the_client(tmp_path):
+    wb = openpyxl.Workbook()
+    sheet = wb.active
+    sheet.cell(row=4, column=4).value = 'A'
+    sheet.cell(row=5, column=4).value = 'Someone else'
+    index = RowIndex(sheet, 4, {'A': 4, 'B': 5})
+    assert index.locate('A') == (4, True)
+    assert index.locate('B') == (6, False)
+    index.assign('B', 6)
+    assert index.locate('C') == (7, False)
+
+
+def test_reconcile_indexes_rows_saved_after_the_last_indexed_row(tmp_path, monkeypatch):
+    setup_results(tmp_path, monkeypatch, {'A': 4, 'B': 5})
+    store = TargetStore(str(tmp_path / 't.db'))
+    targets = {name: make_client(tmp_path, name) for name in ('A', 'B', 'C')}
+    store.replace({'matches': targets})
+    store.set_report_rows({'A': (4, input_signature(targets['A']))})
+    rows = reports.reconcile_report_rows(store, targets)
+    assert rows == {'A': (4, input_signature(targets['A'])), 'B': (5, input_signature(targets['B']))}
+    assert [targets[n]['status_excel'] for n in 'ABC'] == ['completed', 'completed', 'pending']
+    store.close()
+
+
+def test_reconcile_rerenders_a_client_whose_exports_changed(tmp_path, monkeypatch):
+    results = setup_results(tmp_path, monkeypatch, {'A': 4, 'B': 5})
+    store = TargetStore(str(tmp_path / 't.db'))
+    targets = {name: make_client(tmp_path, name) for name in ('A', 'B')}
+    store.replace({'matches': targets})
+    store.set_report_rows({name: (row, input_signature(targets[name])) for name, row in (('A', 4), ('B', 5))})
+    for name in 'AB': (results / f'{name}_MATCH_0101_0900.pdf').write_bytes(b'%PDF')
+    with open(targets['A']['hs'], 'wb') as f: f.write(b'new export')
+
+    reports.reconcile_report_rows(store, targets)
+    assert targets['A']['status_excel'] == 'pending' and targets['A']['status_pdf'] == 'pending'
+    assert not os.path.exists(results / 'A_MATCH_0101_0900.pdf')
+    assert targets['B']['status_pdf'] == 'completed' and os.path.exists(results / 'B_MATCH_0101_0900.pdf')
+    assert store.load()['matches']['A']['status_pdf'] == 'pending'
+
+    # Once Step 02 has rendered the new exports the fresh artifact is kept; only the row is still stale
+    store.set_status('A', 'status_pdf', 'completed')
+    (results / 'A_Comparison_0101_0930.pdf').write_bytes(b'%PDF')
+    targets = store.load()['matches']
+    reports.reconcile_report_rows(store, targets)
+    assert targets['A']['status_pdf'] == 'completed' and targets['A']['status_excel'] == 'pending'
+    assert os.path.exists(results / 'A_Comparison_0101_0930.pdf')
+    store.close()
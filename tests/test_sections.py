@@ -0,0 +1,82 @@
+import re
+import pytest
+from crm_qc.sections import SECTIONS, SectionSegmenter, clean_text, segment_sections
+from crm_qc.streaming import SectionStream
+
+MARKERS = {sec['key']: sec['marker'] for sec in SECTIONS}
+
+
+def baseline_section_text(text, config):
+    """get_section_text as the original Step 03 had it: one regex search per marker."""
+    start_marker, end_marker = config['marker'], config['next_marker']
+    start_match = re.search(re.escape(start_marker), text, re.IGNORECASE)
+    if not start_match: return None
+    start_idx = start_match.start()
+    if end_marker:
+        end_match = re.search(re.escape(end_marker), text[start_idx + len(start_marker):], re.IGNORECASE)
+        if end_match:
+            end_idx = start_idx + len(start_marker) + end_match.start()
+        else:
+            end_idx = len(text)
+            for sec in SECTIONS:
+                if sec['marker'] == start_marker: continue
+                alt_match = re.search(re.escape(sec['marker']), text[start_idx + len(start_marker):], re.IGNORECASE)
+                if alt_match: end_idx = min(end_idx, start_idx + len(start_marker) + alt_match.start())
+    else:
+        end_idx = len(text)
+    return text[start_idx:end_idx].strip()
+
+
+def baseline_segment(text):
+    result = {}
+    for sec in SECTIONS:
+        raw = baseline_section_text(text, sec)
+        result[sec['key']] = None if raw is None else clean_text(raw, sec['marker'])
+    return result
+
+
+def report(*parts):
+    return '\n'.join(parts)
+
+
+def table(name, rows=3):
+    return '\n'.join(f"{name} {i} 1,{i}00 {i}.5%" for i in range(rows))
+
+
+FULL = report(*(f"{sec['marker']}\n{table(sec['key'])}" for sec in SECTIONS))
+DOCUMENTS = {
+    'all sections': FULL,
+    # pdfminer ends every page with a form feed; a table running onto the next page repeats its header
+    'repeated headers across pages': FULL.replace(table('Outcome'), table('Outcome') + '\n\f' + MARKERS['Outcome']
+                                                  + '\n' + table('Outcome more')),
+    'missing section': FULL.replace(MARKERS['Day of Week'], 'Calls by Weekday'),
+    'next marker missing, falls back to the nearest other marker':
+        report(MARKERS['Summary Page'], table('s'), MARKERS['Hour of Day'], table('h'), MARKERS['Diagnosis'], table('d')),
+    'sections out of order': report(MARKERS['Outcome'], table('o'), MARKERS['Site Page'], table('p'),
+                                    MARKERS['Hour of Day'], table('h'), MARKERS['Day of Week'], table('w')),
+    'mixed case markers and extra whitespace': FULL.upper().replace('\n', ' \n\n  '),
+    'no markers': table('nothing', 10),
+}
+
+
+@pytest.mark.parametrize('text', DOCUMENTS.values(), ids=DOCUMENTS.keys())
+def test_single_scan_segmenter_matches_the_per_marker_search(text):
+    assert segment_sections(text) == baseline_segment(text)
+
+
+@pytest.mark.parametrize('text', DOCUMENTS.values(), ids=DOCUMENTS.keys())
+def test_section_stream_matches_the_whole_document_segmenter(text):
+    text = text.replace('\n', '\n\f', 2) + '\f'  # a few short pages, then the rest in one
+    stream, streamed = SectionStream(SectionSegmenter()), {}
+    for page in re.split(r'(?<=\f)', text):
+        closed = stream.feed(page)
+        assert not closed.keys() & streamed.keys()
+        streamed.update(closed)
+    streamed.update(stream.finish())
+    assert streamed == baseline_segment(text)
+
+
+def test_section_stream_closes_a_section_as_soon_as_its_next_marker_arrives():
+    stream = SectionStream(SectionSegmenter())
+    assert stream.feed(f"{MARKERS['Summary Page']} {table('s')}\f") == {}
+    assert stream.feed(f"{MARKERS['Site Page']} {table('p')}\f") == {'Summary Page': clean_text(table('s'))}
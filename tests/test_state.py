@@ -0,0 +1,26 @@
+from crm_qc.mover import Move
+from crm_qc.state import TargetStore
+
+
+def test_finish_moves_keeps_the_position_of_a_client_matched_again(tmp_path):
+    store = TargetStore(str(tmp_path / 'targets.db'))
+    store.replace({'matches': {'A': {'hs': 'a1', 'status_pdf': 'completed', 'status_excel': 'completed'},
+                               'B': {'hs': 'b1', 'status_pdf': 'completed', 'status_excel': 'completed'}}})
+    store.finish_moves({}, [(7, 'A', {'hs': 'a2', 'status_pdf': 'pending', 'status_excel': 'pending'}),
+                            (8, 'C', {'hs': 'c1', 'status_pdf': 'pending', 'status_excel': 'pending'})])
+    matches = store.load()['matches']
+    assert list(matches) == ['A', 'B', 'C']
+    assert matches['A'] == {'hs': 'a2', 'status_pdf': 'pending', 'status_excel': 'pending'}
+    assert matches['B']['status_pdf'] == 'completed'
+    store.close()
+
+
+def test_journal_end_continues_after_both_moves_and_match_positions(tmp_path):
+    store = TargetStore(str(tmp_path / 'targets.db'))
+    assert store.journal_end() == (0, 0)
+    store.begin_triage({}, [Move(0, 0, 'match', 'A', 'hs', 's0', 'd0', None), Move(1, 0, 'match', 'A', 'sf', 's1', 'd1', None),
+                            Move(2, 1, 'orphan', None, 'hs', 's2', 'd2', None)])
+    assert store.journal_end() == (3, 2)
+    store.finish_moves({0: 'done', 1: 'done'}, [(5, 'A', {'hs': 'd0', 'sf': 'd1'})])
+    assert store.journal_end() == (3, 6)
+    store.close()
@@ -0,0 +1,88 @@
+from benchmarks.corpus import write_pdf
+from crm_qc import reports, table_diff
+from crm_qc.shards import RowBuffer
+from crm_qc.table_diff import diff_rows, parse_row, section_row_diffs
+
+BASE = {'Summary Page': 'Cardiac 1 100', 'Site Page': 'Fall 1 200', 'Day of Week': 'Trauma 1 300',
+        'Hour of Day': 'Poisoning 1 400', 'Outcome': 'Behavioral 1 500 Sick Person 1 600',
+        'Diagnosis': 'Obstetric 1 700'}
+
+
+def report_text(**changes):
+    sections = dict(BASE, **changes)
+    return ' '.join(f"{sec['marker']} {sections[sec['key']]}" for sec in reports.SECTIONS)
+
+
+def rows(*texts, section=None):
+    return [parse_row(text, section) for text in texts]
+
+
+def analyse(tmp_path, text_hs, text_sf, row_diff):
+    paths = {'hs': str(tmp_path / 'hs.pdf'), 'sf': str(tmp_path / 'sf.pdf')}
+    write_pdf(paths['hs'], [[['HubSpot']]], "20250301091500")
+    write_pdf(paths['sf'], [[['Salesforce']]], "20250302113000")
+    sheet, lines, record = RowBuffer(), [], {}
+    assert reports.process_client_analysis(sheet, None, {}, 'Client', paths, lines, record=record,
+                                           extract=lambda hs, sf: (text_hs, text_sf), row_diff=row_diff)
+    return lines, record
+
+
+def test_identical_rows_cancel_and_changed_rows_pair_by_label():
+    hs = rows('Cardiac 1 100 200', 'Fall 2 300', 'Trauma 3 400')
+    sf = rows('Trauma 3 400', 'Cardiac 1 100 250', 'Poisoning 4 10')
+    differences, tolerated = diff_rows(hs, sf)
+    assert tolerated == 0
+    assert [(d.hs, d.sf) for d in differences] == [
+        ('Cardiac 1 100 200', 'Cardiac 1 100 250'), ('Fall 2 300', None), (None, 'Poisoning 4 10')]
+
+
+def test_numeric_cells_within_tolerance_count_as_equal():
+    differences, tolerated = diff_rows(rows('Cardiac 1 (1,000) 12.5%'), rows('Cardiac 1 (1,003) 12.5%'), 5.0)
+    assert (differences, tolerated) == ([], 1)
+    differences, tolerated = diff_rows(rows('Cardiac 1 (1,000)'), rows('Cardiac 1 1,000'), 5.0)
+    assert len(differences) == 1 and tolerated == 0
+
+
+def test_rows_of_a_single_discrepant_section_are_kept_whatever_the_tracker_guessed(monkeypatch):
+    hs = rows('Sick Person 1 600', section='Hour of Day')
+    sf = rows('Sick Person 1 620', section='Hour of Day')
+    monkeypatch.setattr(table_diff, 'changed_rows', lambda *args: (hs, sf))
+    result = section_row_diffs('hs.pdf', 'sf.pdf', ['Outcome'])
+    assert [d.sf for d in result.sections['Outcome']] == ['Sick Person 1 620']
+    assert result.unattributed == []
+
+
+def test_rows_outside_the_discrepant_sections_are_listed_not_dropped(monkeypatch, tmp_path):
+    hs = rows('Cardiac 1 100', section='Summary Page') + rows('Sick Person 1 600', section='Hour of Day')
+    sf = rows('Cardiac 1 101', section='Summary Page') + rows('Sick Person 1 620', section='Hour of Day')
+    monkeypatch.setattr(table_diff, 'changed_rows', lambda *args: (hs, sf))
+    lines, record = analyse(tmp_path, report_text(),
+                            report_text(**{'Summary Page': 'Cardiac 1 101', 'Outcome': 'Behavioral 1 500 Sick Person 1 620'}),
+                            lambda hs_path, sf_path, keys: section_row_diffs(hs_path, sf_path, keys))
+    assert "- **Summary Page**: 1 (Data Discrepancy Identified)" in lines
+    assert "  - Differing rows whose section could not be determined:" in lines
+    assert "  - HubSpot `Sick Person 1 600` | Salesforce `Sick Person 1 620`" in lines
+    assert record['sections']['Summary Page'][2] == 2
+    assert record['sections']['Outcome'][2] == 0
+
+
+def test_tolerance_does_not_hide_a_change_blamed_on_another_section(monkeypatch, tmp_path):
+    # The +20 row of Outcome is read under Hour of Day; only the +1 row is credited to Outcome
+    hs = rows('Behavioral 1 500', section='Outcome') + rows('Sick Person 1 600', section='Hour of Day')
+    sf = rows('Behavioral 1 501', section='Outcome') + rows('Sick Person 1 620', section='Hour of Day')
+    monkeypatch.setattr(table_diff, 'changed_rows', lambda *args: (hs, sf))
+    lines, record = analyse(tmp_path, report_text(), report_text(Outcome='Behavioral 1 501 Sick Person 1 620'),
+                            lambda hs_path, sf_path, keys: section_row_diffs(hs_path, sf_path, keys, 5.0))
+    assert "- **Outcome**: 1 (Data Discrepancy Identified)" in lines
+    assert "  - HubSpot `Sick Person 1 600` | Salesforce `Sick Person 1 620`" in lines
+    assert record['verdict'] == 1
+
+
+def test_section_downgraded_when_every_changed_row_is_within_tolerance(monkeypatch, tmp_path):
+    hs = rows('Behavioral 1 500', section='Outcome') + rows('Sick Person 1 600', section='Hour of Day')
+    sf = rows('Behavioral 1 501', section='Outcome') + rows('Sick Person 1 603', section='Hour of Day')
+    monkeypatch.setattr(table_diff, 'changed_rows', lambda *args: (hs, sf))
+    lines, record = analyse(tmp_path, report_text(), report_text(Outcome='Behavioral 1 501 Sick Person 1 603'),
+                            lambda hs_path, sf_path, keys: section_row_diffs(hs_path, sf_path, keys, 5.0))
+    assert "- **Outcome**: 0 (Data Match within numeric tolerance (2 rows))" in lines
+    assert record['verdict'] == 0
@@ -0,0 +1,33 @@
+import openpyxl
+from openpyxl.styles import Border, Font, Side
+from crm_qc.workbook_stream import rewrite_workbook
+
+SHEET = 'QA Report Test Tracker'
+
+
+def test_rewrite_applies_edits_and_keeps_styles_and_layout(tmp_path):
+    template, saved = str(tmp_path / 'template.xlsx'), str(tmp_path / 'saved.xlsx')
+    wb = openpyxl.Workbook()
+    sheet = wb.active
+    sheet.title = SHEET
+    sheet['A1'] = 'QA Tracker'
+    sheet['A1'].font = Font(bold=True)
+    sheet.merge_cells('A1:D1')
+    sheet.column_dimensions['D'].width = 40
+    for row in range(4, 7): sheet.cell(row=row, column=4).border = Border(bottom=Side(style='thin'))
+    wb.save(template)
+    sheet['D4'], sheet['E4'], sheet['F4'] = 'Client A', 1, 'note'
+    wb.create_sheet('Notes')['A1'] = '=1+1'
+    wb.save(saved)
+
+    rewrite_workbook(saved, saved, SHEET, {4: {5: 0}, 5: {4: 'Client B', 5: 1}, 9: {4: 'Client C'}}, template)
+
+    wb = openpyxl.load_workbook(saved)
+    sheet = wb[SHEET]
+    assert [sheet.cell(row=4, column=c).value for c in (4, 5, 6)] == ['Client A', 0, 'note']
+    assert [sheet.cell(row=5, column=c).value for c in (4, 5)] == ['Client B', 1]
+    assert sheet['D9'].value == 'Client C' and sheet['D8'].value is None
+    assert sheet['A1'].font.b and [str(r) for r in sheet.merged_cells.ranges] == ['A1:D1']
+    assert sheet.column_dimensions['D'].width == 40
+    assert sheet['D5'].border.bottom.style == 'thin'
+    assert wb['Notes']['A1'].value == '=1+1'